@@ -0,0 +1,80 @@
+"""Robust anomaly detection for question time series.
+
+Each point is compared with the median and MAD of the points before it
+(a trailing window), so an outlier never inflates its own threshold the
+way mean ± kσ does. All rows of a question are scored in one vectorized
+pass over a (rows, periods) matrix.
+"""
+from typing import List
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+DEFAULT_WINDOW = 12
+MIN_HISTORY = 6
+# Median/MAD from a dozen points is noisy, so thresholds sit above the textbook 3.5
+MEDIUM_THRESHOLD = 5.0
+HIGH_THRESHOLD = 8.0
+
+# Scale factors that make MAD and mean absolute deviation consistent with σ for normal data
+MAD_SCALE = 1.4826
+MEAN_AD_SCALE = 1.2533
+# Lower bound on the scale, relative to the median (and absolute below |median| = 1), so a constant
+# window does not turn every small change into an infinite score
+SCALE_FLOOR = 0.02
+
+
+def rolling_robust_scores(series: np.ndarray, window: int = DEFAULT_WINDOW, min_history: int = MIN_HISTORY):
+    """Return (robust z-scores, rolling medians, rolling scales), each shaped like `series`.
+
+    Scores are NaN where fewer than `min_history` earlier values are available.
+    """
+    series = np.atleast_2d(np.asarray(series, dtype=float))
+    rows, periods = series.shape
+
+    # Window ending just before t: pad with NaN so every t has `window` slots
+    padded = np.concatenate([np.full((rows, window), np.nan), series[:, :-1]], axis=1)
+    windows = sliding_window_view(padded, window, axis=1)[:, :periods]
+
+    history = np.sum(~np.isnan(windows), axis=2)
+    enough = history >= min_history
+    median = np.full((rows, periods), np.nan)
+    scale = np.full((rows, periods), np.nan)
+    if enough.any():
+        valid_windows = windows[enough]
+        valid_median = np.nanmedian(valid_windows, axis=1)
+        deviations = np.abs(valid_windows - valid_median[:, None])
+        valid_scale = MAD_SCALE * np.nanmedian(deviations, axis=1)
+        # Fall back to mean absolute deviation when more than half of the window is identical
+        fallback = valid_scale == 0
+        valid_scale[fallback] = MEAN_AD_SCALE * np.nanmean(deviations[fallback], axis=1)
+        median[enough] = valid_median
+        scale[enough] = np.maximum(valid_scale, SCALE_FLOOR * np.maximum(1.0, np.abs(valid_median)))
+
+    with np.errstate(invalid="ignore"):
+        scores = (series - median) / scale
+    scores[~enough | np.isnan(series)] = np.nan
+    return scores, median, scale
+
+
+def detect_anomalies(series: np.ndarray, window: int = DEFAULT_WINDOW, threshold: float = MEDIUM_THRESHOLD) -> List[List[dict]]:
+    """Return, for every row, the anomalous points with their score, expected range and severity"""
+    scores, median, scale = rolling_robust_scores(series, window)
+    series = np.atleast_2d(np.asarray(series, dtype=float))
+    flagged = np.abs(np.nan_to_num(scores, nan=0.0)) > threshold
+
+    results = [[] for _ in range(series.shape[0])]
+    for row, index in zip(*np.nonzero(flagged)):
+        score = float(scores[row, index])
+        results[row].append({
+            "index": int(index),
+            "value": float(series[row, index]),
+            "score": score if np.isfinite(score) else None,
+            "expected": float(median[row, index]),
+            "expected_range": {
+                "min": float(median[row, index] - threshold * scale[row, index]),
+                "max": float(median[row, index] + threshold * scale[row, index])
+            },
+            "severity": "high" if abs(score) > HIGH_THRESHOLD else "medium"
+        })
+    return results
@@ -0,0 +1,137 @@
+"""Rule-based Turkish commentary for numeric table responses.
+
+Builds a short comment for every table row from the employee's own history
+(change vs last period, vs average, streaks), from peers' values in the same
+period (percentile) and from the row's alert thresholds. No external calls
+are made. `escalate` is set when a value breaches a threshold or is a robust
+outlier against its history, which hybrid mode uses to ask the LLM as well.
+"""
+import math
+from typing import List, Optional
+
+import numpy as np
+
+from anomalies import MEDIUM_THRESHOLD, rolling_robust_scores
+
+# Changes smaller than this (in percent) are described as stable
+STABLE_PERCENT = 2.0
+
+
+def parse_number(value) -> Optional[float]:
+    """Parse '1.234,5', '1234.5', '%12' or '12 TL' style input; None when not numeric"""
+    if value is None:
+        return None
+    try:
+        # Plain numbers, including exponents like '1e5' that the digit filter below would mangle
+        number = float(str(value).strip())
+        return number if math.isfinite(number) else None
+    except ValueError:
+        pass
+    text = str(value).strip().replace("%", "").replace(" ", "")
+    text = "".join(ch for ch in text if ch.isdigit() or ch in ",.-")
+    if not text or text in ("-", ",", "."):
+        return None
+    if "," in text:
+        # Turkish format: dots group thousands, the comma is the decimal separator
+        text = text.replace(".", "").replace(",", ".")
+    elif text.count(".") > 1:
+        text = text.replace(".", "")
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def format_number(value: float) -> str:
+    """Format with Turkish separators and at most two decimals"""
+    text = f"{value:,.2f}".rstrip("0").rstrip(".")
+    return text.replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def _with_unit(value: float, unit: Optional[str]) -> str:
+    return f"{format_number(value)} {unit}" if unit else format_number(value)
+
+
+def _streak(values: List[float]) -> int:
+    """Signed length of the run of consecutive increases (+) or decreases (-) ending at the last value"""
+    streak = 0
+    for previous, current in zip(reversed(values[:-1]), reversed(values)):
+        step = np.sign(current - previous)
+        if step == 0 or (streak and np.sign(streak) != step):
+            break
+        streak += int(step)
+    return streak
+
+
+def describe_row(name: str, unit: Optional[str], value: float, history: List[float], peers: List[float],
+                 min_threshold: Optional[float] = None, max_threshold: Optional[float] = None) -> dict:
+    """Return {"text": comment sentence, "escalate": bool} for one row.
+
+    `history` holds the same employee's earlier values, oldest first; `peers` holds other
+    employees' values for the same period.
+    """
+    parts = []
+    escalate = False
+
+    if history:
+        previous = history[-1]
+        if previous:
+            change = (value - previous) / abs(previous) * 100
+            if abs(change) < STABLE_PERCENT:
+                parts.append(f"önceki döneme göre yatay seyretti ({_with_unit(previous, unit)})")
+            else:
+                direction = "arttı" if change > 0 else "azaldı"
+                parts.append(f"önceki döneme göre %{format_number(abs(change))} {direction} ({_with_unit(previous, unit)} → {_with_unit(value, unit)})")
+        elif value != previous:
+            parts.append(f"önceki dönemde 0 iken {_with_unit(value, unit)} oldu")
+
+        if len(history) >= 2:
+            average = float(np.mean(history))
+            if average:
+                gap = (value - average) / abs(average) * 100
+                if abs(gap) >= STABLE_PERCENT:
+                    side = "üzerinde" if gap > 0 else "altında"
+                    parts.append(f"son {len(history)} dönem ortalamasının %{format_number(abs(gap))} {side}")
+
+        streak = _streak(history + [value])
+        if abs(streak) >= 3:
+            parts.append(f"{abs(streak)} dönemdir üst üste {'artıyor' if streak > 0 else 'azalıyor'}")
+
+        scores, _, _ = rolling_robust_scores(np.array(history + [value]))
+        score = scores[0, -1]
+        if not np.isnan(score) and abs(score) > MEDIUM_THRESHOLD:
+            parts.append("geçmiş değerlere göre olağan dışı")
+            escalate = True
+    else:
+        parts.append("ilk kez girildi")
+
+    if peers:
+        below = sum(peer < value for peer in peers) + 0.5 * sum(peer == value for peer in peers)
+        percentile = below / len(peers) * 100
+        parts.append(f"aynı dönemdeki {len(peers)} çalışan arasında yüzdelik sıra {round(percentile)}")
+
+    if min_threshold is not None and value < min_threshold:
+        parts.append(f"alt eşik olan {_with_unit(min_threshold, unit)} değerinin altında")
+        escalate = True
+    if max_threshold is not None and value > max_threshold:
+        parts.append(f"üst eşik olan {_with_unit(max_threshold, unit)} değerinin üzerinde")
+        escalate = True
+
+    return {"text": f"{name}: {_with_unit(value, unit)}; " + ", ".join(parts) + ".", "escalate": escalate}
+
+
+def build_local_comment(rows: List[dict]) -> dict:
+    """Combine row sentences into one comment.
+
+    Each row dict carries the keyword arguments of describe_row. Returns
+    {"comment": str or None, "escalate": bool}; comment is None when no row has a numeric value.
+    """
+    described = [describe_row(**row) for row in rows if row.get("value") is not None]
+    if not described:
+        return {"comment": None, "escalate": False}
+
+    flagged = sum(row["escalate"] for row in described)
+    lines = [row["text"] for row in described]
+    if flagged:
+        lines.append(f"{flagged} kalemde dikkat gerektiren bir değişim var.")
+    return {"comment": "\n".join(lines), "escalate": bool(flagged)}
@@ -0,0 +1,295 @@
+"""Batched seasonal forecasting for question time series.
+
+All rows of a question are stacked into a (rows, periods) matrix and every
+model is fitted over all rows at once, vectorized over the rows and over a
+small grid of smoothing parameters. The model used for each row is chosen
+by holdout backtest error, and fitted results are cached per data version.
+Series are placed on a continuous monthly calendar first, so a missing
+month is a gap to fill rather than a shift of every later season.
+"""
+import copy
+import hashlib
+from collections import OrderedDict
+from typing import List, Tuple
+
+import numpy as np
+
+Z_80 = 1.2816
+Z_95 = 1.96
+
+ALPHAS = np.array([0.1, 0.3, 0.5, 0.8])
+BETAS = np.array([0.05, 0.15, 0.3])
+GAMMAS = np.array([0.05, 0.2, 0.4])
+
+FORECAST_CACHE_SIZE = 256
+
+
+def fill_missing(series: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs along each row, back-fill leading NaNs, zero all-NaN rows"""
+    filled = np.array(series, dtype=float)
+    rows, periods = filled.shape
+    mask = np.isnan(filled)
+    if not mask.any():
+        return filled
+
+    index = np.where(~mask, np.arange(periods), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    filled = filled[np.arange(rows)[:, None], index]
+
+    first_valid = np.argmax(~np.isnan(filled), axis=1)
+    leading = np.isnan(filled)
+    filled[leading] = np.take_along_axis(filled, first_valid[:, None], axis=1).repeat(periods, axis=1)[leading]
+    return np.nan_to_num(filled, nan=0.0)
+
+
+def reindex_monthly(periods: List[str], series: np.ndarray) -> Tuple[List[str], np.ndarray]:
+    """Spread YYYY-MM columns onto the full monthly range between the first and last period; gaps are NaN"""
+    series = np.atleast_2d(np.asarray(series, dtype=float))
+    ordinals = []
+    columns = []
+    for column, period in enumerate(periods):
+        year, month = (int(part) for part in period.split("-"))
+        # Responses without a year/month cannot be placed on the calendar
+        if year >= 1 and 1 <= month <= 12:
+            ordinals.append(year * 12 + month - 1)
+            columns.append(column)
+    if not ordinals:
+        return [], series[:, :0]
+
+    start = min(ordinals)
+    full = np.full((series.shape[0], max(ordinals) - start + 1), np.nan)
+    full[:, np.array(ordinals) - start] = series[:, columns]
+    full_periods = [f"{ordinal // 12}-{ordinal % 12 + 1:02d}" for ordinal in range(start, max(ordinals) + 1)]
+    return full_periods, full
+
+
+def _naive(series: np.ndarray, horizon: int, season_length: int) -> dict:
+    rows, periods = series.shape
+    errors = series[:, 1:] - series[:, :-1]
+    sigma = np.sqrt(np.mean(errors ** 2, axis=1))
+    steps = np.arange(1, horizon + 1)
+    return {
+        "forecast": np.repeat(series[:, -1:], horizon, axis=1),
+        "sigma": sigma,
+        "in_sample_mae": np.mean(np.abs(errors), axis=1),
+        "variance_factor": np.broadcast_to(steps, (rows, horizon)).astype(float),
+        "params": [{} for _ in range(rows)]
+    }
+
+
+def _seasonal_naive(series: np.ndarray, horizon: int, season_length: int) -> dict:
+    rows, periods = series.shape
+    m = season_length
+    errors = series[:, m:] - series[:, :-m]
+    sigma = np.sqrt(np.mean(errors ** 2, axis=1))
+    steps = np.arange(1, horizon + 1)
+    source = periods - m + (steps - 1) % m
+    return {
+        "forecast": series[:, source],
+        "sigma": sigma,
+        "in_sample_mae": np.mean(np.abs(errors), axis=1),
+        "variance_factor": np.broadcast_to((steps - 1) // m + 1, (rows, horizon)).astype(float),
+        "params": [{"season_length": m} for _ in range(rows)]
+    }
+
+
+def _select_best(sse: np.ndarray, *grids: np.ndarray):
+    """Pick the parameter combination with the lowest SSE for every row"""
+    best = np.argmin(sse, axis=0)
+    rows = np.arange(sse.shape[1])
+    return best, rows, [grid[best] for grid in grids]
+
+
+def _holt(series: np.ndarray, horizon: int, season_length: int) -> dict:
+    rows, periods = series.shape
+    alpha_grid, beta_grid = [g.ravel() for g in np.meshgrid(ALPHAS, BETAS, indexing="ij")]
+    alpha = alpha_grid[:, None]
+    beta = beta_grid[:, None]
+
+    level = np.broadcast_to(series[:, 0], (len(alpha_grid), rows)).copy()
+    trend = np.broadcast_to(series[:, 1] - series[:, 0], (len(alpha_grid), rows)).copy()
+    sse = np.zeros((len(alpha_grid), rows))
+    sae = np.zeros((len(alpha_grid), rows))
+    level += trend
+
+    for t in range(2, periods):
+        error = series[:, t] - (level + trend)
+        sse += error ** 2
+        sae += np.abs(error)
+        level = level + trend + alpha * error
+        trend = trend + alpha * beta * error
+
+    best, row_index, (best_alpha, best_beta) = _select_best(sse, alpha_grid, beta_grid)
+    level = level[best, row_index]
+    trend = trend[best, row_index]
+    sigma = np.sqrt(sse[best, row_index] / max(periods - 2, 1))
+    in_sample_mae = sae[best, row_index] / max(periods - 2, 1)
+
+    steps = np.arange(1, horizon + 1)
+    coefficients = (best_alpha[:, None] * (1 + np.arange(horizon)[None, :] * best_beta[:, None])) ** 2
+    coefficients[:, 0] = 0.0
+    return {
+        "forecast": level[:, None] + steps[None, :] * trend[:, None],
+        "sigma": sigma,
+        "in_sample_mae": in_sample_mae,
+        "variance_factor": 1 + np.cumsum(coefficients, axis=1),
+        "params": [{"alpha": float(a), "beta": float(b)} for a, b in zip(best_alpha, best_beta)]
+    }
+
+
+def _holt_winters(series: np.ndarray, horizon: int, season_length: int) -> dict:
+    rows, periods = series.shape
+    m = season_length
+    alpha_grid, beta_grid, gamma_grid = [g.ravel() for g in np.meshgrid(ALPHAS, BETAS, GAMMAS, indexing="ij")]
+    combos = len(alpha_grid)
+    alpha = alpha_grid[:, None]
+    beta = beta_grid[:, None]
+    gamma = gamma_grid[:, None]
+
+    first_season = series[:, :m].mean(axis=1)
+    second_season = series[:, m:2 * m].mean(axis=1)
+    initial_trend = (second_season - first_season) / m
+    # Seasonal offsets are measured against the trend line through the first season
+    trend_line = first_season[:, None] + (np.arange(m)[None, :] - (m - 1) / 2) * initial_trend[:, None]
+    level = np.broadcast_to(trend_line[:, -1], (combos, rows)).copy()
+    trend = np.broadcast_to(initial_trend, (combos, rows)).copy()
+    seasonal = np.broadcast_to(series[:, :m] - trend_line, (combos, rows, m)).copy()
+    sse = np.zeros((combos, rows))
+    sae = np.zeros((combos, rows))
+
+    for t in range(m, periods):
+        position = t % m
+        error = series[:, t] - (level + trend + seasonal[:, :, position])
+        sse += error ** 2
+        sae += np.abs(error)
+        level = level + trend + alpha * error
+        trend = trend + alpha * beta * error
+        seasonal[:, :, position] += gamma * error
+
+    best, row_index, (best_alpha, best_beta, best_gamma) = _select_best(sse, alpha_grid, beta_grid, gamma_grid)
+    level = level[best, row_index]
+    trend = trend[best, row_index]
+    seasonal = seasonal[best, row_index]
+    sigma = np.sqrt(sse[best, row_index] / max(periods - m, 1))
+    in_sample_mae = sae[best, row_index] / max(periods - m, 1)
+
+    steps = np.arange(1, horizon + 1)
+    positions = (periods - 1 + steps) % m
+    lags = np.arange(horizon)
+    coefficients = (
+        best_alpha[:, None] * (1 + lags[None, :] * best_beta[:, None])
+        + best_gamma[:, None] * ((lags > 0) & (lags % m == 0))[None, :]
+    ) ** 2
+    coefficients[:, 0] = 0.0
+    return {
+        "forecast": level[:, None] + steps[None, :] * trend[:, None] + seasonal[:, positions],
+        "sigma": sigma,
+        "in_sample_mae": in_sample_mae,
+        "variance_factor": 1 + np.cumsum(coefficients, axis=1),
+        "params": [
+            {"alpha": float(a), "beta": float(b), "gamma": float(g), "season_length": m}
+            for a, b, g in zip(best_alpha, best_beta, best_gamma)
+        ]
+    }
+
+
+# name -> (fit function, minimum number of periods given the season length)
+MODELS = {
+    "naive": (_naive, lambda m: 2),
+    "seasonal_naive": (_seasonal_naive, lambda m: m + 1 if m > 1 else None),
+    "holt": (_holt, lambda m: 3),
+    "holt_winters": (_holt_winters, lambda m: 2 * m + 1 if m > 1 else None),
+}
+
+# Used when the series is too short to backtest
+DEFAULT_MODEL_ORDER = ["holt", "naive"]
+
+
+def _eligible_models(periods: int, season_length: int) -> List[str]:
+    names = []
+    for name, (_, minimum) in MODELS.items():
+        required = minimum(season_length)
+        if required is not None and periods >= required:
+            names.append(name)
+    return names
+
+
+def fit_forecast(series: np.ndarray, horizon: int, season_length: int = 12) -> List[dict]:
+    """Fit every eligible model on all rows, pick one per row by backtest MAE and forecast `horizon` steps"""
+    series = fill_missing(np.atleast_2d(series))
+    rows, periods = series.shape
+    candidates = _eligible_models(periods, season_length)
+    if not candidates:
+        return []
+
+    # Backtest: hold out the last periods, fit on the rest, compare forecasts with actuals.
+    # A model that needs more training periods than the full holdout leaves (holt_winters needs
+    # 2m+1) gets a shorter holdout, and one-step in-sample MAE when no holdout fits at all.
+    full_holdout = min(max(season_length, 1), max(1, periods // 4))
+    backtest_mae = np.full((len(candidates), rows), np.inf)
+    for k, name in enumerate(candidates):
+        fit, minimum = MODELS[name]
+        holdout = min(full_holdout, periods - minimum(season_length))
+        if holdout >= 1:
+            predicted = fit(series[:, :periods - holdout], holdout, season_length)["forecast"]
+            backtest_mae[k] = np.mean(np.abs(predicted - series[:, periods - holdout:]), axis=1)
+        else:
+            backtest_mae[k] = fit(series, 1, season_length)["in_sample_mae"]
+
+    if np.isfinite(backtest_mae).any():
+        chosen = np.argmin(backtest_mae, axis=0)
+    else:
+        fallback = next(name for name in DEFAULT_MODEL_ORDER if name in candidates)
+        chosen = np.full(rows, candidates.index(fallback))
+
+    fits = {k: MODELS[candidates[k]][0](series, horizon, season_length) for k in set(chosen.tolist())}
+
+    results = []
+    for row in range(rows):
+        k = int(chosen[row])
+        fit = fits[k]
+        forecast = fit["forecast"][row]
+        spread = fit["sigma"][row] * np.sqrt(fit["variance_factor"][row])
+        mae = backtest_mae[k, row]
+        results.append({
+            "model": candidates[k],
+            "params": fit["params"][row],
+            "forecast": forecast.tolist(),
+            "lower_80": (forecast - Z_80 * spread).tolist(),
+            "upper_80": (forecast + Z_80 * spread).tolist(),
+            "lower_95": (forecast - Z_95 * spread).tolist(),
+            "upper_95": (forecast + Z_95 * spread).tolist(),
+            "sigma": float(fit["sigma"][row]),
+            "backtest_mae": float(mae) if np.isfinite(mae) else None
+        })
+    return results
+
+
+def data_version(periods: List[str], series: np.ndarray) -> str:
+    """Stable fingerprint of a question's series; changes whenever any value or period changes"""
+    digest = hashlib.sha1("|".join(periods).encode("utf-8"))
+    digest.update(np.ascontiguousarray(series, dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+_forecast_cache: "OrderedDict[tuple, List[dict]]" = OrderedDict()
+
+
+def forecast_question_series(question_id: str, periods: List[str], series: np.ndarray,
+                             horizon: int, season_length: int = 12) -> List[dict]:
+    """Forecast all rows of a question, reusing the fit while the data version is unchanged.
+
+    Callers get their own copy, so changing a result never alters the cached fit.
+    """
+    key = (question_id, data_version(periods, series), horizon, season_length)
+    cached = _forecast_cache.get(key)
+    if cached is not None:
+        _forecast_cache.move_to_end(key)
+        return copy.deepcopy(cached)
+
+    _, monthly_series = reindex_monthly(periods, series)
+    results = fit_forecast(monthly_series, horizon, season_length)
+    _forecast_cache[key] = results
+    if len(_forecast_cache) > FORECAST_CACHE_SIZE:
+        _forecast_cache.popitem(last=False)
+    return copy.deepcopy(results)
@@ -0,0 +1,260 @@
+"""Shared LLM client with concurrency, rate, timeout and failure controls.
+
+One LLMClient is created per process and wraps a provider coroutine
+`send(prompt) -> str`. Every call waits for a token-bucket slot and a
+concurrency slot, is cut off after a timeout, and is retried with jittered
+exponential backoff. Repeated failures open a circuit breaker; while it is
+open calls fail immediately with LLMUnavailable instead of queueing up
+behind a slow provider.
+
+Every attempt is recorded in CallMetrics by call site (latency histogram,
+outcome counters, prompt and response sizes) and handed to an optional
+`on_call` hook so the application can persist a sampled call log.
+"""
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Type
+
+
+# Upper bounds in seconds; the last bucket catches everything slower
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+# Rough characters-per-token ratio used when the provider does not report token usage
+CHARS_PER_TOKEN = 4
+
+OUTCOMES = ("success", "failure", "timeout", "unavailable", "fatal")
+
+
+class CallMetrics:
+    """In-process counters and latency histograms per call site"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.sites: Dict[str, dict] = {}
+
+    def _site(self, site: str) -> dict:
+        if site not in self.sites:
+            self.sites[site] = {
+                "outcomes": {outcome: 0 for outcome in OUTCOMES},
+                "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+                "latency_sum": 0.0,
+                "latency_max": 0.0,
+                "timed_calls": 0,
+                "prompt_chars": 0,
+                "response_chars": 0
+            }
+        return self.sites[site]
+
+    def record(self, site: str, outcome: str, seconds: Optional[float], prompt_chars: int, response_chars: int):
+        entry = self._site(site)
+        entry["outcomes"][outcome] += 1
+        entry["prompt_chars"] += prompt_chars
+        entry["response_chars"] += response_chars
+        if seconds is not None:
+            bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+            entry["buckets"][bucket] += 1
+            entry["latency_sum"] += seconds
+            entry["latency_max"] = max(entry["latency_max"], seconds)
+            entry["timed_calls"] += 1
+
+    @staticmethod
+    def _quantile(buckets, count: int, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile; None when it falls in the overflow bucket"""
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return None
+
+    def snapshot(self) -> dict:
+        sites = {}
+        for site, entry in self.sites.items():
+            count = entry["timed_calls"]
+            sites[site] = {
+                "calls": sum(entry["outcomes"].values()),
+                "outcomes": dict(entry["outcomes"]),
+                "latency_seconds": {
+                    "avg": round(entry["latency_sum"] / count, 3) if count else None,
+                    "max": round(entry["latency_max"], 3),
+                    "p50_le": self._quantile(entry["buckets"], count, 0.5),
+                    "p95_le": self._quantile(entry["buckets"], count, 0.95),
+                    "histogram": {
+                        **{f"le_{bound:g}": n for bound, n in zip(LATENCY_BUCKETS, entry["buckets"])},
+                        "inf": entry["buckets"][-1]
+                    }
+                },
+                "prompt_chars": entry["prompt_chars"],
+                "response_chars": entry["response_chars"],
+                "estimated_tokens": (entry["prompt_chars"] + entry["response_chars"]) // CHARS_PER_TOKEN
+            }
+        return {"since": self.started_at, "sites": sites}
+
+
+class LLMUnavailable(Exception):
+    """Raised without calling the provider while the circuit breaker is open"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM temporarily unavailable, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Allow `rate_per_minute` calls on average with bursts of up to `burst` calls"""
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class CircuitBreaker:
+    """Open after `failure_threshold` consecutive failures, probe again after `reset_seconds`"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN and self.retry_after() == 0:
+            self.state = self.HALF_OPEN
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self._probing:
+            # Let a single call through to test whether the provider has recovered
+            self._probing = True
+            return True
+        return False
+
+    def release_probe(self):
+        self._probing = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class LLMClient:
+    def __init__(self, send: Callable[[str], Awaitable[str]], max_concurrency: int = 4,
+                 timeout_seconds: float = 60.0, rate_per_minute: float = 60.0, burst: int = 10,
+                 max_retries: int = 2, retry_base_seconds: float = 1.0,
+                 failure_threshold: int = 5, reset_seconds: float = 60.0,
+                 fatal_exceptions: Tuple[Type[Exception], ...] = (),
+                 on_call: Optional[Callable[[dict], None]] = None):
+        self._send = send
+        self.on_call = on_call
+        self.metrics = CallMetrics()
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        # Configuration errors: retrying cannot help and they say nothing about provider health
+        self.fatal_exceptions = fatal_exceptions
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.bucket = TokenBucket(rate_per_minute, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+        self.in_flight = 0
+
+    def _record(self, site: str, outcome: str, seconds: Optional[float], prompt: str,
+                response: str = "", error: Optional[Exception] = None):
+        self.metrics.record(site, outcome, seconds, len(prompt), len(response))
+        if self.on_call:
+            self.on_call({
+                "site": site,
+                "outcome": outcome,
+                "latency_ms": round(seconds * 1000, 1) if seconds is not None else None,
+                "prompt_chars": len(prompt),
+                "response_chars": len(response),
+                "error": str(error) if error else None
+            })
+
+    async def complete(self, prompt: str, site: str = "direct") -> str:
+        """Return the provider's answer; raises LLMUnavailable while the breaker is open.
+
+        `site` labels the caller in metrics; every attempt is recorded separately.
+        """
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                error = LLMUnavailable(self.breaker.retry_after())
+                self._record(site, "unavailable", None, prompt, error=error)
+                raise error
+
+            await self.bucket.acquire()
+            async with self._semaphore:
+                self.in_flight += 1
+                started = time.monotonic()
+                try:
+                    result = await asyncio.wait_for(self._send(prompt), self.timeout_seconds)
+                except self.fatal_exceptions as e:
+                    self._record(site, "fatal", None, prompt, error=e)
+                    raise
+                except asyncio.TimeoutError:
+                    self.breaker.record_failure()
+                    last_error = TimeoutError(f"LLM call timed out after {self.timeout_seconds}s")
+                    self._record(site, "timeout", time.monotonic() - started, prompt, error=last_error)
+                except Exception as e:
+                    self.breaker.record_failure()
+                    last_error = e
+                    self._record(site, "failure", time.monotonic() - started, prompt, error=e)
+                else:
+                    self.breaker.record_success()
+                    self._record(site, "success", time.monotonic() - started, prompt, result)
+                    return result
+                finally:
+                    self.in_flight -= 1
+                    # Fatal errors and cancellation must not leave a half-open probe claimed forever
+                    self.breaker.release_probe()
+
+            if attempt < self.max_retries:
+                # Full jitter keeps retries from many workers from arriving together
+                await asyncio.sleep(random.uniform(0, self.retry_base_seconds * 2 ** attempt))
+
+        raise last_error
+
+    def stats(self) -> dict:
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "retry_after_seconds": round(self.breaker.retry_after(), 1) if self.breaker.state != CircuitBreaker.CLOSED else 0,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout_seconds
+        }
@@ -0,0 +1,106 @@
+"""Local stand-in for the LLM provider used by LLMClient.
+
+A provider is an async callable `send(prompt) -> str`. StubProvider answers
+without any network call after a simulated delay, so load tests and offline
+integration runs of the submission and analytics paths see realistic
+provider timing, failures and response sizes without spending API calls.
+Batch prompts (sections tagged [c1], [c2], ...) get a JSON answer with one
+comment per key, like the real model is asked to return.
+"""
+import asyncio
+import json
+import math
+import random
+import re
+from typing import List, Mapping, Optional
+
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+BATCH_KEY_PATTERN = re.compile(r"^\s*\[(c\d+)\]", re.MULTILINE)
+
+STUB_SENTENCES = (
+    "Bu dönemdeki değerler önceki dönemlerle birlikte değerlendirildiğinde genel eğilim korunuyor.",
+    "Hedeflere yaklaşmak için öne çıkan kalemlerin yakından takip edilmesi önerilir.",
+    "Çalışanın açıklamaları verilerle tutarlı görünüyor.",
+    "Bir sonraki dönemde sapma gösteren kalemlere odaklanmak faydalı olacaktır."
+)
+
+
+class StubProviderError(Exception):
+    """Simulated provider failure"""
+
+
+class StubProvider:
+    """Answer prompts locally after a simulated provider delay.
+
+    `latency_ms` is the fixed delay, the mean (uniform, exponential) or the median (lognormal).
+    `failure_rate` of calls raise StubProviderError after the delay and `hang_rate` of calls
+    never answer, so LLMClient's timeout, retry and circuit breaker paths are exercised.
+    """
+
+    def __init__(self, latency: str = "lognormal", latency_ms: float = 2000.0, latency_sigma: float = 0.5,
+                 failure_rate: float = 0.0, hang_rate: float = 0.0, response_chars: int = 400,
+                 seed: Optional[int] = None):
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {latency!r}, expected one of {LATENCY_DISTRIBUTIONS}")
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.response_chars = response_chars
+        self._random = random.Random(seed)
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str]) -> "StubProvider":
+        """Build from LLM_STUB_* settings"""
+        seed = environ.get('LLM_STUB_SEED')
+        return cls(
+            latency=environ.get('LLM_STUB_LATENCY', 'lognormal'),
+            latency_ms=float(environ.get('LLM_STUB_LATENCY_MS', 2000)),
+            latency_sigma=float(environ.get('LLM_STUB_LATENCY_SIGMA', 0.5)),
+            failure_rate=float(environ.get('LLM_STUB_FAILURE_RATE', 0)),
+            hang_rate=float(environ.get('LLM_STUB_HANG_RATE', 0)),
+            response_chars=int(environ.get('LLM_STUB_RESPONSE_CHARS', 400)),
+            seed=int(seed) if seed else None
+        )
+
+    def sample_latency(self) -> float:
+        """One simulated provider latency in seconds"""
+        if self.latency == "fixed":
+            milliseconds = self.latency_ms
+        elif self.latency == "uniform":
+            milliseconds = self._random.uniform(0.5 * self.latency_ms, 1.5 * self.latency_ms)
+        elif self.latency == "exponential":
+            milliseconds = self._random.expovariate(1 / self.latency_ms) if self.latency_ms > 0 else 0.0
+        else:
+            # Median latency_ms with a long right tail, the usual shape of LLM response times
+            milliseconds = self._random.lognormvariate(math.log(max(self.latency_ms, 1e-3)), self.latency_sigma)
+        return milliseconds / 1000
+
+    def _comment(self) -> str:
+        # Vary the size by ±20% so response-size metrics are not a constant
+        target = max(1, round(self.response_chars * self._random.uniform(0.8, 1.2)))
+        sentences = []
+        length = 0
+        while length < target:
+            sentence = self._random.choice(STUB_SENTENCES)
+            sentences.append(sentence)
+            length += len(sentence) + 1
+        return " ".join(sentences)[:target].rstrip()
+
+    async def __call__(self, prompt: str) -> str:
+        roll = self._random.random()
+        if roll < self.hang_rate:
+            # Never answers; LLMClient's timeout cancels the wait
+            await asyncio.Event().wait()
+
+        await asyncio.sleep(self.sample_latency())
+        if roll < self.hang_rate + self.failure_rate:
+            raise StubProviderError("Simulated provider failure")
+
+        keys: List[str] = list(dict.fromkeys(BATCH_KEY_PATTERN.findall(prompt)))
+        if keys:
+            return json.dumps({key: self._comment() for key in keys}, ensure_ascii=False)
+        return self._comment()
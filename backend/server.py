@@ -5,18 +5,27 @@ from fastapi.exceptions import RequestValidationError
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import os
 import logging
+import asyncio
+import time
+import socket
+import random
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr, ValidationError
 from typing import List, Optional, Dict, Any
 import uuid
+import json
+from collections import deque
 from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
 import hashlib
 import secrets
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from jinja2 import Template
+from fastapi_mail import ConnectionConfig
+from jinja2 import Environment, DictLoader
+from markupsafe import Markup
 import io
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Alignment
@@ -25,6 +34,15 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
+import numpy as np
+from forecasting import forecast_question_series
+from anomalies import detect_anomalies
+from llm_client import LLMClient, LLMUnavailable, TokenBucket
+from llm_providers import StubProvider
+from smtp_pool import SMTPPool, is_bounce
+from email.message import EmailMessage
+from email.utils import formataddr
+from commentary import build_local_comment, format_number, parse_number
 
 
 ROOT_DIR = Path(__file__).parent
@@ -39,8 +57,13 @@ db = client[os.environ['DB_NAME']]
 SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key-change-this-in-production')
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# EventSource cannot send headers, so event streams take a short-lived, stream-only token in the URL
+STREAM_TOKEN_EXPIRE_SECONDS = int(os.environ.get('STREAM_TOKEN_EXPIRE_SECONDS', 60))
+STREAM_TOKEN_SCOPE = "stream"
 
 security = HTTPBearer()
+# EventSource cannot set headers, so stream endpoints also accept ?token=
+optional_security = HTTPBearer(auto_error=False)
 
 # Email Configuration
 conf = ConnectionConfig(
@@ -52,14 +75,17 @@ conf = ConnectionConfig(
     MAIL_FROM_NAME=os.environ.get('MAIL_FROM_NAME'),
     MAIL_STARTTLS=os.environ.get('MAIL_STARTTLS', 'true').lower() == 'true',
     MAIL_SSL_TLS=os.environ.get('MAIL_SSL_TLS', 'false').lower() == 'true',
-    USE_CREDENTIALS=True,
+    USE_CREDENTIALS=os.environ.get('MAIL_USE_CREDENTIALS', 'true').lower() == 'true',
     VALIDATE_CERTS=True
 )
 
 frontend_url = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
 
 # Email Templates
-EMAIL_TEMPLATE = """
+# Compiled once at import and autoescaped. The question part of a share email is the same for
+# every recipient, so it is rendered once per question in a batch and passed in as markup.
+EMAIL_TEMPLATES = {
+    "layout.html": """
 <!DOCTYPE html>
 <html>
 <head>
@@ -86,85 +112,147 @@ EMAIL_TEMPLATE = """
             <p class="subtitle">Soru Yanıtlama Sistemi</p>
         </div>
         
+        {% block content %}{% endblock %}
+        
+        <div class="footer">
+            <p>Bu e-posta Dijital Dönüşüm sistemi tarafından otomatik olarak gönderilmiştir.</p>
+            <p>Sorularınız için sistem yöneticinizle iletişime geçebilirsiniz.</p>
+        </div>
+    </div>
+</body>
+</html>
+""",
+    "share.html": """{% extends "layout.html" %}
+{% block content %}
         <p>Merhaba <strong>{{ employee_name }}</strong>,</p>
         
         <p>{{ month_year }} dönemi için size atanmış bir soru bulunmaktadır. Lütfen aşağıdaki soruyu inceleyip yanıtlayınız:</p>
         
-        <div class="question-box">
-            <div class="question-title">{{ question_category }} - {{ question_text }}</div>
-            <div class="question-text">
-                <strong>Önem/Gerekçe:</strong><br>
-                {{ importance_reason }}
-            </div>
-        </div>
+        {{ question_block }}
         
         <div style="text-align: center; margin: 30px 0;">
             <a href="{{ answer_link }}" class="button">Soruyu Yanıtla</a>
         </div>
         
         <p><strong>Not:</strong> Bu link sadece sizin için oluşturulmuştur ve tek kullanımlıktır.</p>
+{% endblock %}
+""",
+    "share_question.html": """
+<div class="question-box">
+    <div class="question-title">{{ question_category }} - {{ question_text }}</div>
+    <div class="question-text">
+        <strong>Önem/Gerekçe:</strong><br>
+        {{ importance_reason }}
+    </div>
+</div>
+""",
+    "reminder.html": """
+<html>
+<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+    <div style="max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f9f9f9;">
+        <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; border-radius: 8px;">
+            <h1 style="margin: 0; font-size: 28px;">⏰ Hatırlatma</h1>
+            <p style="margin: 10px 0 0 0; font-size: 16px; opacity: 0.9;">Dijital Dönüşüm Değerlendirme Sistemi</p>
+        </div>
         
-        <div class="footer">
-            <p>Bu e-posta Dijital Dönüşüm sistemi tarafından otomatik olarak gönderilmiştir.</p>
-            <p>Sorularınız için sistem yöneticinizle iletişime geçebilirsiniz.</p>
+        <div style="background: white; padding: 30px; margin: 20px 0; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
+            <h2 style="color: #d73027; margin-top: 0;">Yanıt Beklenen Soru</h2>
+            
+            <div style="background: #fef7e0; border-left: 4px solid #f59e0b; padding: 15px; margin: 20px 0;">
+                <strong>{{ category }}</strong><br>
+                <span style="color: #666; font-size: 14px;">{{ days_pending }} gün önce size gönderilmiş</span>
+            </div>
+            
+            <p><strong>Soru:</strong> {{ question_text }}</p>
+            
+            <div style="text-align: center; margin: 30px 0;">
+                <a href="{{ response_url }}" style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 15px 30px; text-decoration: none; border-radius: 6px; font-weight: bold; display: inline-block;">Soruyu Yanıtla</a>
+            </div>
+            
+            <p style="color: #666; font-size: 14px; text-align: center; margin-top: 30px;">
+                Bu e-posta, yanıtlanmayan sorular için otomatik olarak gönderilmiştir.<br>
+                Lütfen en kısa sürede yanıtlayınız.
+            </p>
         </div>
     </div>
 </body>
 </html>
-"""
-
-async def send_question_email(employee_email: str, employee_name: str, question: dict, assignment_id: str, month_year: str):
-    """Send question email to employee"""
-    try:
-        # Create email content
-        answer_link = f"{frontend_url}/answer/{assignment_id}"
-        
-        template = Template(EMAIL_TEMPLATE)
-        html_content = template.render(
-            employee_name=employee_name,
-            question_category=question.get('category', ''),
-            question_text=question.get('question_text', ''),
-            importance_reason=question.get('importance_reason', ''),
-            answer_link=answer_link,
-            month_year=month_year
-        )
-        
-        # Real Gmail SMTP email sending
-        message = MessageSchema(
-            subject=f"Dijital Dönüşüm - {month_year} Dönemi Soru Yanıtlama",
-            recipients=[employee_email],
-            body=html_content,
-            subtype=MessageType.html
-        )
-        
-        fm = FastMail(conf)
-        await fm.send_message(message)
+""",
+    "digest.html": """{% extends "layout.html" %}
+{% block content %}
+        <p>Merhaba <strong>{{ employee_name }}</strong>,</p>
         
-        # Log successful sending
-        print(f"✅ Gmail SMTP ile e-posta gönderildi: {employee_email}")
+        <p>{{ month_year }} dönemi için size atanmış {{ items|length }} soru bulunmaktadır. Lütfen her soruyu inceleyip yanıtlayınız:</p>
         
-        return True
+        {% for item in items %}
+        {{ item.question_block }}
+        <div style="text-align: center; margin: 10px 0 30px 0;">
+            <a href="{{ item.answer_link }}" class="button">Soruyu Yanıtla</a>
+        </div>
+        {% endfor %}
         
-    except Exception as e:
-        print(f"Email gönderim hatası: {str(e)}")
-        return False
+        <p><strong>Not:</strong> Bu linkler sadece sizin için oluşturulmuştur ve tek kullanımlıktır.</p>
+{% endblock %}
+"""
+}
+
+email_templates = Environment(loader=DictLoader(EMAIL_TEMPLATES), autoescape=True)
+SHARE_EMAIL_TEMPLATE = email_templates.get_template("share.html")
+SHARE_QUESTION_TEMPLATE = email_templates.get_template("share_question.html")
+REMINDER_EMAIL_TEMPLATE = email_templates.get_template("reminder.html")
+DIGEST_EMAIL_TEMPLATE = email_templates.get_template("digest.html")
+
+def render_question_block(question: dict) -> Markup:
+    """The recipient-independent question box of share and digest emails"""
+    return Markup(SHARE_QUESTION_TEMPLATE.render(
+        question_category=question.get('category', ''),
+        question_text=question.get('question_text', ''),
+        importance_reason=question.get('importance_reason', '')
+    ))
+
+def render_question_email(employee_name: str, question_block: Markup, assignment_id: str, month_year: str) -> dict:
+    """Render the question email for one employee as {subject, html}"""
+    html_content = SHARE_EMAIL_TEMPLATE.render(
+        employee_name=employee_name,
+        question_block=question_block,
+        answer_link=f"{frontend_url}/answer/{assignment_id}",
+        month_year=month_year
+    )
+    
+    return {
+        "subject": f"Dijital Dönüşüm - {month_year} Dönemi Soru Yanıtlama",
+        "html": html_content
+    }
+
+def render_digest_email(employee_name: str, items: List[dict], month_year: str) -> dict:
+    """Render one email listing several questions for an employee; items hold question_block and answer_link"""
+    html_content = DIGEST_EMAIL_TEMPLATE.render(
+        employee_name=employee_name,
+        items=items,
+        month_year=month_year
+    )
+    
+    return {
+        "subject": f"Dijital Dönüşüm - {month_year} Dönemi Soru Yanıtlama ({len(items)} Soru)",
+        "html": html_content
+    }
+
+def render_reminder_email(question: dict, days_pending: int, response_url: str) -> dict:
+    """Render a reminder for one pending assignment as {subject, html}"""
+    html_content = REMINDER_EMAIL_TEMPLATE.render(
+        category=question.get('category', ''),
+        question_text=question.get('question_text', ''),
+        days_pending=days_pending,
+        response_url=response_url
+    )
+    
+    return {
+        "subject": f"Hatırlatma - {question.get('category', '')} Sorusu Yanıt Bekliyor ({days_pending} Gün)",
+        "html": html_content
+    }
 
 # AI Integration for Comment Generation
-async def generate_ai_comment(question_text: str, category: str, period: str, table_data: Dict[str, str], table_rows: List[dict], monthly_comment: str = None, year: int = None, month: int = None) -> str:
-    """Generate AI comment based on employee response"""
-    try:
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        
-        # Get the API key from environment
-        api_key = os.environ.get('EMERGENT_LLM_KEY')
-        if not api_key:
-            return "AI yorum oluşturma servisi şu anda kullanılamıyor."
-        
-        # Create AI chat instance
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"ai_comment_{str(uuid.uuid4())}",
-            system_message="""Sen bir dijital dönüşüm uzmanısın. Çalışanların verdikleri yanıtları analiz edip yapıcı, profesyonel ve gelişim odaklı yorumlar yapıyorsun. 
+AI_COMMENT_SYSTEM_MESSAGE = """Sen bir dijital dönüşüm uzmanısın. Çalışanların verdikleri yanıtları analiz edip yapıcı, profesyonel ve gelişim odaklı yorumlar yapıyorsun. 
             
             Görevin:
             1. Çalışanın verdiği yanıtı objektif olarak değerlendirmek
@@ -175,43 +263,244 @@ async def generate_ai_comment(question_text: str, category: str, period: str, ta
             
             Sayısal değerler milyonlar, yüzdeler, adetler vb. herhangi bir formatda olabilir.
             Yanıtın Türkçe olmalı ve profesyonel bir ton kullanmalısın."""
-        ).with_model("openai", "gpt-5")
-        
-        # Prepare table data text
-        months_tr = ["Ocak", "Şubat", "Mart", "Nisan", "Mayıs", "Haziran",
-                     "Temmuz", "Ağustos", "Eylül", "Ekim", "Kasım", "Aralık"]
-        month_name = months_tr[month - 1] if month and 1 <= month <= 12 else "Bilinmeyen Ay"
-        
-        data_text = f"\n{month_name} {year} Verileri:\n"
-        if table_data and table_rows:
-            row_dict = {row["id"]: row for row in table_rows}
-            for row_id, value in table_data.items():
-                if row_id in row_dict and value:
-                    row = row_dict[row_id]
-                    unit = f" {row['unit']}" if row.get('unit') else ""
-                    data_text += f"- {row['name']}: {value}{unit}\n"
-        
-        comment_text = f"\nÇalışan Yorumu: {monthly_comment}" if monthly_comment else ""
-        
-        prompt = f"""
+
+AI_COMMENT_MODEL = ("openai", "gpt-5")
+
+class AICommentUnavailable(Exception):
+    """The LLM integration is not configured, so retrying cannot help"""
+
+def format_ai_comment_data(table_data: Dict[str, str], table_rows: List[dict], monthly_comment: str = None, year: int = None, month: int = None):
+    """Return (data text, employee comment text) for one response"""
+    # Prepare table data text
+    months_tr = ["Ocak", "Şubat", "Mart", "Nisan", "Mayıs", "Haziran",
+                 "Temmuz", "Ağustos", "Eylül", "Ekim", "Kasım", "Aralık"]
+    month_name = months_tr[month - 1] if month and 1 <= month <= 12 else "Bilinmeyen Ay"
+    
+    data_text = f"\n{month_name} {year} Verileri:\n"
+    if table_data and table_rows:
+        row_dict = {row["id"]: row for row in table_rows}
+        for row_id, value in table_data.items():
+            if row_id in row_dict and value:
+                row = row_dict[row_id]
+                unit = f" {row['unit']}" if row.get('unit') else ""
+                data_text += f"- {row['name']}: {value}{unit}\n"
+    
+    comment_text = f"\nÇalışan Yorumu: {monthly_comment}" if monthly_comment else ""
+    return data_text, comment_text
+
+def build_ai_comment_prompt(question_text: str, category: str, period: str, table_data: Dict[str, str], table_rows: List[dict], monthly_comment: str = None, year: int = None, month: int = None) -> str:
+    data_text, comment_text = format_ai_comment_data(table_data, table_rows, monthly_comment, year, month)
+    return f"""
         Soru Kategorisi: {category}
         Soru: {question_text}
         Periyot: {period}{data_text}{comment_text}
         
         Bu aylık verileri analiz edip yapıcı bir AI yorumu oluştur. Değerlerin anlamı, trendler ve potansiyel iyileştirme alanları hakkında yorum yap.
         """
+
+def build_batch_ai_comment_prompt(question_text: str, category: str, period: str, entries: Dict[str, dict]) -> str:
+    """One prompt for several responses to the same question and period.
+
+    `entries` maps a short key to the keyword arguments of format_ai_comment_data; the model
+    is asked to answer with a JSON object mapping the same keys to comments.
+    """
+    sections = []
+    for key, entry in entries.items():
+        data_text, comment_text = format_ai_comment_data(**entry)
+        sections.append(f"[{key}]{data_text}{comment_text}")
+    
+    return f"""
+        Soru Kategorisi: {category}
+        Soru: {question_text}
+        Periyot: {period}
         
-        # Create user message
-        user_message = UserMessage(text=prompt)
+        Aşağıda aynı soru için {len(entries)} farklı çalışanın yanıtı var. Her yanıtı ayrı ayrı analiz edip yapıcı bir AI yorumu oluştur.
         
-        # Get AI response
-        response = await chat.send_message(user_message)
+        {chr(10).join(sections)}
         
-        return response if response else "AI yorumu oluşturulamadı."
+        Yanıtını yalnızca geçerli bir JSON nesnesi olarak ver: anahtarlar köşeli parantez içindeki kodlar ({", ".join(entries)}), değerler ilgili çalışan için yorum metni olsun.
+        """
+
+def parse_batch_ai_comments(text: str, keys: List[str]) -> Dict[str, str]:
+    """Extract {key: comment} from a batch answer; keys that are missing or empty are left out"""
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    
+    try:
+        parsed = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(parsed, dict):
+        return {}
+    
+    return {key: parsed[key].strip() for key in keys if isinstance(parsed.get(key), str) and parsed[key].strip()}
+
+# Shared LLM client: one per process, created at startup
+# LLM_PROVIDER "stub" answers locally with simulated latency and failures (LLM_STUB_* settings)
+# so load tests and offline runs do not spend real API calls
+LLM_PROVIDER = os.environ.get('LLM_PROVIDER', 'emergent')
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 4))
+LLM_TIMEOUT_SECONDS = float(os.environ.get('LLM_TIMEOUT_SECONDS', 60))
+LLM_RATE_PER_MINUTE = float(os.environ.get('LLM_RATE_PER_MINUTE', 60))
+LLM_BURST = int(os.environ.get('LLM_BURST', 10))
+LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', 2))
+LLM_RETRY_BASE_SECONDS = float(os.environ.get('LLM_RETRY_BASE_SECONDS', 1))
+LLM_BREAKER_FAILURES = int(os.environ.get('LLM_BREAKER_FAILURES', 5))
+LLM_BREAKER_RESET_SECONDS = float(os.environ.get('LLM_BREAKER_RESET_SECONDS', 60))
+
+# Fraction of successful calls written to the ai_calls log; failures are always written
+AI_CALL_LOG_SAMPLE_RATE = float(os.environ.get('AI_CALL_LOG_SAMPLE_RATE', 0.1))
+AI_CALL_LOG_TTL_DAYS = int(os.environ.get('AI_CALL_LOG_TTL_DAYS', 30))
+
+_llm_client: Optional[LLMClient] = None
+_ai_call_log_tasks: set = set()
+
+def log_ai_call(record: dict):
+    """LLMClient hook: persist a sampled record of one LLM attempt without blocking the caller"""
+    if record["outcome"] == "success" and random.random() >= AI_CALL_LOG_SAMPLE_RATE:
+        return
+    
+    now = datetime.now(timezone.utc)
+    document = {
+        "id": str(uuid.uuid4()),
+        **record,
+        "sampled": record["outcome"] == "success",
+        "created_at": now.isoformat(),
+        # BSON date for the TTL index
+        "expires_at": now + timedelta(days=AI_CALL_LOG_TTL_DAYS)
+    }
+    task = asyncio.create_task(db.ai_calls.insert_one(document))
+    _ai_call_log_tasks.add(task)
+    task.add_done_callback(_ai_call_log_tasks.discard)
+
+def create_emergent_provider():
+    """Provider calling the real model; the SDK is imported once here"""
+    api_key = os.environ.get('EMERGENT_LLM_KEY')
+    try:
+        from emergentintegrations.llm.chat import LlmChat, UserMessage
+    except ImportError:
+        LlmChat = UserMessage = None
+    
+    async def send(prompt: str) -> str:
+        if not api_key or LlmChat is None:
+            raise AICommentUnavailable("EMERGENT_LLM_KEY is not configured")
         
-    except Exception as e:
-        print(f"AI yorum oluşturma hatası: {str(e)}")
-        return f"AI yorum oluşturulurken bir hata oluştu: {str(e)}"
+        # LlmChat keeps conversation history per session, so each prompt gets its own session
+        chat = LlmChat(
+            api_key=api_key,
+            session_id=f"ai_comment_{str(uuid.uuid4())}",
+            system_message=AI_COMMENT_SYSTEM_MESSAGE
+        ).with_model(*AI_COMMENT_MODEL)
+        
+        response = await chat.send_message(UserMessage(text=prompt))
+        if not response:
+            raise RuntimeError("Empty response from LLM")
+        
+        return response
+    
+    return send
+
+def create_stub_provider():
+    return StubProvider.from_env(os.environ)
+
+LLM_PROVIDERS = {
+    "emergent": create_emergent_provider,
+    "stub": create_stub_provider
+}
+
+def create_llm_client() -> LLMClient:
+    """Build the process-wide LLM client around the configured provider"""
+    if LLM_PROVIDER not in LLM_PROVIDERS:
+        raise ValueError(f"Unknown LLM_PROVIDER {LLM_PROVIDER!r}, expected one of {sorted(LLM_PROVIDERS)}")
+    
+    return LLMClient(
+        LLM_PROVIDERS[LLM_PROVIDER](),
+        max_concurrency=LLM_MAX_CONCURRENCY,
+        timeout_seconds=LLM_TIMEOUT_SECONDS,
+        rate_per_minute=LLM_RATE_PER_MINUTE,
+        burst=LLM_BURST,
+        max_retries=LLM_MAX_RETRIES,
+        retry_base_seconds=LLM_RETRY_BASE_SECONDS,
+        failure_threshold=LLM_BREAKER_FAILURES,
+        reset_seconds=LLM_BREAKER_RESET_SECONDS,
+        fatal_exceptions=(AICommentUnavailable,),
+        on_call=log_ai_call
+    )
+
+def get_llm_client() -> LLMClient:
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = create_llm_client()
+    return _llm_client
+
+async def request_ai_comment(prompt: str, site: str = "direct") -> str:
+    """Send a rendered prompt through the shared LLM client; raises on any failure.
+
+    `site` names the caller (single, public, bulk, batch, dashboard) in call metrics.
+    """
+    return await get_llm_client().complete(prompt, site=site)
+
+# AI Comment Cache
+# Comments are stored under a hash of everything that determines them (provider, model, system
+# message and rendered prompt), so re-saving identical data or reloading a dashboard skips the LLM.
+# The stub provider never reads or writes the cache, so benchmark text cannot leak into it.
+# expires_at is a BSON date because the TTL index cannot expire ISO strings.
+AI_COMMENT_CACHE_TTL_HOURS = int(os.environ.get('AI_COMMENT_CACHE_TTL_HOURS', 720))
+AI_COMMENT_CACHE_STATS_ID = "global"
+
+def ai_comment_cache_enabled() -> bool:
+    return AI_COMMENT_CACHE_TTL_HOURS > 0 and LLM_PROVIDER != "stub"
+
+def ai_comment_cache_key(prompt: str) -> str:
+    content = "\n".join([LLM_PROVIDER, *AI_COMMENT_MODEL, AI_COMMENT_SYSTEM_MESSAGE, prompt])
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+async def record_ai_comment_cache_lookup(hit: bool):
+    await db.ai_comment_cache_stats.update_one(
+        {"id": AI_COMMENT_CACHE_STATS_ID},
+        {"$inc": {"hits" if hit else "misses": 1}},
+        upsert=True
+    )
+
+async def lookup_cached_ai_comment(prompt: str) -> Optional[str]:
+    if not ai_comment_cache_enabled():
+        return None
+    
+    now = datetime.now(timezone.utc)
+    entry = await db.ai_comment_cache.find_one_and_update(
+        {"id": ai_comment_cache_key(prompt), "expires_at": {"$gt": now}},
+        {"$inc": {"hits": 1}, "$set": {"last_hit_at": now.isoformat()}}
+    )
+    await record_ai_comment_cache_lookup(entry is not None)
+    return entry["comment"] if entry else None
+
+async def store_cached_ai_comment(prompt: str, comment: str):
+    if not ai_comment_cache_enabled():
+        return
+    
+    now = datetime.now(timezone.utc)
+    await db.ai_comment_cache.update_one(
+        {"id": ai_comment_cache_key(prompt)},
+        {
+            "$set": {
+                "comment": comment,
+                "created_at": now.isoformat(),
+                "expires_at": now + timedelta(hours=AI_COMMENT_CACHE_TTL_HOURS)
+            },
+            "$setOnInsert": {"hits": 0}
+        },
+        upsert=True
+    )
+
+async def cached_ai_comment(prompt: str, site: str = "direct") -> str:
+    """Return the cached comment for this prompt, calling the LLM only on a miss"""
+    comment = await lookup_cached_ai_comment(prompt)
+    if comment is None:
+        comment = await request_ai_comment(prompt, site)
+        await store_cached_ai_comment(prompt, comment)
+    return comment
 
 # Create the main app without a prefix
 app = FastAPI(title="Auth System API")
@@ -279,11 +568,29 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return await user_from_token(credentials.credentials)
+
+async def get_stream_user(
+    token: Optional[str] = Query(None),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+):
+    """Authenticate a server-sent events request from the Authorization header or a stream token query parameter"""
+    if credentials:
+        return await user_from_token(credentials.credentials)
+    if token:
+        return await user_from_token(token, scope=STREAM_TOKEN_SCOPE)
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Not authenticated",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+async def user_from_token(token: str, scope: Optional[str] = None):
+    """Resolve a JWT to its user; login tokens have no scope, stream tokens are only accepted with scope="stream"."""
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
-        if username is None:
+        if username is None or payload.get("scope") != scope:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
@@ -373,6 +680,8 @@ class TableRow(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)  # e.g., "Satış", "Pazarlama"
     unit: Optional[str] = Field(None, max_length=20)  # e.g., "adet", "TL", "%"
     order: int = Field(default=0)
+    min_threshold: Optional[float] = None  # values below are flagged in local commentary
+    max_threshold: Optional[float] = None  # values above are flagged in local commentary
 
 class Question(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -383,6 +692,7 @@ class Question(BaseModel):
     period: str = Field(..., pattern="^(Günlük|Haftalık|Aylık|Çeyreklik|Altı Aylık|Yıllık|İhtiyaç Halinde)$")
     chart_type: Optional[str] = Field(None, pattern="^(Sütun|Pasta|Çizgi|Alan|Daire|Bar|Trend)$")
     table_rows: List[TableRow] = Field(default_factory=list)  # Dynamic table rows (2-10 rows)
+    ai_mode: Optional[str] = Field(None, pattern="^(local|llm|hybrid)$")  # None uses AI_COMMENT_MODE
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class QuestionCreate(BaseModel):
@@ -393,6 +703,7 @@ class QuestionCreate(BaseModel):
     period: str = Field(..., pattern="^(Günlük|Haftalık|Aylık|Çeyreklik|Altı Aylık|Yıllık|İhtiyaç Halinde)$")
     chart_type: Optional[str] = Field(None, pattern="^(Sütun|Pasta|Çizgi|Alan|Daire|Bar|Trend)$")
     table_rows: List[TableRow] = Field(default_factory=list)
+    ai_mode: Optional[str] = Field(None, pattern="^(local|llm|hybrid)$")
 
 class Category(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -417,6 +728,8 @@ class QuestionAssignment(BaseModel):
     year: int
     month: int
     email_sent: bool = False
+    # queued, sent or failed; email_sent only turns true once the outbox has delivered the email
+    email_status: Optional[str] = None
     response_received: bool = False
     assigned_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
@@ -436,6 +749,7 @@ class QuestionResponseCreate(BaseModel):
 
 class ShareQuestionsRequest(BaseModel):
     assignments: List[dict]  # [{"question_id": "...", "employee_id": "..."}]
+    digest: bool = False  # One email per employee listing all of their questions
 
 # Response Data Models for Cevaplar Feature
 # Table Response Model - Clean and Simple
@@ -536,6 +850,15 @@ async def login(user_credentials: UserLogin):
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     return current_user
 
+@api_router.post("/auth/stream-token")
+async def create_stream_token(current_user: User = Depends(get_current_user)):
+    """Issue a short-lived token that only opens event streams, for use in EventSource URLs"""
+    token = create_access_token(
+        data={"sub": current_user.username, "scope": STREAM_TOKEN_SCOPE},
+        expires_delta=timedelta(seconds=STREAM_TOKEN_EXPIRE_SECONDS)
+    )
+    return {"token": token, "expires_in": STREAM_TOKEN_EXPIRE_SECONDS}
+
 # Protected routes
 @api_router.get("/analytics/dashboard")
 async def get_analytics_dashboard():
@@ -547,6 +870,10 @@ async def get_analytics_dashboard():
     questions = await db.questions.find({}).to_list(100)
     dashboard_data = []
     
+    # AI insights are precomputed by refresh_dashboard_insights
+    analytics_records = await db.question_analytics.find({}, {"_id": 0}).to_list(None)
+    insights_by_question = {record["question_id"]: record for record in analytics_records}
+    
     for question in questions:
         question_id = question["id"]
         
@@ -612,20 +939,8 @@ async def get_analytics_dashboard():
                         'trend': 'up' if change_percent > 5 else 'down' if change_percent < -5 else 'stable'
                     }
         
-        # Generate AI insights using the existing generate_ai_comment function
-        try:
-            if historical_data:
-                last_period = historical_data[-1]
-                ai_insights = await generate_ai_comment(
-                    employee_name="Sistem Analizi",
-                    question_text=question.get('question_text', ''),
-                    numerical_values=last_period['data'],
-                    employee_comment=f"Son {len(historical_data)} dönem verisi analizi"
-                )
-            else:
-                ai_insights = "Yeterli veri bulunmuyor."
-        except Exception as e:
-            ai_insights = "AI analizi oluşturulamadı."
+        insights_record = insights_by_question.get(question_id, {})
+        ai_insights = insights_record.get("ai_insights") or "AI analizi hazırlanıyor."
         
         dashboard_data.append({
             "id": question_id,
@@ -636,6 +951,8 @@ async def get_analytics_dashboard():
             "historical_data": historical_data,
             "trends": trends,
             "ai_insights": ai_insights,
+            "ai_insights_period": insights_record.get("latest_period"),
+            "ai_insights_generated_at": insights_record.get("generated_at"),
             "total_responses": len(responses),
             "last_updated": historical_data[-1]['date'] if historical_data else None
         })
@@ -646,8 +963,62 @@ async def get_analytics_dashboard():
         "generated_at": datetime.now(timezone.utc).isoformat()
     }
 
+def group_values_by_period(responses: List[dict], table_rows: List[dict]) -> Dict[str, Dict[str, float]]:
+    """Map YYYY-MM period keys to {row name: numeric value}; non-numeric values count as 0"""
+    period_data = {}
+    for response in responses:
+        period_key = f"{response.get('year', 0)}-{response.get('month', 0):02d}"
+        if period_key not in period_data:
+            period_data[period_key] = {}
+        
+        for row in table_rows:
+            value = response.get("table_data", {}).get(row["id"], "0")
+            try:
+                numeric_value = float(value) if value else 0
+                period_data[period_key][row["name"]] = numeric_value
+            except (ValueError, TypeError):
+                period_data[period_key][row["name"]] = 0
+    
+    return period_data
+
+def period_series_matrix(period_data: Dict[str, Dict[str, float]], table_rows: List[dict]):
+    """Return (sorted period keys, rows x periods value matrix) for batched analytics"""
+    sorted_periods = sorted(period_data.keys())
+    series_matrix = np.array(
+        [[period_data[period_key].get(row["name"], np.nan) for period_key in sorted_periods] for row in table_rows],
+        dtype=float
+    ).reshape(len(table_rows), len(sorted_periods))
+    return sorted_periods, series_matrix
+
+def format_anomaly(metric: str, period_key: str, anomaly: dict) -> dict:
+    return {
+        "metric": metric,
+        "period": period_key,
+        "value": anomaly["value"],
+        "expected_range": {
+            "min": round(anomaly["expected_range"]["min"], 2),
+            "max": round(anomaly["expected_range"]["max"], 2)
+        },
+        "score": round(anomaly["score"], 2) if anomaly["score"] is not None else None,
+        "severity": anomaly["severity"],
+        "description": f"{metric} değeri normal aralığın dışında ({anomaly['value']} vs beklenen {round(anomaly['expected'], 2)})"
+    }
+
+def next_period_keys(last_period_key: str, count: int) -> List[str]:
+    """Return the `count` monthly period keys (YYYY-MM) following last_period_key"""
+    year, month = (int(part) for part in last_period_key.split("-"))
+    keys = []
+    for _ in range(count):
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        keys.append(f"{year}-{month:02d}")
+    return keys
+
 @api_router.get("/analytics/insights/{question_id}")
-async def get_advanced_insights(question_id: str, current_user: User = Depends(get_current_user)):
+async def get_advanced_insights(
+    question_id: str,
+    horizon: int = Query(3, ge=1, le=12, description="Number of future periods to forecast"),
+    current_user: User = Depends(get_current_user)
+):
     """Get AI-powered advanced analytics insights for a specific question"""
     from datetime import datetime, timedelta
     import statistics
@@ -676,21 +1047,9 @@ async def get_advanced_insights(question_id: str, current_user: User = Depends(g
         }
     
     # Organize data by periods and table rows
-    period_data = {}
     table_rows = question.get("table_rows", [])
-    
-    for response in responses:
-        period_key = f"{response.get('year', 0)}-{response.get('month', 0):02d}"
-        if period_key not in period_data:
-            period_data[period_key] = {}
-        
-        for row in table_rows:
-            value = response.get("table_data", {}).get(row["id"], "0")
-            try:
-                numeric_value = float(value) if value else 0
-                period_data[period_key][row["name"]] = numeric_value
-            except (ValueError, TypeError):
-                period_data[period_key][row["name"]] = 0
+    period_data = group_values_by_period(responses, table_rows)
+    sorted_periods, series_matrix = period_series_matrix(period_data, table_rows)
     
     # Calculate insights
     insights = {
@@ -706,12 +1065,10 @@ async def get_advanced_insights(question_id: str, current_user: User = Depends(g
     for row in table_rows:
         row_name = row["name"]
         values = []
-        periods = []
         
-        for period_key in sorted(period_data.keys()):
+        for period_key in sorted_periods:
             if row_name in period_data[period_key]:
                 values.append(period_data[period_key][row_name])
-                periods.append(period_key)
         
         if len(values) >= 2:
             # Calculate trend
@@ -732,44 +1089,48 @@ async def get_advanced_insights(question_id: str, current_user: User = Depends(g
                 "previous_value": values[-2] if len(values) >= 2 else 0,
                 "confidence": "high" if len(values) >= 4 else "medium"
             })
+    
+    # Anomaly detection: rolling median/MAD over each row's earlier periods
+    if table_rows and sorted_periods:
+        for row, row_anomalies in zip(table_rows, detect_anomalies(series_matrix)):
+            for anomaly in row_anomalies:
+                insights["anomalies"].append(format_anomaly(row["name"], sorted_periods[anomaly["index"]], anomaly))
+    
+    # Seasonal forecasts: all rows of the question are fitted in one batched computation
+    if table_rows and len(sorted_periods) >= 3:
+        forecasts = forecast_question_series(question_id, sorted_periods, series_matrix, horizon=horizon, season_length=12)
+        future_periods = next_period_keys(sorted_periods[-1], horizon)
+        
+        def clip(values, floor):
+            return [round(float(max(floor, value)), 2) for value in values]
+        
+        for row, row_series, forecast in zip(table_rows, series_matrix, forecasts):
+            # Keep forecasts of non-negative metrics (counts, amounts) non-negative
+            floor = 0 if np.nanmin(row_series) >= 0 else -np.inf
+            point = clip(forecast["forecast"], floor)
+            lower_80, upper_80 = clip(forecast["lower_80"], floor), clip(forecast["upper_80"], floor)
+            lower_95, upper_95 = clip(forecast["lower_95"], floor), clip(forecast["upper_95"], floor)
             
-            # Simple prediction (linear trend)
-            if len(values) >= 3:
-                # Simple linear regression for next period
-                x_values = list(range(len(values)))
-                slope = sum((x_values[i] - statistics.mean(x_values)) * (values[i] - statistics.mean(values)) 
-                           for i in range(len(values))) / sum((x - statistics.mean(x_values))**2 for x in x_values)
-                intercept = statistics.mean(values) - slope * statistics.mean(x_values)
-                next_prediction = slope * len(values) + intercept
-                
-                insights["predictions"].append({
-                    "metric": row_name,
-                    "predicted_value": round(max(0, next_prediction), 2),
-                    "confidence_interval": {
-                        "min": round(max(0, next_prediction * 0.85), 2),
-                        "max": round(next_prediction * 1.15, 2)
-                    },
-                    "period": "Gelecek dönem"
-                })
-            
-            # Anomaly detection (simple outlier detection)
-            if len(values) >= 4:
-                mean_val = statistics.mean(values)
-                std_dev = statistics.stdev(values) if len(values) > 1 else 0
-                
-                for i, value in enumerate(values):
-                    if std_dev > 0 and abs(value - mean_val) > 2 * std_dev:
-                        insights["anomalies"].append({
-                            "metric": row_name,
-                            "period": periods[i],
-                            "value": value,
-                            "expected_range": {
-                                "min": round(mean_val - std_dev, 2),
-                                "max": round(mean_val + std_dev, 2)
-                            },
-                            "severity": "high" if abs(value - mean_val) > 3 * std_dev else "medium",
-                            "description": f"{row_name} değeri normal aralığın dışında ({value} vs beklenen {round(mean_val, 2)})"
-                        })
+            insights["predictions"].append({
+                "metric": row["name"],
+                "predicted_value": point[0],
+                "confidence_interval": {
+                    "min": lower_95[0],
+                    "max": upper_95[0]
+                },
+                "period": "Gelecek dönem",
+                "model": forecast["model"],
+                "backtest_mae": round(forecast["backtest_mae"], 2) if forecast["backtest_mae"] is not None else None,
+                "forecast": [
+                    {
+                        "period": future_periods[step],
+                        "value": point[step],
+                        "interval_80": {"min": lower_80[step], "max": upper_80[step]},
+                        "interval_95": {"min": lower_95[step], "max": upper_95[step]}
+                    }
+                    for step in range(horizon)
+                ]
+            })
     
     # Generate smart recommendations
     total_trends = len([t for t in insights["data_trends"] if t["direction"] != "stabil"])
@@ -948,141 +1309,746 @@ async def get_comparative_analytics(
         "generated_at": datetime.now().isoformat()
     }
 
-@api_router.post("/automation/email-reminders")
-async def setup_email_reminders(
-    reminder_config: dict,
-    current_user: User = Depends(get_current_user)
-):
-    """Setup automated email reminders for pending responses"""
-    from datetime import datetime, timedelta
+# Email Outbox
+# Share and reminder flows only render messages into email_outbox; background workers deliver
+# them, retrying failures with exponential backoff and moving messages that keep failing to
+# "dead". A share assignment's email_sent flag is set once its message has actually been sent.
+# Every step is appended to email_events, which /email-logs pages through.
+# Authenticated SMTP sessions are pooled and reused for many messages instead of one session per email
+SMTP_POOL_SIZE = int(os.environ.get('SMTP_POOL_SIZE', 3))
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.environ.get('SMTP_MAX_MESSAGES_PER_CONNECTION', 100))
+SMTP_IDLE_SECONDS = float(os.environ.get('SMTP_IDLE_SECONDS', 60))
+# One worker per pooled connection keeps every session busy
+EMAIL_OUTBOX_WORKERS = int(os.environ.get('EMAIL_OUTBOX_WORKERS', SMTP_POOL_SIZE))
+# Provider quotas: sustained messages per second with short bursts, and messages per UTC day (0 = no limit)
+EMAIL_RATE_PER_SECOND = float(os.environ.get('EMAIL_RATE_PER_SECOND', 5))
+EMAIL_BURST = int(os.environ.get('EMAIL_BURST', 10))
+EMAIL_DAILY_QUOTA = int(os.environ.get('EMAIL_DAILY_QUOTA', 2000))
+EMAIL_OUTBOX_POLL_SECONDS = float(os.environ.get('EMAIL_OUTBOX_POLL_SECONDS', 5))
+EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 5))
+EMAIL_RETRY_BASE_SECONDS = float(os.environ.get('EMAIL_RETRY_BASE_SECONDS', 30))
+EMAIL_RETRY_MAX_SECONDS = float(os.environ.get('EMAIL_RETRY_MAX_SECONDS', 3600))
+EMAIL_LEASE_SECONDS = int(os.environ.get('EMAIL_LEASE_SECONDS', 300))
+# The rate bucket, worker count and SMTP pool are per process, so only the process holding the
+# email_outbox lease in scheduler_locks delivers mail; the others stand by to take over.
+EMAIL_OUTBOX_LOCK = "email_outbox"
+EMAIL_OUTBOX_LEADER_SECONDS = int(os.environ.get('EMAIL_OUTBOX_LEADER_SECONDS', 30))
+
+_email_outbox_leader = False
+_email_outbox_wakeup: Optional[asyncio.Event] = None
+_email_outbox_tasks: List[asyncio.Task] = []
+_smtp_pool: Optional[SMTPPool] = None
+_email_rate_bucket = TokenBucket(EMAIL_RATE_PER_SECOND * 60, EMAIL_BURST)
+# (finished monotonic time, send seconds) of recent deliveries in this process, for throughput stats
+_email_recent_sends: deque = deque(maxlen=10000)
+_email_delivery_counts = {"sent": 0, "failed": 0, "deferred": 0}
+
+def recent_email_send_seconds(since: Optional[float] = None) -> List[float]:
+    """SMTP send durations of recent deliveries in this process, those finished at or after `since` (time.monotonic())"""
+    return [seconds for finished, seconds in _email_recent_sends if since is None or finished >= since]
+
+def get_smtp_pool() -> SMTPPool:
+    global _smtp_pool
+    if _smtp_pool is None:
+        _smtp_pool = SMTPPool(
+            hostname=conf.MAIL_SERVER,
+            port=conf.MAIL_PORT,
+            username=conf.MAIL_USERNAME if conf.USE_CREDENTIALS else None,
+            password=conf.MAIL_PASSWORD.get_secret_value() if conf.USE_CREDENTIALS else None,
+            use_tls=conf.MAIL_SSL_TLS,
+            start_tls=conf.MAIL_STARTTLS,
+            validate_certs=conf.VALIDATE_CERTS,
+            timeout=conf.TIMEOUT,
+            size=SMTP_POOL_SIZE,
+            max_messages=SMTP_MAX_MESSAGES_PER_CONNECTION,
+            idle_seconds=SMTP_IDLE_SECONDS
+        )
+    return _smtp_pool
+
+def build_email_message(message: dict) -> EmailMessage:
+    email = EmailMessage()
+    email["From"] = formataddr((conf.MAIL_FROM_NAME or "", conf.MAIL_FROM))
+    email["To"] = message["to"]
+    email["Subject"] = message["subject"]
+    email.set_content(message["html"], subtype="html")
+    return email
+
+def outbox_message(kind: str, to: str, subject: str, html: str, assignment_id: Optional[str] = None,
+                   employee_id: Optional[str] = None, question_id: Optional[str] = None,
+                   details: Optional[dict] = None, assignment_ids: Optional[List[str]] = None) -> dict:
+    """A queued email_outbox document; `kind` is share or reminder.
+    
+    A digest covers several assignments and sets `assignment_ids` instead of `assignment_id`.
+    `details` holds display fields (employee name, question, answer link) copied into its log events.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    return {
+        "id": str(uuid.uuid4()),
+        "kind": kind,
+        "to": to,
+        "subject": subject,
+        "html": html,
+        "assignment_id": assignment_id,
+        "assignment_ids": assignment_ids or ([assignment_id] if assignment_id else []),
+        "employee_id": employee_id,
+        "question_id": question_id,
+        "details": details or {},
+        "status": "queued",
+        "attempts": 0,
+        "last_error": None,
+        "next_attempt_at": now,
+        "lease_until": None,
+        "created_at": now,
+        "sent_at": None
+    }
+
+def message_assignment_ids(message: dict) -> List[str]:
+    if message.get("assignment_ids"):
+        return message["assignment_ids"]
+    return [message["assignment_id"]] if message.get("assignment_id") else []
+
+def email_event(event_type: str, message: dict, error: Optional[str] = None) -> dict:
+    """An email_events document: queued, sent, failed (retry scheduled), dead or bounced"""
+    return {
+        "id": str(uuid.uuid4()),
+        "type": event_type,
+        "kind": message["kind"],
+        "message_id": message.get("id"),
+        "to": message.get("to"),
+        "subject": message.get("subject"),
+        "assignment_id": message.get("assignment_id"),
+        "assignment_ids": message_assignment_ids(message),
+        "employee_id": message.get("employee_id"),
+        "question_id": message.get("question_id"),
+        "attempt": message.get("attempts", 0),
+        "error": error,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        **(message.get("details") or {})
+    }
+
+async def record_email_events(events: List[dict]):
+    """Append to the delivery log; a failed log write never fails the delivery itself"""
+    if not events:
+        return
     
-    # Get all assignments that need reminders
-    current_time = datetime.now()
+    try:
+        await db.email_events.insert_many(events)
+    except Exception as e:
+        logger.warning(f"Email event log write failed: {str(e)}")
+
+def wake_email_outbox():
+    if _email_outbox_wakeup is not None:
+        _email_outbox_wakeup.set()
+
+async def enqueue_emails(messages: List[dict]):
+    if not messages:
+        return
+    
+    await db.email_outbox.insert_many(messages)
+    for message in messages:
+        message.pop("_id", None)
+    wake_email_outbox()
+    await record_email_events([email_event("queued", message) for message in messages])
+
+async def claim_outbox_message() -> Optional[dict]:
+    """Lease the next due message, or one whose previous worker died mid-send"""
+    now = datetime.now(timezone.utc)
+    message = await db.email_outbox.find_one_and_update(
+        {"$or": [
+            {"status": "queued", "next_attempt_at": {"$lte": now.isoformat()}},
+            {"status": "sending", "lease_until": {"$lte": now.isoformat()}}
+        ]},
+        {
+            "$set": {
+                "status": "sending",
+                "lease_until": (now + timedelta(seconds=EMAIL_LEASE_SECONDS)).isoformat()
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("next_attempt_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+    if message:
+        message.pop("_id", None)
+    return message
+
+async def deliver_email(message: dict):
+    """Send one outbox message over a pooled SMTP session; raises on failure"""
+    await get_smtp_pool().send(build_email_message(message))
+
+def next_quota_reset(now: datetime) -> datetime:
+    return (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+async def reserve_daily_email_quota(now: datetime) -> bool:
+    """Count one send against today's EMAIL_DAILY_QUOTA; False once the quota is used up.
     
-    # Find assignments older than specified days without response
-    reminder_days = reminder_config.get("reminder_days", 3)
-    cutoff_date = current_time - timedelta(days=reminder_days)
+    The counter lives in email_quota so every worker process shares it.
+    """
+    if EMAIL_DAILY_QUOTA <= 0:
+        return True
+    
+    day = now.date().isoformat()
+    try:
+        await db.email_quota.update_one({"id": day}, {"$setOnInsert": {"sent": 0}}, upsert=True)
+    except DuplicateKeyError:
+        # Another process created today's counter at the same moment
+        pass
+    result = await db.email_quota.update_one(
+        {"id": day, "sent": {"$lt": EMAIL_DAILY_QUOTA}},
+        {"$inc": {"sent": 1}}
+    )
+    return result.modified_count == 1
+
+async def release_daily_email_quota(reserved_at: datetime):
+    """Give back a reserved send that did not go out, lifting the pause it may have caused"""
+    if EMAIL_DAILY_QUOTA <= 0:
+        return
+    
+    await db.email_quota.update_one(
+        {"id": reserved_at.date().isoformat(), "sent": {"$gt": 0}},
+        {"$inc": {"sent": -1}, "$set": {"paused_until": None}}
+    )
+
+async def pause_daily_email_quota(now: datetime) -> datetime:
+    """Record on today's counter that sending is paused until the next UTC day, for every worker process"""
+    paused_until = next_quota_reset(now)
+    await db.email_quota.update_one({"id": now.date().isoformat()}, {"$set": {"paused_until": paused_until.isoformat()}})
+    return paused_until
+
+async def email_quota_paused_until(now: datetime) -> Optional[datetime]:
+    if EMAIL_DAILY_QUOTA <= 0:
+        return None
+    
+    quota = await db.email_quota.find_one({"id": now.date().isoformat()}, {"_id": 0, "paused_until": 1})
+    paused_until = (quota or {}).get("paused_until")
+    if paused_until and paused_until > now.isoformat():
+        return datetime.fromisoformat(paused_until)
+    return None
+
+async def defer_email(message: dict, until: datetime):
+    """Put a claimed message back without spending an attempt"""
+    await db.email_outbox.update_one(
+        {"id": message["id"]},
+        {
+            "$set": {"status": "queued", "lease_until": None, "next_attempt_at": until.isoformat()},
+            "$inc": {"attempts": -1}
+        }
+    )
+    _email_delivery_counts["deferred"] += 1
+
+async def mark_email_sent(message: dict):
+    now = datetime.now(timezone.utc).isoformat()
+    await db.email_outbox.update_one(
+        {"id": message["id"]},
+        {"$set": {"status": "sent", "sent_at": now, "lease_until": None, "last_error": None}}
+    )
+    await record_email_events([email_event("sent", message)])
+    assignment_ids = message_assignment_ids(message)
+    if message["kind"] == "reminder" and assignment_ids:
+        # The reminder only counts once it is delivered, so a dead-lettered one does not delay the next
+        await db.question_assignments.update_one(
+            {"id": assignment_ids[0]},
+            {"$set": {"last_reminder_sent": now, "reminder_queued_at": None}, "$inc": {"reminder_count": 1}}
+        )
+        return
+    if message["kind"] != "share" or not assignment_ids:
+        return
+    
+    # The filtered update only counts newly sent assignments; the second one sets the status on all of them,
+    # so an assignment already flagged email_sent by an earlier delivery does not stay "queued"
+    result = await db.question_assignments.update_many(
+        {"id": {"$in": assignment_ids}, "email_sent": {"$ne": True}},
+        {"$set": {"email_sent": True}}
+    )
+    await db.question_assignments.update_many(
+        {"id": {"$in": assignment_ids}},
+        {"$set": {"email_sent": True, "email_status": "sent", "email_sent_at": now}}
+    )
+    if result.modified_count:
+        await increment_stats_counters({"assignments.email_sent": result.modified_count})
+
+async def mark_email_failed(message: dict, error: str, bounced: bool = False):
+    """Schedule a retry with exponential backoff, or dead-letter the message on a bounce or after EMAIL_MAX_ATTEMPTS"""
+    if bounced or message["attempts"] >= EMAIL_MAX_ATTEMPTS:
+        await db.email_outbox.update_one(
+            {"id": message["id"]},
+            {"$set": {"status": "dead", "last_error": error, "lease_until": None}}
+        )
+        await record_email_events([email_event("bounced" if bounced else "dead", message, error)])
+        if message["kind"] == "share" and message_assignment_ids(message):
+            await db.question_assignments.update_many(
+                {"id": {"$in": message_assignment_ids(message)}},
+                {"$set": {"email_status": "failed"}}
+            )
+        if message["kind"] == "reminder" and message_assignment_ids(message):
+            await db.question_assignments.update_one(
+                {"id": message_assignment_ids(message)[0]},
+                {"$set": {"reminder_queued_at": None}}
+            )
+        logger.error(f"Email {message['id']} to {message['to']} dead-lettered after {message['attempts']} attempts: {error}")
+        return
+    
+    delay = min(EMAIL_RETRY_MAX_SECONDS, EMAIL_RETRY_BASE_SECONDS * 2 ** (message["attempts"] - 1))
+    # Jitter spreads retries of a throttled batch instead of sending them together again
+    next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=delay * random.uniform(0.5, 1.0))
+    await db.email_outbox.update_one(
+        {"id": message["id"]},
+        {"$set": {
+            "status": "queued",
+            "last_error": error,
+            "lease_until": None,
+            "next_attempt_at": next_attempt_at.isoformat()
+        }}
+    )
+    await record_email_events([email_event("failed", message, error)])
+
+async def confirm_email_sent(message: dict):
+    """Record a delivered message, retrying until it sticks.
+    
+    Giving up would let its lease expire and hand the already delivered message to another worker.
+    """
+    delay = EMAIL_OUTBOX_POLL_SECONDS
+    while True:
+        try:
+            await mark_email_sent(message)
+            return
+        except Exception as e:
+            logger.error(f"Recording sent email {message['id']} failed, retrying in {delay:.1f}s: {str(e)}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, EMAIL_LEASE_SECONDS / 10)
+
+async def acquire_email_outbox_lease() -> bool:
+    """Take or renew the lease that makes this process the only one delivering mail"""
+    now = datetime.now(timezone.utc)
+    try:
+        await db.scheduler_locks.find_one_and_update(
+            {"id": EMAIL_OUTBOX_LOCK, "$or": [
+                {"owner": SCHEDULER_WORKER_ID},
+                {"lease_until": {"$lte": now.isoformat()}}
+            ]},
+            {"$set": {
+                "owner": SCHEDULER_WORKER_ID,
+                "lease_until": (now + timedelta(seconds=EMAIL_OUTBOX_LEADER_SECONDS)).isoformat()
+            }},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Another process holds an unexpired lease
+        return False
+    
+    return True
+
+async def release_email_outbox_lease():
+    await db.scheduler_locks.update_one(
+        {"id": EMAIL_OUTBOX_LOCK, "owner": SCHEDULER_WORKER_ID},
+        {"$set": {"lease_until": datetime.now(timezone.utc).isoformat()}}
+    )
+
+async def email_outbox_leader():
+    """Renew the outbox lease well before it expires; workers idle while it is not held"""
+    global _email_outbox_leader
+    while True:
+        try:
+            leader = await acquire_email_outbox_lease()
+        except Exception as e:
+            logger.error(f"Email outbox lease renewal failed: {str(e)}")
+            leader = False
+        if leader != _email_outbox_leader:
+            logger.info(f"Email outbox delivery {'started' if leader else 'stopped'} in {SCHEDULER_WORKER_ID}")
+        _email_outbox_leader = leader
+        await asyncio.sleep(EMAIL_OUTBOX_LEADER_SECONDS / 3)
+
+async def process_email_outbox():
+    """One worker step: wait out a quota pause, or claim and deliver one due message"""
+    if not _email_outbox_leader:
+        await asyncio.sleep(EMAIL_OUTBOX_POLL_SECONDS)
+        return
+    
+    paused_until = await email_quota_paused_until(datetime.now(timezone.utc))
+    if paused_until:
+        await asyncio.sleep(min((paused_until - datetime.now(timezone.utc)).total_seconds(), EMAIL_OUTBOX_POLL_SECONDS))
+        return
+    
+    # Cleared before claiming so a message enqueued after an empty claim still wakes the worker
+    _email_outbox_wakeup.clear()
+    message = await claim_outbox_message()
+    if message is None:
+        try:
+            await asyncio.wait_for(_email_outbox_wakeup.wait(), EMAIL_OUTBOX_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        return
+    
+    now = datetime.now(timezone.utc)
+    if not await reserve_daily_email_quota(now):
+        paused_until = await pause_daily_email_quota(now)
+        logger.warning(f"Daily email quota of {EMAIL_DAILY_QUOTA} reached, sending resumes at {paused_until.isoformat()}")
+        await defer_email(message, paused_until)
+        return
+    
+    # Concurrency is bounded by the worker count and pool size, the send rate by the token bucket
+    await _email_rate_bucket.acquire()
+    started = time.monotonic()
+    try:
+        await deliver_email(message)
+    except Exception as e:
+        _email_delivery_counts["failed"] += 1
+        logger.warning(f"Email {message['id']} to {message['to']} failed (attempt {message['attempts']}): {str(e)}")
+        await release_daily_email_quota(now)
+        await mark_email_failed(message, str(e), bounced=is_bounce(e))
+        return
+    
+    finished = time.monotonic()
+    _email_recent_sends.append((finished, finished - started))
+    _email_delivery_counts["sent"] += 1
+    await confirm_email_sent(message)
+
+async def email_outbox_worker():
+    while True:
+        try:
+            await process_email_outbox()
+        except Exception as e:
+            # A message claimed before the error is retried once its lease expires
+            logger.error(f"Email outbox worker error: {str(e)}")
+            await asyncio.sleep(EMAIL_OUTBOX_POLL_SECONDS)
+
+@api_router.get("/email-outbox/stats")
+async def get_email_outbox_stats(current_user: User = Depends(get_current_user)):
+    """Get email outbox queue depth, delivery throughput, quota usage and SMTP pool counters"""
+    now = datetime.now(timezone.utc)
+    status_groups, oldest, due, quota = await asyncio.gather(
+        db.email_outbox.aggregate([
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ]).to_list(None),
+        db.email_outbox.find({"status": "queued"}, {"_id": 0, "created_at": 1}).sort("created_at", 1).limit(1).to_list(1),
+        db.email_outbox.count_documents({"status": "queued", "next_attempt_at": {"$lte": now.isoformat()}}),
+        db.email_quota.find_one({"id": now.date().isoformat()}, {"_id": 0})
+    )
+    statuses = {group["_id"]: group["count"] for group in status_groups}
     
-    # Get assignments that need reminders
-    assignments = await db.question_assignments.find({
-        "sent_date": {"$lt": cutoff_date},
-        "response_received": {"$ne": True}
-    }).to_list(1000)
+    oldest_age = None
+    if oldest:
+        oldest_age = round((datetime.now(timezone.utc) - datetime.fromisoformat(oldest[0]["created_at"])).total_seconds())
     
-    reminder_count = 0
-    reminders_sent = []
+    last_minute = recent_email_send_seconds(time.monotonic() - 60)
     
-    for assignment in assignments:
-        # Get question and employee details
-        question = await db.questions.find_one({"id": assignment["question_id"]})
-        employee = await db.employees.find_one({"id": assignment["employee_id"]})
-        
-        if not question or not employee:
-            continue
-            
-        # Check if reminder already sent recently
-        last_reminder = assignment.get("last_reminder_sent")
-        if last_reminder:
-            days_since_reminder = (current_time - datetime.fromisoformat(last_reminder)).days
-            if days_since_reminder < reminder_config.get("min_reminder_interval", 2):
-                continue
+    return {
+        "workers": EMAIL_OUTBOX_WORKERS,
+        "leader": _email_outbox_leader,
+        "statuses": statuses,
+        "queue": {
+            "due": due,
+            "scheduled": statuses.get("queued", 0) - due,
+            "sending": statuses.get("sending", 0)
+        },
+        "oldest_queued_seconds": oldest_age,
+        "throughput": {
+            "sent_last_minute": len(last_minute),
+            "messages_per_second": round(len(last_minute) / 60, 2),
+            "avg_send_ms": round(sum(last_minute) / len(last_minute) * 1000, 1) if last_minute else None,
+            **_email_delivery_counts
+        },
+        "limits": {
+            "rate_per_second": EMAIL_RATE_PER_SECOND,
+            "burst": EMAIL_BURST,
+            "daily_quota": EMAIL_DAILY_QUOTA,
+            "sent_today": (quota or {}).get("sent", 0),
+            "paused_until": (quota or {}).get("paused_until")
+        },
+        "smtp": get_smtp_pool().stats()
+    }
+
+@api_router.post("/email-outbox/{message_id}/retry")
+async def retry_email_outbox_message(message_id: str, current_user: User = Depends(get_current_user)):
+    """Re-queue a dead-lettered email with a fresh attempt budget"""
+    message = await db.email_outbox.find_one_and_update(
+        {"id": message_id, "status": "dead"},
+        {"$set": {
+            "status": "queued",
+            "attempts": 0,
+            "next_attempt_at": datetime.now(timezone.utc).isoformat()
+        }},
+        projection={"_id": 0, "html": 0}
+    )
+    if not message:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Kalıcı olarak başarısız e-posta bulunamadı"
+        )
+    
+    await record_email_events([email_event("queued", {**message, "attempts": 0})])
+    if message["kind"] == "share" and message_assignment_ids(message):
+        await db.question_assignments.update_many(
+            {"id": {"$in": message_assignment_ids(message)}},
+            {"$set": {"email_status": "queued"}}
+        )
+    if message["kind"] == "reminder" and message_assignment_ids(message):
+        await db.question_assignments.update_one(
+            {"id": message_assignment_ids(message)[0]},
+            {"$set": {"reminder_queued_at": datetime.now(timezone.utc).isoformat()}}
+        )
+    wake_email_outbox()
+    return {"success": True, "id": message_id, "status": "queued"}
+
+# Reminder Planner
+# Due assignments are selected by the indexed assigned_at/last_reminder_sent fields and joined with their
+# question and employee in one aggregation, so a run costs one query plus one bulk write.
+# reminder_queued_at marks a reminder still in the outbox; last_reminder_sent is only set once it is delivered.
+REMINDER_PLAN_LIMIT = int(os.environ.get('REMINDER_PLAN_LIMIT', 1000))
+
+def reminder_plan_pipeline(assigned_before: str, reminded_before: str, limit: int) -> List[dict]:
+    return [
+        {"$match": {
+            "response_received": {"$ne": True},
+            "assigned_at": {"$lt": assigned_before},
+            "reminder_queued_at": None,
+            "$or": [
+                {"last_reminder_sent": None},
+                {"last_reminder_sent": {"$lt": reminded_before}}
+            ]
+        }},
+        {"$sort": {"assigned_at": 1}},
+        {"$limit": limit},
+        {"$lookup": {"from": "questions", "localField": "question_id", "foreignField": "id", "as": "question"}},
+        {"$unwind": "$question"},
+        {"$lookup": {"from": "employees", "localField": "employee_id", "foreignField": "id", "as": "employee"}},
+        {"$unwind": "$employee"},
+        {"$match": {"employee.email": {"$nin": [None, ""]}}},
+        {"$project": {
+            "_id": 0,
+            "id": 1,
+            "assigned_at": 1,
+            "question.id": 1,
+            "question.category": 1,
+            "question.question_text": 1,
+            "employee.id": 1,
+            "employee.first_name": 1,
+            "employee.last_name": 1,
+            "employee.email": 1
+        }}
+    ]
+
+async def run_email_reminders(reminder_config: dict) -> dict:
+    """Queue reminder emails for assignments still waiting for a response.
+    
+    With dry_run the plan is returned without queueing emails or updating assignments.
+    """
+    current_time = datetime.now(timezone.utc)
+    reminder_days = reminder_config.get("reminder_days", 3)
+    min_interval = reminder_config.get("min_reminder_interval", 2)
+    dry_run = bool(reminder_config.get("dry_run", False))
+    
+    planned = await db.question_assignments.aggregate(reminder_plan_pipeline(
+        assigned_before=(current_time - timedelta(days=reminder_days)).isoformat(),
+        reminded_before=(current_time - timedelta(days=min_interval)).isoformat(),
+        limit=int(reminder_config.get("limit", REMINDER_PLAN_LIMIT))
+    )).to_list(None)
+    
+    reminders = []
+    outbox = []
+    for assignment in planned:
+        question = assignment["question"]
+        employee = assignment["employee"]
+        assigned_at = datetime.fromisoformat(assignment["assigned_at"])
+        if assigned_at.tzinfo is None:
+            assigned_at = assigned_at.replace(tzinfo=timezone.utc)
         
-        # Prepare reminder email content
         reminder_data = {
             "type": "reminder",
-            "employee_name": f"{employee['first_name']} {employee['last_name']}",
+            "employee_name": f"{employee.get('first_name', '')} {employee.get('last_name', '')}".strip(),
             "employee_email": employee["email"],
-            "question_text": question["question_text"],
-            "category": question["category"],
-            "days_pending": (current_time - datetime.fromisoformat(assignment["sent_date"])).days,
-            "response_url": f"{frontend_url}/answer/{assignment['assignment_id']}",
-            "assignment_id": assignment["assignment_id"]
+            "question_text": question.get("question_text", ""),
+            "category": question.get("category", ""),
+            "days_pending": (current_time - assigned_at).days,
+            "response_url": f"{frontend_url}/answer/{assignment['id']}",
+            "assignment_id": assignment["id"]
         }
-        
-        # Send real reminder email
-        try:
-            # Create HTML content for reminder
-            html_content = f"""
-            <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                <div style="max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f9f9f9;">
-                    <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; border-radius: 8px;">
-                        <h1 style="margin: 0; font-size: 28px;">⏰ Hatırlatma</h1>
-                        <p style="margin: 10px 0 0 0; font-size: 16px; opacity: 0.9;">Dijital Dönüşüm Değerlendirme Sistemi</p>
-                    </div>
-                    
-                    <div style="background: white; padding: 30px; margin: 20px 0; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
-                        <h2 style="color: #d73027; margin-top: 0;">Yanıt Beklenen Soru</h2>
-                        
-                        <div style="background: #fef7e0; border-left: 4px solid #f59e0b; padding: 15px; margin: 20px 0;">
-                            <strong>{reminder_data['category']}</strong><br>
-                            <span style="color: #666; font-size: 14px;">{reminder_data['days_pending']} gün önce size gönderilmiş</span>
-                        </div>
-                        
-                        <p><strong>Soru:</strong> {reminder_data['question_text']}</p>
-                        
-                        <div style="text-align: center; margin: 30px 0;">
-                            <a href="{reminder_data['response_url']}" style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 15px 30px; text-decoration: none; border-radius: 6px; font-weight: bold; display: inline-block;">Soruyu Yanıtla</a>
-                        </div>
-                        
-                        <p style="color: #666; font-size: 14px; text-align: center; margin-top: 30px;">
-                            Bu e-posta, yanıtlanmayan sorular için otomatik olarak gönderilmiştir.<br>
-                            Lütfen en kısa sürede yanıtlayınız.
-                        </p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            message = MessageSchema(
-                subject=f"Hatırlatma - {question['category']} Sorusu Yanıt Bekliyor ({reminder_data['days_pending']} Gün)",
-                recipients=[employee["email"]],
-                body=html_content,
-                subtype=MessageType.html
-            )
-            
-            fm = FastMail(conf)
-            await fm.send_message(message)
-            
-            print(f"✅ Gmail SMTP ile hatırlatma e-postası gönderildi: {employee['email']}")
-            
-        except Exception as e:
-            print(f"❌ Hatırlatma e-postası gönderim hatası: {str(e)}")
+        reminders.append(reminder_data)
+        if dry_run:
             continue
         
-        # Update assignment with reminder info
-        await db.question_assignments.update_one(
-            {"assignment_id": assignment["assignment_id"]},
-            {
-                "$set": {
-                    "last_reminder_sent": current_time.isoformat(),
-                    "reminder_count": assignment.get("reminder_count", 0) + 1
-                }
+        email = render_reminder_email(question, reminder_data["days_pending"], reminder_data["response_url"])
+        outbox.append(outbox_message(
+            "reminder",
+            employee["email"],
+            email["subject"],
+            email["html"],
+            assignment_id=assignment["id"],
+            employee_id=employee["id"],
+            question_id=question["id"],
+            details={
+                "employee_name": reminder_data["employee_name"],
+                "question_category": reminder_data["category"],
+                "question_text": reminder_data["question_text"],
+                "answer_link": reminder_data["response_url"],
+                "days_pending": reminder_data["days_pending"]
             }
-        )
-        
-        reminders_sent.append(reminder_data)
-        reminder_count += 1
+        ))
+    
+    if outbox:
+        # Assignments are marked first so an overlapping run cannot plan the same reminders again
+        await db.question_assignments.bulk_write([
+            UpdateOne(
+                {"id": reminder["assignment_id"]},
+                {"$set": {"reminder_queued_at": current_time.isoformat()}}
+            )
+            for reminder in reminders
+        ], ordered=False)
+        await enqueue_emails(outbox)
     
     return {
         "success": True,
-        "reminder_count": reminder_count,
-        "reminders_sent": reminders_sent,
+        "dry_run": dry_run,
+        "reminder_count": len(reminders),
+        "reminders_sent": reminders,
         "config": reminder_config,
         "processed_at": current_time.isoformat()
     }
 
-@api_router.post("/automation/generate-reports")
-async def generate_automated_reports(
-    report_config: dict,
+@api_router.post("/automation/email-reminders")
+async def setup_email_reminders(
+    reminder_config: dict,
     current_user: User = Depends(get_current_user)
 ):
-    """Generate automated reports based on configuration"""
-    from datetime import datetime, timedelta
-    import json
+    """Setup automated email reminders for pending responses"""
+    return await run_email_reminders(reminder_config)
+
+# Background Jobs
+# Long-running work is recorded in background_jobs and executed on the event loop,
+# so request handlers only enqueue it and return a job id for status polling.
+# A job's process refreshes heartbeat_at while it is queued or running; jobs whose heartbeat
+# expired were lost with their process (restart, crash) and are marked failed.
+BACKGROUND_JOB_CONCURRENCY = int(os.environ.get('BACKGROUND_JOB_CONCURRENCY', 2))
+BACKGROUND_JOB_HEARTBEAT_SECONDS = float(os.environ.get('BACKGROUND_JOB_HEARTBEAT_SECONDS', 15))
+BACKGROUND_JOB_LEASE_SECONDS = float(os.environ.get('BACKGROUND_JOB_LEASE_SECONDS', 60))
+_background_job_semaphore = asyncio.Semaphore(BACKGROUND_JOB_CONCURRENCY)
+_background_tasks: set = set()
+
+async def update_job_progress(job_id: Optional[str], processed: int, total: int):
+    if not job_id:
+        return
+    
+    percent = round(processed / total * 100, 1) if total else 100.0
+    await db.background_jobs.update_one(
+        {"id": job_id},
+        {"$set": {"progress": {"processed": processed, "total": total, "percent": percent}}}
+    )
+
+async def heartbeat_background_job(job_id: str):
+    while True:
+        await asyncio.sleep(BACKGROUND_JOB_HEARTBEAT_SECONDS)
+        try:
+            await db.background_jobs.update_one(
+                {"id": job_id},
+                {"$set": {"heartbeat_at": datetime.now(timezone.utc).isoformat()}}
+            )
+        except Exception as e:
+            logger.warning(f"Background job {job_id} heartbeat failed: {str(e)}")
+
+async def expire_orphaned_background_jobs(job_id: Optional[str] = None) -> int:
+    """Mark queued or running jobs whose heartbeat expired as failed"""
+    now = datetime.now(timezone.utc)
+    cutoff = (now - timedelta(seconds=BACKGROUND_JOB_LEASE_SECONDS)).isoformat()
+    query = {
+        "status": {"$in": ["queued", "running"]},
+        "$or": [
+            {"heartbeat_at": {"$lt": cutoff}},
+            # Jobs recorded before heartbeats existed
+            {"heartbeat_at": None, "created_at": {"$lt": cutoff}}
+        ]
+    }
+    if job_id:
+        query["id"] = job_id
+    
+    result = await db.background_jobs.update_many(query, {"$set": {
+        "status": "failed",
+        "error": "İş, sunucu yeniden başlatıldığı için tamamlanamadı",
+        "finished_at": now.isoformat()
+    }})
+    return result.modified_count
+
+async def run_background_job(job_id: str, handler, payload: dict):
+    heartbeat = asyncio.create_task(heartbeat_background_job(job_id))
+    try:
+        await execute_background_job(job_id, handler, payload)
+    finally:
+        heartbeat.cancel()
+
+async def execute_background_job(job_id: str, handler, payload: dict):
+    async with _background_job_semaphore:
+        started_at = datetime.now(timezone.utc)
+        await db.background_jobs.update_one(
+            {"id": job_id},
+            {"$set": {"status": "running", "started_at": started_at.isoformat()}}
+        )
+        
+        try:
+            result = await handler(job_id, payload)
+        except Exception as e:
+            logger.error(f"Background job {job_id} failed: {str(e)}")
+            await db.background_jobs.update_one(
+                {"id": job_id},
+                {"$set": {
+                    "status": "failed",
+                    "error": str(e),
+                    "finished_at": datetime.now(timezone.utc).isoformat()
+                }}
+            )
+            return
+        
+        finished_at = datetime.now(timezone.utc)
+        await db.background_jobs.update_one(
+            {"id": job_id},
+            {"$set": {
+                "status": "completed",
+                "result": result,
+                "finished_at": finished_at.isoformat(),
+                "duration_seconds": round((finished_at - started_at).total_seconds(), 3)
+            }}
+        )
+
+async def enqueue_background_job(job_type: str, handler, payload: dict, created_by: str) -> dict:
+    """Record a queued job and schedule handler(job_id, payload) on the event loop"""
+    job = {
+        "id": str(uuid.uuid4()),
+        "type": job_type,
+        "status": "queued",
+        "payload": payload,
+        "progress": {"processed": 0, "total": 0, "percent": 0.0},
+        "result": None,
+        "error": None,
+        "created_by": created_by,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "heartbeat_at": datetime.now(timezone.utc).isoformat()
+    }
+    await db.background_jobs.insert_one(job)
+    job.pop("_id", None)
     
-    current_time = datetime.now()
+    task = asyncio.create_task(run_background_job(job["id"], handler, payload))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    
+    return job
+
+@api_router.get("/automation/jobs/{job_id}")
+async def get_background_job(job_id: str, current_user: User = Depends(get_current_user)):
+    """Get status, progress and result of a background job"""
+    await expire_orphaned_background_jobs(job_id)
+    job = await db.background_jobs.find_one({"id": job_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="İş bulunamadı"
+        )
+    
+    return job
+
+# Automated Reports
+REPORT_PROGRESS_INTERVAL = 500
+
+async def build_automated_report(report_config: dict, generated_by: str, job_id: Optional[str] = None) -> dict:
+    """Scan responses of the configured period and store the report in automated_reports"""
+    current_time = datetime.now(timezone.utc)
     report_type = report_config.get("type", "monthly")
     
     # Calculate report period
@@ -1090,42 +2056,30 @@ async def generate_automated_reports(
         start_date = current_time - timedelta(days=7)
         period_name = "Haftalık"
     elif report_type == "monthly":
-        start_date = current_time.replace(day=1)
+        start_date = current_time.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         period_name = "Aylık"
     elif report_type == "quarterly":
         # Get start of quarter
         quarter_start_month = ((current_time.month - 1) // 3) * 3 + 1
-        start_date = current_time.replace(month=quarter_start_month, day=1)
+        start_date = current_time.replace(month=quarter_start_month, day=1, hour=0, minute=0, second=0, microsecond=0)
         period_name = "Çeyreklik"
     else:
         start_date = current_time - timedelta(days=30)
         period_name = "Özel"
     
-    # Get responses in the period
-    responses = await db.table_responses.find({
-        "created_at": {"$gte": start_date}
-    }).to_list(1000)
+    # created_at is stored as a UTC ISO string, so compare against the same representation
+    response_filter = {"created_at": {"$gte": start_date.isoformat()}}
+    total_responses = await db.table_responses.count_documents(response_filter)
+    await update_job_progress(job_id, 0, total_responses)
     
     # Get all questions for context
-    questions = await db.questions.find({}).to_list(1000)
+    questions = await db.questions.find({}, {"_id": 0, "id": 1, "question_text": 1, "category": 1}).to_list(None)
     question_map = {q["id"]: q for q in questions}
     
-    # Generate report data
-    report_data = {
-        "period": period_name,
-        "start_date": start_date.isoformat(),
-        "end_date": current_time.isoformat(),
-        "total_responses": len(responses),
-        "questions_analyzed": len(set(r["question_id"] for r in responses)),
-        "response_breakdown": {},
-        "top_performers": [],
-        "insights": [],
-        "recommendations": []
-    }
-    
-    # Analyze responses by question
+    # Analyze responses by question, streaming the cursor instead of loading every document
     question_stats = {}
-    for response in responses:
+    processed = 0
+    async for response in db.table_responses.find(response_filter, {"_id": 0, "question_id": 1, "table_data": 1}):
         question_id = response["question_id"]
         if question_id not in question_stats:
             question_stats[question_id] = {
@@ -1145,10 +2099,29 @@ async def generate_automated_reports(
                 question_stats[question_id]["total_values"].append(numeric_value)
             except (ValueError, TypeError):
                 pass
+        
+        processed += 1
+        if processed % REPORT_PROGRESS_INTERVAL == 0:
+            await update_job_progress(job_id, processed, total_responses)
+    
+    await update_job_progress(job_id, processed, max(total_responses, processed))
+    
+    # Generate report data
+    report_data = {
+        "period": period_name,
+        "start_date": start_date.isoformat(),
+        "end_date": current_time.isoformat(),
+        "total_responses": processed,
+        "questions_analyzed": len(question_stats),
+        "response_breakdown": {},
+        "top_performers": [],
+        "insights": [],
+        "recommendations": []
+    }
     
     # Generate insights
-    if len(responses) > 0:
-        report_data["insights"].append(f"📊 {period_name} dönemde {len(responses)} yanıt alındı")
+    if processed > 0:
+        report_data["insights"].append(f"📊 {period_name} dönemde {processed} yanıt alındı")
         report_data["insights"].append(f"📈 {len(question_stats)} farklı soru kategorisi analiz edildi")
         
         # Find most active category
@@ -1162,7 +2135,7 @@ async def generate_automated_reports(
             report_data["insights"].append(f"🏆 En aktif kategori: {top_category[0]} ({top_category[1]} yanıt)")
     
     # Generate recommendations
-    if len(responses) < 5:
+    if processed < 5:
         report_data["recommendations"].append("📈 Yanıt oranını artırmak için hatırlatma e-postaları göndermeyi düşünün")
     else:
         report_data["recommendations"].append("✅ İyi performans gösteriyorsunuz, bu tempoyu koruyun")
@@ -1170,33 +2143,590 @@ async def generate_automated_reports(
     if len(question_stats) < 3:
         report_data["recommendations"].append("📊 Daha kapsamlı analiz için farklı kategorilerde sorular eklemeyi düşünün")
     
-    # Store report in database for future reference
-    report_record = {
-        "id": f"report_{current_time.strftime('%Y%m%d_%H%M%S')}",
-        "type": report_type,
-        "generated_at": current_time.isoformat(),
-        "generated_by": current_user.username if current_user else "system",
-        "data": report_data,
-        "config": report_config
+    # Store report in database for future reference
+    report_record = {
+        "id": f"report_{current_time.strftime('%Y%m%d_%H%M%S')}_{(job_id or uuid.uuid4().hex)[:8]}",
+        "type": report_type,
+        "job_id": job_id,
+        "generated_at": current_time.isoformat(),
+        "generated_by": generated_by,
+        "data": report_data,
+        "config": report_config
+    }
+    
+    await db.automated_reports.insert_one(report_record)
+    
+    logger.info(f"[AUTOMATED REPORT] {period_name} raporu oluşturuldu: {report_record['id']} ({processed} yanıt, {len(question_stats)} soru)")
+    
+    return {"report_id": report_record["id"], "report_data": report_data}
+
+async def run_report_job(job_id: str, payload: dict) -> dict:
+    return await build_automated_report(payload.get("config", {}), payload.get("generated_by", "system"), job_id)
+
+@api_router.post("/automation/generate-reports", status_code=status.HTTP_202_ACCEPTED)
+async def generate_automated_reports(
+    report_config: dict,
+    current_user: User = Depends(get_current_user)
+):
+    """Enqueue automated report generation; poll /automation/jobs/{job_id} for the result"""
+    job = await enqueue_background_job(
+        "automated_report",
+        run_report_job,
+        {"config": report_config, "generated_by": current_user.username},
+        current_user.username
+    )
+    
+    return {
+        "success": True,
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/api/automation/jobs/{job['id']}",
+        "queued_at": job["created_at"]
+    }
+
+@api_router.get("/automation/reports")
+async def get_automated_reports(
+    limit: int = Query(20, ge=1, le=100),
+    skip: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user)
+):
+    """List stored automated reports, newest first"""
+    reports = await db.automated_reports.find(
+        {},
+        {"_id": 0, "id": 1, "type": 1, "generated_at": 1, "generated_by": 1, "config.format": 1, "data.total_responses": 1}
+    ).sort("generated_at", -1).skip(skip).limit(limit).to_list(limit)
+    
+    return {
+        "reports": [
+            {
+                "id": report["id"],
+                "type": report.get("type"),
+                "created_at": report.get("generated_at"),
+                "generated_by": report.get("generated_by"),
+                "format": report.get("config", {}).get("format"),
+                "total_responses": report.get("data", {}).get("total_responses", 0)
+            }
+            for report in reports
+        ]
+    }
+
+# Anomaly Scan
+# Scores every question's series in the background and stores findings in the anomalies
+# collection. Only questions whose data version changed since their last scan are recomputed.
+async def question_data_versions() -> Dict[str, str]:
+    """Cheap per-question data version: response count plus the latest updated_at"""
+    groups = await db.table_responses.aggregate([
+        {"$group": {"_id": "$question_id", "count": {"$sum": 1}, "last_updated": {"$max": "$updated_at"}}}
+    ]).to_list(None)
+    return {group["_id"]: f"{group['count']}:{group['last_updated']}" for group in groups}
+
+def table_rows_fingerprint(table_rows: List[dict]) -> str:
+    return hashlib.sha1("|".join(f"{row['id']}={row['name']}" for row in table_rows).encode("utf-8")).hexdigest()[:12]
+
+async def scan_question_anomalies(question: dict, data_version: str) -> int:
+    """Recompute and store the anomalies of one question; returns the number of findings"""
+    question_id = question["id"]
+    table_rows = question.get("table_rows", [])
+    responses = await db.table_responses.find(
+        {"question_id": question_id},
+        {"_id": 0, "year": 1, "month": 1, "table_data": 1}
+    ).to_list(None)
+    
+    period_data = group_values_by_period(responses, table_rows)
+    sorted_periods, series_matrix = period_series_matrix(period_data, table_rows)
+    
+    now = datetime.now(timezone.utc).isoformat()
+    operations = []
+    if table_rows and sorted_periods:
+        for row, row_anomalies in zip(table_rows, detect_anomalies(series_matrix)):
+            for anomaly in row_anomalies:
+                period_key = sorted_periods[anomaly["index"]]
+                operations.append(UpdateOne(
+                    {"question_id": question_id, "row_id": row["id"], "period": period_key},
+                    {
+                        "$set": {
+                            **format_anomaly(row["name"], period_key, anomaly),
+                            "question_text": question.get("question_text", ""),
+                            "data_version": data_version,
+                            "updated_at": now
+                        },
+                        # Acknowledged findings stay acknowledged across rescans
+                        "$setOnInsert": {"id": str(uuid.uuid4()), "status": "new", "detected_at": now}
+                    },
+                    upsert=True
+                ))
+    
+    if operations:
+        await db.anomalies.bulk_write(operations, ordered=False)
+    
+    # Drop findings that are no longer anomalous under the new data
+    await db.anomalies.delete_many({"question_id": question_id, "data_version": {"$ne": data_version}})
+    await db.anomaly_scan_state.update_one(
+        {"question_id": question_id},
+        {"$set": {"data_version": data_version, "scanned_at": now, "anomaly_count": len(operations)}},
+        upsert=True
+    )
+    return len(operations)
+
+async def scan_anomalies(job_id: Optional[str] = None) -> dict:
+    """Incrementally scan all questions whose responses or table rows changed since the last scan"""
+    versions, questions, states = await asyncio.gather(
+        question_data_versions(),
+        db.questions.find({}, {"_id": 0, "id": 1, "question_text": 1, "table_rows": 1}).to_list(None),
+        db.anomaly_scan_state.find({}, {"_id": 0, "question_id": 1, "data_version": 1}).to_list(None)
+    )
+    scanned_versions = {state["question_id"]: state["data_version"] for state in states}
+    
+    changed = []
+    for question in questions:
+        if question["id"] not in versions:
+            continue
+        data_version = f"{versions[question['id']]}:{table_rows_fingerprint(question.get('table_rows', []))}"
+        if scanned_versions.get(question["id"]) != data_version:
+            changed.append((question, data_version))
+    
+    await update_job_progress(job_id, 0, len(changed))
+    anomaly_count = 0
+    for index, (question, data_version) in enumerate(changed, 1):
+        anomaly_count += await scan_question_anomalies(question, data_version)
+        await update_job_progress(job_id, index, len(changed))
+    
+    # Forget questions that were deleted or lost all their responses
+    active_ids = [question["id"] for question in questions if question["id"] in versions]
+    await db.anomalies.delete_many({"question_id": {"$nin": active_ids}})
+    await db.anomaly_scan_state.delete_many({"question_id": {"$nin": active_ids}})
+    
+    new_anomalies = await db.anomalies.count_documents({"status": "new"})
+    await db.stats_counters.update_one({"id": STATS_COUNTERS_ID}, {"$set": {"new_anomalies": new_anomalies}})
+    
+    return {
+        "questions_total": len(questions),
+        "questions_scanned": len(changed),
+        "anomalies_found": anomaly_count,
+        "new_anomalies": new_anomalies
+    }
+
+async def run_anomaly_scan_job(job_id: str, payload: dict) -> dict:
+    return await scan_anomalies(job_id)
+
+@api_router.post("/analytics/anomalies/scan", status_code=status.HTTP_202_ACCEPTED)
+async def start_anomaly_scan(current_user: User = Depends(get_current_user)):
+    """Enqueue an incremental anomaly scan over all questions"""
+    job = await enqueue_background_job("anomaly_scan", run_anomaly_scan_job, {}, current_user.username)
+    return {
+        "success": True,
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/api/automation/jobs/{job['id']}"
+    }
+
+@api_router.get("/analytics/anomalies")
+async def get_anomalies(
+    status_filter: Optional[str] = Query(None, alias="status", pattern="^(new|acknowledged)$"),
+    question_id: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    skip: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user)
+):
+    """List stored anomaly findings, newest first"""
+    query = {}
+    if status_filter:
+        query["status"] = status_filter
+    if question_id:
+        query["question_id"] = question_id
+    
+    anomalies, total = await asyncio.gather(
+        db.anomalies.find(query, {"_id": 0}).sort("detected_at", -1).skip(skip).limit(limit).to_list(limit),
+        db.anomalies.count_documents(query)
+    )
+    return {"anomalies": anomalies, "total": total}
+
+@api_router.post("/analytics/anomalies/{anomaly_id}/acknowledge")
+async def acknowledge_anomaly(anomaly_id: str, current_user: User = Depends(get_current_user)):
+    """Mark an anomaly as seen so it no longer counts as new"""
+    anomaly = await db.anomalies.find_one_and_update(
+        {"id": anomaly_id},
+        {"$set": {"status": "acknowledged", "acknowledged_by": current_user.username}}
+    )
+    if not anomaly:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Anomali bulunamadı"
+        )
+    
+    if anomaly.get("status") == "new":
+        await increment_stats_counters({"new_anomalies": -1})
+    
+    return {"success": True, "id": anomaly_id, "status": "acknowledged"}
+
+# Dashboard Insights
+# AI insights on the analytics dashboard are generated in the background once per question and
+# latest period and stored in question_analytics, so loading the dashboard never calls the LLM.
+async def question_latest_periods() -> Dict[str, dict]:
+    """Map question id to its latest (year, month) and number of distinct periods.
+    
+    Rows without a year and month are ignored; a question with no dated rows is left out.
+    """
+    groups = await db.table_responses.aggregate([
+        {"$match": {"year": {"$gt": 0}, "month": {"$gt": 0}}},
+        {"$group": {"_id": {"question_id": "$question_id", "year": "$year", "month": "$month"}}},
+        {"$sort": {"_id.year": 1, "_id.month": 1}},
+        {"$group": {
+            "_id": "$_id.question_id",
+            "periods": {"$sum": 1},
+            "year": {"$last": "$_id.year"},
+            "month": {"$last": "$_id.month"}
+        }}
+    ]).to_list(None)
+    
+    latest = {}
+    for group in groups:
+        year, month = group["year"], group["month"]
+        latest[group["_id"]] = {
+            "period_key": f"{year}-{month:02d}",
+            "year": year,
+            "month": month,
+            "periods": group["periods"]
+        }
+    return latest
+
+async def generate_question_insights(question: dict, latest: dict) -> str:
+    """Comment on a question's latest period, using the mean of every employee's value for each row"""
+    responses = await db.table_responses.find(
+        {"question_id": question["id"], "year": latest["year"], "month": latest["month"]},
+        {"_id": 0, "table_data": 1}
+    ).to_list(None)
+    row_values: Dict[str, List[float]] = {}
+    for response in responses:
+        for row_id, value in (response.get("table_data") or {}).items():
+            number = parse_number(value)
+            if number is not None:
+                row_values.setdefault(row_id, []).append(number)
+    table_data = {row_id: format_number(sum(values) / len(values)) for row_id, values in row_values.items()}
+    
+    prompt = build_ai_comment_prompt(
+        question_text=question.get("question_text", ""),
+        category=question.get("category", ""),
+        period=question.get("period", ""),
+        table_data=table_data,
+        table_rows=question.get("table_rows", []),
+        monthly_comment=f"Son {latest['periods']} dönem verisi analizi, değerler {len(responses)} çalışanın ortalamasıdır",
+        year=latest["year"],
+        month=latest["month"]
+    )
+    return await cached_ai_comment(prompt, "dashboard")
+
+async def refresh_dashboard_insights(job_id: Optional[str] = None) -> dict:
+    """Regenerate insights for questions whose latest period changed since the stored ones"""
+    latest_periods = await question_latest_periods()
+    records = await db.question_analytics.find({}, {"_id": 0, "question_id": 1, "latest_period": 1}).to_list(None)
+    stored_periods = {record["question_id"]: record.get("latest_period") for record in records}
+    questions = await db.questions.find({"id": {"$in": list(latest_periods)}}, {"_id": 0}).to_list(None)
+    stale = [
+        question for question in questions
+        if stored_periods.get(question["id"]) != latest_periods[question["id"]]["period_key"]
+    ]
+    
+    generated = 0
+    failed = 0
+    for index, question in enumerate(stale, 1):
+        latest = latest_periods[question["id"]]
+        try:
+            ai_insights = await generate_question_insights(question, latest)
+        except (LLMUnavailable, AICommentUnavailable) as e:
+            # The remaining questions stay stale and are picked up by the next run
+            logger.warning(f"Dashboard insights paused: {str(e)}")
+            break
+        except Exception as e:
+            logger.warning(f"Dashboard insights for {question['id']} failed: {str(e)}")
+            failed += 1
+            await update_job_progress(job_id, index, len(stale))
+            continue
+        
+        await db.question_analytics.update_one(
+            {"question_id": question["id"]},
+            {"$set": {
+                "question_id": question["id"],
+                "latest_period": latest["period_key"],
+                "ai_insights": ai_insights,
+                "generated_at": datetime.now(timezone.utc).isoformat()
+            }},
+            upsert=True
+        )
+        generated += 1
+        await update_job_progress(job_id, index, len(stale))
+    
+    return {
+        "questions": len(questions),
+        "stale": len(stale),
+        "generated": generated,
+        "failed": failed
+    }
+
+async def run_dashboard_insights_job(job_id: str, payload: dict) -> dict:
+    return await refresh_dashboard_insights(job_id)
+
+@api_router.post("/analytics/dashboard/insights/refresh", status_code=status.HTTP_202_ACCEPTED)
+async def start_dashboard_insights_refresh(current_user: User = Depends(get_current_user)):
+    """Enqueue generation of dashboard AI insights for questions with a new latest period"""
+    job = await enqueue_background_job("dashboard_insights", run_dashboard_insights_job, {}, current_user.username)
+    return {
+        "success": True,
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/api/automation/jobs/{job['id']}"
+    }
+
+# Scheduler
+# Runs reminders and reports periodically from inside the app. Every uvicorn worker runs
+# the loop, but a lease document in scheduler_locks lets only one of them claim each run.
+SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'false').lower() == 'true'
+SCHEDULER_TICK_SECONDS = int(os.environ.get('SCHEDULER_TICK_SECONDS', 30))
+SCHEDULER_LEASE_SECONDS = int(os.environ.get('SCHEDULER_LEASE_SECONDS', 600))
+SCHEDULER_WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+async def scheduled_email_reminders() -> dict:
+    result = await run_email_reminders({
+        "reminder_days": int(os.environ.get('REMINDER_DAYS', 3)),
+        "min_reminder_interval": int(os.environ.get('MIN_REMINDER_INTERVAL', 2))
+    })
+    return {"reminder_count": result["reminder_count"]}
+
+async def scheduled_automated_report() -> dict:
+    result = await build_automated_report({"type": os.environ.get('REPORT_SCHEDULE_TYPE', 'monthly')}, "scheduler")
+    return {"report_id": result["report_id"], "total_responses": result["report_data"]["total_responses"]}
+
+# A job with interval_minutes <= 0 is disabled
+SCHEDULED_JOBS = {
+    "email_reminders": {
+        "handler": scheduled_email_reminders,
+        "interval_minutes": int(os.environ.get('REMINDER_SCHEDULE_MINUTES', 1440))
+    },
+    "automated_report": {
+        "handler": scheduled_automated_report,
+        "interval_minutes": int(os.environ.get('REPORT_SCHEDULE_MINUTES', 1440))
+    },
+    "anomaly_scan": {
+        "handler": scan_anomalies,
+        "interval_minutes": int(os.environ.get('ANOMALY_SCAN_MINUTES', 60))
+    },
+    "dashboard_insights": {
+        "handler": refresh_dashboard_insights,
+        "interval_minutes": int(os.environ.get('DASHBOARD_INSIGHTS_MINUTES', 60))
+    }
+}
+
+async def acquire_schedule_lease(job_name: str, interval_minutes: int) -> bool:
+    """Claim the next run of a job; only succeeds when the run is due and no lease is held"""
+    now = datetime.now(timezone.utc)
+    try:
+        await db.scheduler_locks.find_one_and_update(
+            {
+                "id": job_name,
+                "next_run_at": {"$lte": now.isoformat()},
+                "lease_until": {"$lte": now.isoformat()}
+            },
+            {"$set": {
+                "owner": SCHEDULER_WORKER_ID,
+                "lease_until": (now + timedelta(seconds=SCHEDULER_LEASE_SECONDS)).isoformat(),
+                "next_run_at": (now + timedelta(minutes=interval_minutes)).isoformat(),
+                "last_run_at": now.isoformat()
+            }},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # The lock exists but is not due or is held by another worker
+        return False
+    
+    return True
+
+async def release_schedule_lease(job_name: str):
+    await db.scheduler_locks.update_one(
+        {"id": job_name, "owner": SCHEDULER_WORKER_ID},
+        {"$set": {"lease_until": datetime.now(timezone.utc).isoformat()}}
+    )
+
+async def run_scheduled_job(job_name: str, job: dict):
+    if not await acquire_schedule_lease(job_name, job["interval_minutes"]):
+        return
+    
+    run = {
+        "id": str(uuid.uuid4()),
+        "job": job_name,
+        "owner": SCHEDULER_WORKER_ID,
+        "status": "running",
+        "started_at": datetime.now(timezone.utc).isoformat()
+    }
+    await db.scheduler_runs.insert_one(run)
+    
+    started = time.monotonic()
+    result = None
+    error = None
+    try:
+        result = await job["handler"]()
+        run_status = "completed"
+    except Exception as e:
+        logger.error(f"Scheduled job {job_name} failed: {str(e)}")
+        run_status = "failed"
+        error = str(e)
+    finally:
+        await release_schedule_lease(job_name)
+    
+    await db.scheduler_runs.update_one(
+        {"id": run["id"]},
+        {"$set": {
+            "status": run_status,
+            "result": result,
+            "error": error,
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "duration_seconds": round(time.monotonic() - started, 3)
+        }}
+    )
+
+async def run_scheduled_job_safely(job_name: str, job: dict):
+    try:
+        await run_scheduled_job(job_name, job)
+    except Exception as e:
+        logger.error(f"Scheduler error for {job_name}: {str(e)}")
+
+async def scheduler_loop():
+    # Each job runs in its own task so a slow report or scan does not hold back the others;
+    # a job still running from an earlier tick is not started again by this process
+    running: Dict[str, asyncio.Task] = {}
+    while True:
+        for job_name, job in SCHEDULED_JOBS.items():
+            task = running.get(job_name)
+            if job["interval_minutes"] <= 0 or (task and not task.done()):
+                continue
+            running[job_name] = asyncio.create_task(run_scheduled_job_safely(job_name, job))
+        
+        await asyncio.sleep(SCHEDULER_TICK_SECONDS)
+
+@api_router.get("/automation/scheduler")
+async def get_scheduler_status(
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+):
+    """Get scheduled jobs, their leases and recent run history"""
+    locks = await db.scheduler_locks.find({}, {"_id": 0}).to_list(None)
+    lock_map = {lock["id"]: lock for lock in locks}
+    runs = await db.scheduler_runs.find({}, {"_id": 0}).sort("started_at", -1).limit(limit).to_list(limit)
+    
+    return {
+        "enabled": SCHEDULER_ENABLED,
+        "worker_id": SCHEDULER_WORKER_ID,
+        "jobs": [
+            {
+                "name": job_name,
+                "interval_minutes": job["interval_minutes"],
+                "next_run_at": lock_map.get(job_name, {}).get("next_run_at"),
+                "last_run_at": lock_map.get(job_name, {}).get("last_run_at"),
+                "owner": lock_map.get(job_name, {}).get("owner"),
+                "lease_until": lock_map.get(job_name, {}).get("lease_until")
+            }
+            for job_name, job in SCHEDULED_JOBS.items()
+        ],
+        "recent_runs": runs
     }
+
+# Materialized dashboard counters
+# A single stats_counters document is kept in sync with atomic $inc updates by every
+# write path, so /dashboard/stats reads one document instead of counting collections.
+# Reconciling takes a scheduler lease so only one process recounts at a time.
+STATS_COUNTERS_ID = "global"
+STATS_RECONCILE_LOCK = "stats_counters_reconcile"
+
+def period_counter_key(year: int, month: int) -> str:
+    return f"responses_by_period.{year}-{month:02d}"
+
+async def increment_stats_counters(increments: Dict[str, int]):
+    """Apply counter increments atomically.
     
-    await db.automated_reports.insert_one(report_record)
+    A missing document is created from the increment so it is not lost; without reconciled_at
+    it is still rebuilt in full by the next get_stats_counters.
+    """
+    increments = {key: value for key, value in increments.items() if value}
+    if not increments:
+        return
+    
+    await db.stats_counters.update_one({"id": STATS_COUNTERS_ID}, {"$inc": increments}, upsert=True)
+
+async def record_table_response_write(existing_response: Optional[dict], ai_comment: Optional[str], year: int, month: int):
+    """Update counters after a table response insert or update"""
+    had_ai_comment = bool(existing_response and existing_response.get("ai_comment"))
+    increments = {"ai_comments": int(bool(ai_comment)) - int(had_ai_comment)}
+    if not existing_response:
+        increments[period_counter_key(year, month)] = 1
+    
+    await increment_stats_counters(increments)
+
+async def reconcile_stats_counters() -> dict:
+    """Recount every dashboard counter from scratch and $set them on the counters document.
     
-    # Demo: Print report summary
-    print(f"[AUTOMATED REPORT] {period_name} Raporu Oluşturuldu:")
-    print(f"Dönem: {start_date.strftime('%Y-%m-%d')} - {current_time.strftime('%Y-%m-%d')}")
-    print(f"Toplam Yanıt: {len(responses)}")
-    print(f"Analiz Edilen Sorular: {len(question_stats)}")
-    for insight in report_data["insights"]:
-        print(f"• {insight}")
-    print("---")
+    When another process holds the reconcile lease its result is awaited instead of recounting.
+    """
+    if not await acquire_schedule_lease(STATS_RECONCILE_LOCK, 0):
+        return await db.stats_counters.find_one({"id": STATS_COUNTERS_ID}) or {"id": STATS_COUNTERS_ID}
     
-    return {
-        "success": True,
-        "report_id": report_record["id"],
-        "report_data": report_data,
-        "generated_at": current_time.isoformat()
+    try:
+        return await recount_stats_counters()
+    finally:
+        await release_schedule_lease(STATS_RECONCILE_LOCK)
+
+async def recount_stats_counters() -> dict:
+    period_groups, ai_comments, employees, questions, assignment_groups, new_anomalies = await asyncio.gather(
+        db.table_responses.aggregate([
+            {"$group": {"_id": {"year": "$year", "month": "$month"}, "count": {"$sum": 1}}}
+        ]).to_list(None),
+        db.table_responses.count_documents({"ai_comment": {"$exists": True, "$nin": [None, ""]}}),
+        db.employees.count_documents({}),
+        db.questions.count_documents({}),
+        db.question_assignments.aggregate([
+            {"$group": {
+                "_id": None,
+                "total": {"$sum": 1},
+                "email_sent": {"$sum": {"$cond": [{"$eq": ["$email_sent", True]}, 1, 0]}},
+                "response_received": {"$sum": {"$cond": [{"$eq": ["$response_received", True]}, 1, 0]}}
+            }}
+        ]).to_list(1),
+        db.anomalies.count_documents({"status": "new"})
+    )
+    
+    assignment_totals = assignment_groups[0] if assignment_groups else {}
+    counters = {
+        "id": STATS_COUNTERS_ID,
+        "responses_by_period": {
+            f"{group['_id']['year']}-{group['_id']['month']:02d}": group["count"]
+            for group in period_groups
+            if isinstance(group["_id"].get("year"), int) and isinstance(group["_id"].get("month"), int)
+        },
+        "ai_comments": ai_comments,
+        "employees": employees,
+        "questions": questions,
+        "assignments": {
+            "total": assignment_totals.get("total", 0),
+            "email_sent": assignment_totals.get("email_sent", 0),
+            "response_received": assignment_totals.get("response_received", 0)
+        },
+        "new_anomalies": new_anomalies,
+        "reconciled_at": datetime.now(timezone.utc).isoformat()
     }
+    
+    await db.stats_counters.update_one({"id": STATS_COUNTERS_ID}, {"$set": counters}, upsert=True)
+    return counters
+
+async def get_stats_counters() -> dict:
+    counters = await db.stats_counters.find_one({"id": STATS_COUNTERS_ID})
+    if counters is None or "reconciled_at" not in counters:
+        counters = await reconcile_stats_counters()
+    return counters
+
+@api_router.post("/dashboard/stats/reconcile")
+async def reconcile_dashboard_stats(current_user: User = Depends(get_current_user)):
+    """Rebuild the materialized dashboard counters from the source collections"""
+    counters = await reconcile_stats_counters()
+    counters.pop("_id", None)
+    return {"success": True, "counters": counters}
 
 @api_router.get("/dashboard/stats")
 async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
@@ -1215,17 +2745,15 @@ async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
         prev_month = current_month - 1
         prev_year = current_year
     
-    # Get current month responses
-    current_month_responses = await db.table_responses.count_documents({
-        "year": current_year,
-        "month": current_month
-    })
+    counters = await get_stats_counters()
+    responses_by_period = counters.get("responses_by_period", {})
     
-    # Get previous month responses for trend calculation
-    prev_month_responses = await db.table_responses.count_documents({
-        "year": prev_year,
-        "month": prev_month
-    })
+    current_month_responses = responses_by_period.get(f"{current_year}-{current_month:02d}", 0)
+    prev_month_responses = responses_by_period.get(f"{prev_year}-{prev_month:02d}", 0)
+    active_users = counters.get("employees", 0)
+    active_questions = counters.get("questions", 0)
+    ai_analyses = counters.get("ai_comments", 0)
+    new_anomalies = counters.get("new_anomalies", 0)
     
     # Calculate monthly trend
     if prev_month_responses > 0:
@@ -1233,17 +2761,6 @@ async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
     else:
         monthly_trend = 0 if current_month_responses == 0 else 100
     
-    # Get total active users (employees)
-    active_users = await db.employees.count_documents({})
-    
-    # Get total active questions
-    active_questions = await db.questions.count_documents({})
-    
-    # Get responses with AI comments
-    ai_analyses = await db.table_responses.count_documents({
-        "ai_comment": {"$exists": True, "$ne": None, "$ne": ""}
-    })
-    
     # Calculate completion rate (responses vs expected responses)
     # For simplicity, assume each active question should have 1 response per employee per month
     expected_responses = active_questions * active_users
@@ -1275,6 +2792,14 @@ async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
             "priority": "low"
         })
     
+    # Notification about anomalies found by the background scan
+    if new_anomalies > 0:
+        notifications.append({
+            "type": "warning",
+            "message": f"{new_anomalies} yeni anomali tespit edildi",
+            "priority": "high"
+        })
+    
     # Monthly report notification
     notifications.append({
         "type": "info",
@@ -1289,6 +2814,7 @@ async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
         "completion_rate": round(completion_rate, 1),
         "ai_analyses": ai_analyses,
         "active_questions": active_questions,
+        "new_anomalies": new_anomalies,
         "notifications": notifications,
         "last_updated": current_time.isoformat()
     }
@@ -1344,6 +2870,7 @@ async def create_employee(employee_data: EmployeeCreate, current_user: User = De
     employee_dict["created_at"] = datetime.now(timezone.utc).isoformat()
     
     await db.employees.insert_one(employee_dict)
+    await increment_stats_counters({"employees": 1})
     
     employee = Employee(**employee_dict)
     employee.created_at = datetime.fromisoformat(employee_dict["created_at"].replace('Z', '+00:00')) if isinstance(employee_dict["created_at"], str) else employee_dict["created_at"]
@@ -1420,6 +2947,8 @@ async def delete_employee(employee_id: str, current_user: User = Depends(get_cur
             detail="Çalışan bulunamadı"
         )
     
+    await increment_stats_counters({"employees": -1})
+    
     return {"message": "Çalışan başarıyla silindi"}
 
 # Question Bank Routes
@@ -1430,6 +2959,7 @@ async def create_question(question_data: QuestionCreate, current_user: User = De
     question_dict["created_at"] = datetime.now(timezone.utc).isoformat()
     
     await db.questions.insert_one(question_dict)
+    await increment_stats_counters({"questions": 1})
     
     question = Question(**question_dict)
     question.created_at = datetime.fromisoformat(question_dict["created_at"].replace('Z', '+00:00')) if isinstance(question_dict["created_at"], str) else question_dict["created_at"]
@@ -1488,6 +3018,8 @@ async def delete_question(question_id: str, current_user: User = Depends(get_cur
             detail="Soru bulunamadı"
         )
     
+    await increment_stats_counters({"questions": -1})
+    
     return {"message": "Soru başarıyla silindi"}
 
 # Category Routes
@@ -1614,9 +3146,8 @@ async def get_questions_for_sharing(
         "employees": formatted_employees
     }
 
-@api_router.post("/questions-share")
-async def share_questions(share_request: ShareQuestionsRequest, current_user: User = Depends(get_current_user)):
-    """Share questions via email to assigned employees"""
+async def share_question_assignments(share_request: ShareQuestionsRequest) -> dict:
+    """Create or refresh this month's assignments and queue their emails, one per question or one digest per employee"""
     current_date = datetime.now(timezone.utc)
     year = current_date.year
     month = current_date.month
@@ -1627,9 +3158,12 @@ async def share_questions(share_request: ShareQuestionsRequest, current_user: Us
     month_year = f"{month_names[month]} {year}"
     
     assignments_created = []
-    email_successes = 0
+    pending_emails: Dict[str, List[dict]] = {}
     email_failures = []
+    unsent_events = []
     resend_count = 0
+    question_blocks: Dict[str, Markup] = {}
+    shared_pairs = set()
     
     for assignment_data in share_request.assignments:
         question_id = assignment_data.get("question_id")
@@ -1637,6 +3171,10 @@ async def share_questions(share_request: ShareQuestionsRequest, current_user: Us
         
         if not question_id or not employee_id:
             continue
+        # A pair listed twice in one request would otherwise be queued, and shown in a digest, twice
+        if (question_id, employee_id) in shared_pairs:
+            continue
+        shared_pairs.add((question_id, employee_id))
         
         # Check if assignment already exists for this month  
         existing_assignment = await db.question_assignments.find_one({
@@ -1664,7 +3202,6 @@ async def share_questions(share_request: ShareQuestionsRequest, current_user: Us
             assignment_id = existing_assignment["id"]
             assignment_dict = existing_assignment.copy()
             assignment_dict["assigned_at"] = current_date.isoformat()  # Update timestamp
-            assignment_dict["email_sent"] = False  # Reset email status
         else:
             # Create new assignment
             assignment_id = str(uuid.uuid4())
@@ -1679,28 +3216,42 @@ async def share_questions(share_request: ShareQuestionsRequest, current_user: Us
                 "assigned_at": current_date.isoformat()
             }
         
-        # Send email if employee has email address
-        email_sent = False
+        employee_name = f"{employee['first_name']} {employee['last_name']}"
+        details = {
+            "employee_name": employee_name,
+            "question_category": question.get("category", ""),
+            "question_text": question.get("question_text", ""),
+            "answer_link": f"{frontend_url}/answer/{assignment_id}",
+            "year": year,
+            "month": month,
+            "resend": is_resend
+        }
+        
+        # Queue the email if employee has email address; the outbox worker sets email_sent once delivered
         if employee.get('email'):
-            employee_name = f"{employee['first_name']} {employee['last_name']}"
-            email_sent = await send_question_email(
-                employee['email'],
-                employee_name,
-                question,
-                assignment_id,
-                month_year
-            )
-            
-            if email_sent:
-                email_successes += 1
-            else:
-                email_failures.append(employee_name)
+            if question_id not in question_blocks:
+                question_blocks[question_id] = render_question_block(question)
+            pending_emails.setdefault(employee_id, []).append({
+                "email": employee['email'],
+                "assignment_id": assignment_id,
+                "question_id": question_id,
+                "details": details
+            })
+            email_status = "queued"
         else:
             # No email address
-            email_failures.append(f"{employee['first_name']} {employee['last_name']} (E-posta adresi yok)")
+            email_failures.append(f"{employee_name} (E-posta adresi yok)")
+            unsent_events.append(email_event("failed", {
+                "kind": "share",
+                "assignment_id": assignment_id,
+                "employee_id": employee_id,
+                "question_id": question_id,
+                "details": details
+            }, "E-posta adresi yok"))
+            email_status = "failed"
         
-        # Update assignment with email status
-        assignment_dict["email_sent"] = email_sent
+        assignment_dict["email_sent"] = False
+        assignment_dict["email_status"] = email_status
         
         if existing_assignment:
             # Update existing assignment
@@ -1708,12 +3259,59 @@ async def share_questions(share_request: ShareQuestionsRequest, current_user: Us
                 {"id": assignment_id},
                 {"$set": assignment_dict}
             )
+            await increment_stats_counters({
+                "assignments.email_sent": -int(bool(existing_assignment.get("email_sent")))
+            })
         else:
             # Insert new assignment
             await db.question_assignments.insert_one(assignment_dict)
+            await increment_stats_counters({"assignments.total": 1})
         
         assignments_created.append(assignment_dict)
     
+    outbox = []
+    for employee_id, items in pending_emails.items():
+        if not share_request.digest or len(items) == 1:
+            for item in items:
+                email = render_question_email(item["details"]["employee_name"], question_blocks[item["question_id"]], item["assignment_id"], month_year)
+                outbox.append(outbox_message(
+                    "share",
+                    item["email"],
+                    email["subject"],
+                    email["html"],
+                    assignment_id=item["assignment_id"],
+                    employee_id=employee_id,
+                    question_id=item["question_id"],
+                    details=item["details"]
+                ))
+            continue
+        
+        email = render_digest_email(items[0]["details"]["employee_name"], [
+            {"question_block": question_blocks[item["question_id"]], "answer_link": item["details"]["answer_link"]}
+            for item in items
+        ], month_year)
+        outbox.append(outbox_message(
+            "share",
+            items[0]["email"],
+            email["subject"],
+            email["html"],
+            employee_id=employee_id,
+            assignment_ids=[item["assignment_id"] for item in items],
+            details={
+                "employee_name": items[0]["details"]["employee_name"],
+                "year": year,
+                "month": month,
+                "questions": [
+                    {key: item["details"][key] for key in ("question_category", "question_text", "answer_link")}
+                    for item in items
+                ]
+            }
+        ))
+    
+    # Assignments exist before their emails can be delivered and marked as sent
+    await enqueue_emails(outbox)
+    await record_email_events(unsent_events)
+    
     # Prepare response message
     message_parts = []
     if assignments_created:
@@ -1723,8 +3321,8 @@ async def share_questions(share_request: ShareQuestionsRequest, current_user: Us
         if resend_count > 0:
             message_parts.append(f"{resend_count} soru tekrar gönderildi")
     
-    if email_successes:
-        message_parts.append(f"{email_successes} e-posta başarıyla gönderildi")
+    if outbox:
+        message_parts.append(f"{len(outbox)} e-posta gönderim kuyruğuna alındı")
     
     if email_failures:
         message_parts.append(f"{len(email_failures)} e-posta gönderilemedi")
@@ -1734,12 +3332,18 @@ async def share_questions(share_request: ShareQuestionsRequest, current_user: Us
     return {
         "message": response_message,
         "assignments_created": len(assignments_created),
-        "emails_sent": email_successes,
+        "emails_queued": len(outbox),
+        "digest": share_request.digest,
         "email_failures": email_failures,
         "year": year,
         "month": month
     }
 
+@api_router.post("/questions-share")
+async def share_questions(share_request: ShareQuestionsRequest, current_user: User = Depends(get_current_user)):
+    """Share questions via email to assigned employees, one email per question or one digest per employee"""
+    return await share_question_assignments(share_request)
+
 # Public Question Response Routes (No auth required)
 @api_router.get("/public/question-form/{assignment_id}")
 async def get_public_question_form(assignment_id: str):
@@ -1826,6 +3430,8 @@ async def submit_public_question_response(response_data: QuestionResponseCreate)
         {"id": response_data.assignment_id},
         {"$set": {"response_received": True}}
     )
+    if not assignment.get("response_received"):
+        await increment_stats_counters({"assignments.response_received": 1})
     
     return {
         "message": "Yanıtınız başarıyla kaydedildi",
@@ -1857,31 +3463,51 @@ async def get_question_responses(current_user: User = Depends(get_current_user))
     return formatted_responses
 
 @api_router.get("/email-logs")
-async def get_email_logs(current_user: User = Depends(get_current_user)):
-    """Get demo email logs"""
-    assignments = await db.question_assignments.find({"email_sent": True}).sort("assigned_at", -1).to_list(20)
-    
-    email_logs = []
-    for assignment in assignments:
-        question = await db.questions.find_one({"id": assignment["question_id"]})
-        employee = await db.employees.find_one({"id": assignment["employee_id"]})
-        
-        if question and employee:
-            email_log = {
-                "assignment_id": assignment["id"],
-                "employee_name": f"{employee['first_name']} {employee['last_name']}",
-                "employee_email": employee.get('email', 'E-posta yok'),
-                "question_category": question["category"],
-                "question_text": question["question_text"],
-                "answer_link": f"{frontend_url}/answer/{assignment['id']}",
-                "sent_date": assignment["assigned_at"],
-                "response_received": assignment.get("response_received", False),
-                "year": assignment["year"],
-                "month": assignment["month"]
-            }
-            email_logs.append(email_log)
-    
-    return email_logs
+async def get_email_logs(
+    event_type: Optional[str] = Query(None, alias="type", pattern="^(queued|sent|failed|dead|bounced)$"),
+    kind: Optional[str] = Query(None, pattern="^(share|reminder)$"),
+    employee_id: Optional[str] = Query(None),
+    assignment_id: Optional[str] = Query(None),
+    since: Optional[str] = Query(None),
+    until: Optional[str] = Query(None),
+    before: Optional[str] = Query(None),
+    before_id: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user)
+):
+    """Page through the email delivery log, newest first.
+    
+    Pass the created_at and id of the last log on a page as before/before_id to get the next page;
+    the cursor keeps deep pages as cheap as the first one, unlike skip.
+    """
+    query = {}
+    if event_type:
+        query["type"] = event_type
+    if kind:
+        query["kind"] = kind
+    if employee_id:
+        query["employee_id"] = employee_id
+    if assignment_id:
+        query["assignment_ids"] = assignment_id
+    if since or until:
+        query["created_at"] = {}
+        if since:
+            query["created_at"]["$gte"] = since
+        if until:
+            query["created_at"]["$lt"] = until
+    
+    page_query = query
+    if before:
+        after_cursor = [{"created_at": {"$lt": before}}]
+        if before_id:
+            after_cursor.append({"created_at": before, "id": {"$lt": before_id}})
+        page_query = {"$and": [query, {"$or": after_cursor}]}
+    
+    logs, total = await asyncio.gather(
+        db.email_events.find(page_query, {"_id": 0}).sort([("created_at", -1), ("id", -1)]).limit(limit).to_list(limit),
+        db.email_events.count_documents(query)
+    )
+    return {"logs": logs, "total": total}
 
 @api_router.get("/answer-status")
 async def get_answer_status(current_user: User = Depends(get_current_user)):
@@ -1916,6 +3542,7 @@ async def get_answer_status(current_user: User = Depends(get_current_user)):
                 "year": assignment["year"],
                 "month": assignment["month"],
                 "email_sent": assignment.get("email_sent", False),
+                "email_status": assignment.get("email_status"),
                 "response_received": assignment.get("response_received", False),
                 "response": {
                     "submitted": bool(response),
@@ -1927,6 +3554,565 @@ async def get_answer_status(current_user: User = Depends(get_current_user)):
     
     return answer_status_list
 
+# AI Comment Queue
+# Table responses are saved with ai_comment_status "pending" and a bounded pool of workers
+# generates the comment afterwards. Every save stamps a new ai_comment_request_id and a
+# worker only writes its comment back while that id is unchanged, so stale results are dropped.
+AI_COMMENT_WORKERS = int(os.environ.get('AI_COMMENT_WORKERS', 4))
+AI_COMMENT_QUEUE_SIZE = int(os.environ.get('AI_COMMENT_QUEUE_SIZE', 1000))
+AI_COMMENT_MAX_ATTEMPTS = int(os.environ.get('AI_COMMENT_MAX_ATTEMPTS', 3))
+# Pending responses to the same question and period are commented on in one LLM call
+AI_COMMENT_BATCH_SIZE = int(os.environ.get('AI_COMMENT_BATCH_SIZE', 10))
+AI_COMMENT_LEASE_SECONDS = int(os.environ.get('AI_COMMENT_LEASE_SECONDS', 300))
+AI_COMMENT_SWEEP_SECONDS = int(os.environ.get('AI_COMMENT_SWEEP_SECONDS', 60))
+
+# Commentary modes: "llm" queues every response for the LLM, "local" only writes the rule-based
+# comment and "hybrid" writes the local comment at once, queueing the LLM only when it escalates.
+# A question's ai_mode overrides this default.
+AI_COMMENT_MODE = os.environ.get('AI_COMMENT_MODE', 'llm')
+LOCAL_COMMENT_HISTORY = 12
+
+_ai_comment_queue: Optional[asyncio.Queue] = None
+_ai_comment_queued: set = set()
+_ai_comment_tasks: List[asyncio.Task] = []
+
+# Server-sent events: workers publish status changes to in-process subscribers on the
+# "response:<id>" and "question:<id>" channels. Streams also re-read the database every
+# AI_COMMENT_EVENTS_POLL_SECONDS so comments finished by another process still arrive.
+AI_COMMENT_EVENTS_POLL_SECONDS = float(os.environ.get('AI_COMMENT_EVENTS_POLL_SECONDS', 5))
+AI_COMMENT_EVENT_FIELDS = (
+    "id", "question_id", "employee_id", "year", "month",
+    "ai_comment", "ai_comment_status", "ai_comment_source", "ai_comment_error"
+)
+AI_COMMENT_EVENT_PROJECTION = {"_id": 0, **{field: 1 for field in AI_COMMENT_EVENT_FIELDS}}
+AI_COMMENT_TERMINAL_STATUSES = ("completed", "failed", "none")
+
+_ai_comment_subscribers: Dict[str, set] = {}
+
+def subscribe_ai_comment_events(channels: List[str]) -> asyncio.Queue:
+    queue = asyncio.Queue(maxsize=100)
+    for channel in channels:
+        _ai_comment_subscribers.setdefault(channel, set()).add(queue)
+    return queue
+
+def unsubscribe_ai_comment_events(channels: List[str], queue: asyncio.Queue):
+    for channel in channels:
+        subscribers = _ai_comment_subscribers.get(channel)
+        if subscribers is None:
+            continue
+        subscribers.discard(queue)
+        if not subscribers:
+            del _ai_comment_subscribers[channel]
+
+def publish_ai_comment_event(response: dict, changes: dict):
+    """Push a response's new AI comment state to its response and question channels"""
+    event = {field: response.get(field) for field in AI_COMMENT_EVENT_FIELDS}
+    event.update({field: value for field, value in changes.items() if field in AI_COMMENT_EVENT_FIELDS})
+    
+    queues = set()
+    for channel in (f"response:{response['id']}", f"question:{response.get('question_id')}"):
+        queues |= _ai_comment_subscribers.get(channel, set())
+    for queue in queues:
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A slow client catches up through the stream's periodic database read
+            pass
+
+def format_sse_event(data: dict) -> str:
+    return f"event: ai_comment\nid: {data['id']}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def pending_ai_comment_fields(table_data: Dict[str, str], monthly_comment: Optional[str], origin: str) -> dict:
+    """Fields that reset a saved response so a fresh AI comment is generated for it.
+
+    `origin` is the endpoint that saved it (single, public or bulk), used as the call site in metrics.
+    """
+    has_content = bool(table_data or (monthly_comment and monthly_comment.strip()))
+    return {
+        "ai_comment": None,
+        "ai_comment_status": "pending" if has_content else "none",
+        "ai_comment_request_id": str(uuid.uuid4()),
+        "ai_comment_attempts": 0,
+        "ai_comment_error": None,
+        "ai_comment_lease_until": None,
+        "ai_comment_source": None,
+        "ai_comment_origin": origin
+    }
+
+async def build_local_ai_comment(question: dict, response_data: TableResponseCreate) -> dict:
+    """Rule-based comment from the employee's recent history and peers in the same period"""
+    table_rows = question.get("table_rows", [])
+    values = {row["id"]: parse_number(response_data.table_data.get(row["id"])) for row in table_rows}
+    if all(value is None for value in values.values()):
+        return {"comment": None, "escalate": False}
+    
+    history, peers = await asyncio.gather(
+        db.table_responses.find(
+            {
+                "question_id": response_data.question_id,
+                "employee_id": response_data.employee_id,
+                "$or": [
+                    {"year": {"$lt": response_data.year}},
+                    {"year": response_data.year, "month": {"$lt": response_data.month}}
+                ]
+            },
+            {"_id": 0, "table_data": 1}
+        ).sort([("year", -1), ("month", -1)]).limit(LOCAL_COMMENT_HISTORY).to_list(LOCAL_COMMENT_HISTORY),
+        db.table_responses.find(
+            {
+                "question_id": response_data.question_id,
+                "year": response_data.year,
+                "month": response_data.month,
+                "employee_id": {"$ne": response_data.employee_id}
+            },
+            {"_id": 0, "table_data": 1}
+        ).to_list(None)
+    )
+    history.reverse()
+    
+    def row_values(responses: List[dict], row_id: str) -> List[float]:
+        parsed = (parse_number(response.get("table_data", {}).get(row_id)) for response in responses)
+        return [value for value in parsed if value is not None]
+    
+    return build_local_comment([
+        {
+            "name": row["name"],
+            "unit": row.get("unit"),
+            "value": values[row["id"]],
+            "history": row_values(history, row["id"]),
+            "peers": row_values(peers, row["id"]),
+            "min_threshold": row.get("min_threshold"),
+            "max_threshold": row.get("max_threshold")
+        }
+        for row in table_rows
+    ])
+
+async def ai_comment_fields_for_save(question: dict, response_data: TableResponseCreate, origin: str) -> dict:
+    """AI comment fields for a saved response according to the question's commentary mode"""
+    fields = pending_ai_comment_fields(response_data.table_data, response_data.monthly_comment, origin)
+    mode = question.get("ai_mode") or AI_COMMENT_MODE
+    if fields["ai_comment_status"] == "none" or mode == "llm":
+        return fields
+    
+    local = await build_local_ai_comment(question, response_data)
+    if local["comment"]:
+        fields["ai_comment"] = local["comment"]
+        fields["ai_comment_source"] = "local"
+    
+    # Hybrid mode keeps the LLM for outliers and text-only answers, which the rules cannot judge
+    if mode == "hybrid" and (local["escalate"] or not local["comment"]):
+        return fields
+    
+    fields["ai_comment_status"] = "completed" if local["comment"] else "none"
+    return fields
+
+def enqueue_ai_comment(response_id: str):
+    """Hand a pending response to the workers; if the queue is full the sweeper picks it up later"""
+    if _ai_comment_queue is None or response_id in _ai_comment_queued:
+        return
+    
+    try:
+        _ai_comment_queue.put_nowait(response_id)
+    except asyncio.QueueFull:
+        return
+    _ai_comment_queued.add(response_id)
+
+async def claim_ai_comment(response_id: str) -> Optional[dict]:
+    """Lease a pending response, or one whose previous worker died mid-generation"""
+    now = datetime.now(timezone.utc)
+    response = await db.table_responses.find_one_and_update(
+        {
+            "id": response_id,
+            "$or": [
+                {"ai_comment_status": "pending"},
+                {"ai_comment_status": "generating", "ai_comment_lease_until": {"$lte": now.isoformat()}}
+            ]
+        },
+        {
+            "$set": {
+                "ai_comment_status": "generating",
+                "ai_comment_lease_until": (now + timedelta(seconds=AI_COMMENT_LEASE_SECONDS)).isoformat()
+            },
+            "$inc": {"ai_comment_attempts": 1}
+        },
+        return_document=ReturnDocument.AFTER
+    )
+    if response:
+        response.pop("_id", None)
+        publish_ai_comment_event(response, {})
+    return response
+
+async def finish_ai_comment(response: dict, ai_comment: Optional[str], error: Optional[str] = None):
+    """Write the outcome back unless the response was re-saved in the meantime"""
+    update = {
+        "ai_comment_status": "completed" if ai_comment else "failed",
+        "ai_comment_error": error,
+        "ai_comment_lease_until": None
+    }
+    if ai_comment:
+        update["ai_comment"] = ai_comment
+        update["ai_comment_source"] = "llm"
+        update["ai_comment_generated_at"] = datetime.now(timezone.utc).isoformat()
+    
+    previous = await db.table_responses.find_one_and_update(
+        {"id": response["id"], "ai_comment_request_id": response["ai_comment_request_id"]},
+        {"$set": update},
+        projection={"ai_comment": 1}
+    )
+    if not previous:
+        return
+    
+    publish_ai_comment_event(response, update)
+    # Hybrid responses already count through their local comment
+    if ai_comment and not previous.get("ai_comment"):
+        await increment_stats_counters({"ai_comments": 1})
+
+async def defer_ai_comment(response: dict):
+    """Return a claimed response to pending without spending an attempt; the sweeper retries it"""
+    result = await db.table_responses.update_one(
+        {"id": response["id"], "ai_comment_request_id": response["ai_comment_request_id"]},
+        {"$set": {"ai_comment_status": "pending", "ai_comment_lease_until": None}, "$inc": {"ai_comment_attempts": -1}}
+    )
+    if result.modified_count:
+        publish_ai_comment_event(response, {"ai_comment_status": "pending"})
+
+def ai_comment_data_args(response: dict, question: dict) -> dict:
+    return {
+        "table_data": response.get("table_data") or {},
+        "table_rows": question.get("table_rows", []),
+        "monthly_comment": response.get("monthly_comment"),
+        "year": response.get("year"),
+        "month": response.get("month")
+    }
+
+async def claim_ai_comment_batch(response: dict) -> List[dict]:
+    """Claim other pending responses to the same question and period as `response`"""
+    if AI_COMMENT_BATCH_SIZE <= 1:
+        return []
+    
+    candidates = await db.table_responses.find(
+        {
+            "question_id": response["question_id"],
+            "year": response.get("year"),
+            "month": response.get("month"),
+            "ai_comment_status": "pending",
+            "id": {"$ne": response["id"]}
+        },
+        {"_id": 0, "id": 1}
+    ).limit(AI_COMMENT_BATCH_SIZE - 1).to_list(AI_COMMENT_BATCH_SIZE - 1)
+    
+    claimed = []
+    for candidate in candidates:
+        # Another worker may have claimed it in the meantime
+        batch_response = await claim_ai_comment(candidate["id"])
+        if batch_response:
+            claimed.append(batch_response)
+    return claimed
+
+async def generate_single_ai_comment(response: dict, prompt: str):
+    # Retries with backoff happen inside the shared LLM client
+    try:
+        ai_comment = await request_ai_comment(prompt, response.get("ai_comment_origin") or "single")
+    except LLMUnavailable:
+        await defer_ai_comment(response)
+        return
+    except Exception as e:
+        logger.warning(f"AI comment for {response['id']} failed: {str(e)}")
+        await finish_ai_comment(response, None, str(e))
+        return
+    
+    await store_cached_ai_comment(prompt, ai_comment)
+    await finish_ai_comment(response, ai_comment)
+
+async def generate_batch_ai_comments(question: dict, responses: List[dict], prompts: Dict[str, str]) -> List[dict]:
+    """Comment on several responses with one LLM call; returns the responses the answer did not cover"""
+    keyed = {f"c{index}": response for index, response in enumerate(responses, 1)}
+    prompt = build_batch_ai_comment_prompt(
+        question_text=question["question_text"],
+        category=question.get("category", ""),
+        period=question.get("period", ""),
+        entries={key: ai_comment_data_args(response, question) for key, response in keyed.items()}
+    )
+    
+    try:
+        answer = await request_ai_comment(prompt, "batch")
+    except LLMUnavailable:
+        for response in responses:
+            await defer_ai_comment(response)
+        return []
+    except Exception as e:
+        logger.warning(f"Batch AI comment for {len(responses)} responses failed: {str(e)}")
+        for response in responses:
+            await finish_ai_comment(response, None, str(e))
+        return []
+    
+    comments = parse_batch_ai_comments(answer, list(keyed))
+    if len(comments) < len(keyed):
+        logger.info(f"Batch AI comment answered {len(comments)} of {len(keyed)} responses, falling back for the rest")
+    
+    remaining = []
+    for key, response in keyed.items():
+        if key not in comments:
+            remaining.append(response)
+            continue
+        # Cache under the single-response prompt so later re-saves hit it
+        await store_cached_ai_comment(prompts[response["id"]], comments[key])
+        await finish_ai_comment(response, comments[key])
+    return remaining
+
+async def process_ai_comment(response_id: str):
+    response = await claim_ai_comment(response_id)
+    if not response:
+        return
+    
+    question = await db.questions.find_one({"id": response["question_id"]}, {"_id": 0})
+    if not question:
+        await finish_ai_comment(response, None, "Soru bulunamadı")
+        return
+    
+    batch = []
+    for claimed in [response] + await claim_ai_comment_batch(response):
+        # Each claim counts as an attempt, so responses that keep crashing their worker give up too
+        if claimed["ai_comment_attempts"] > AI_COMMENT_MAX_ATTEMPTS:
+            await finish_ai_comment(claimed, None, "Maximum attempts exceeded")
+        else:
+            batch.append(claimed)
+    
+    prompts = {
+        claimed["id"]: build_ai_comment_prompt(
+            question_text=question["question_text"],
+            category=question.get("category", ""),
+            period=question.get("period", ""),
+            **ai_comment_data_args(claimed, question)
+        )
+        for claimed in batch
+    }
+    
+    uncached = []
+    for claimed in batch:
+        cached = await lookup_cached_ai_comment(prompts[claimed["id"]])
+        if cached is None:
+            uncached.append(claimed)
+        else:
+            await finish_ai_comment(claimed, cached)
+    
+    if len(uncached) > 1:
+        uncached = await generate_batch_ai_comments(question, uncached, prompts)
+    
+    await asyncio.gather(*(generate_single_ai_comment(claimed, prompts[claimed["id"]]) for claimed in uncached))
+
+async def ai_comment_worker():
+    while True:
+        response_id = await _ai_comment_queue.get()
+        _ai_comment_queued.discard(response_id)
+        try:
+            await process_ai_comment(response_id)
+        except Exception as e:
+            logger.error(f"AI comment worker error for {response_id}: {str(e)}")
+        finally:
+            _ai_comment_queue.task_done()
+
+async def ai_comment_sweeper():
+    """Re-enqueue responses left pending by a full queue, a restart or an expired lease"""
+    while True:
+        try:
+            now = datetime.now(timezone.utc).isoformat()
+            cursor = db.table_responses.find(
+                {"$or": [
+                    {"ai_comment_status": "pending"},
+                    {"ai_comment_status": "generating", "ai_comment_lease_until": {"$lte": now}}
+                ]},
+                {"_id": 0, "id": 1}
+            ).limit(AI_COMMENT_QUEUE_SIZE)
+            async for response in cursor:
+                enqueue_ai_comment(response["id"])
+        except Exception as e:
+            logger.error(f"AI comment sweep failed: {str(e)}")
+        
+        await asyncio.sleep(AI_COMMENT_SWEEP_SECONDS)
+
+@api_router.get("/ai-comments/cache/stats")
+async def get_ai_comment_cache_stats(current_user: User = Depends(get_current_user)):
+    """Get AI comment cache hit rate and size"""
+    stats = await db.ai_comment_cache_stats.find_one({"id": AI_COMMENT_CACHE_STATS_ID}, {"_id": 0}) or {}
+    entries = await db.ai_comment_cache.count_documents({"expires_at": {"$gt": datetime.now(timezone.utc)}})
+    hits = stats.get("hits", 0)
+    misses = stats.get("misses", 0)
+    lookups = hits + misses
+    
+    return {
+        "enabled": ai_comment_cache_enabled(),
+        "ttl_hours": AI_COMMENT_CACHE_TTL_HOURS,
+        "entries": entries,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / lookups * 100, 1) if lookups else 0.0
+    }
+
+@api_router.get("/ai-comments/metrics")
+async def get_ai_call_metrics(
+    hours: int = Query(24, ge=1, le=24 * 30),
+    current_user: User = Depends(get_current_user)
+):
+    """Get LLM call metrics: this process's counters and histograms plus a summary of the ai_calls log"""
+    since = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+    log_groups = await db.ai_calls.aggregate([
+        {"$match": {"created_at": {"$gte": since}}},
+        {"$group": {
+            "_id": {"site": "$site", "outcome": "$outcome"},
+            "logged_calls": {"$sum": 1},
+            "avg_latency_ms": {"$avg": "$latency_ms"},
+            "max_latency_ms": {"$max": "$latency_ms"},
+            "avg_prompt_chars": {"$avg": "$prompt_chars"},
+            "avg_response_chars": {"$avg": "$response_chars"}
+        }}
+    ]).to_list(None)
+    
+    client = get_llm_client()
+    return {
+        "provider": LLM_PROVIDER,
+        "process": client.metrics.snapshot(),
+        "client": client.stats(),
+        "log": {
+            "hours": hours,
+            "sample_rate": AI_CALL_LOG_SAMPLE_RATE,
+            "groups": [
+                {
+                    "site": group["_id"]["site"],
+                    "outcome": group["_id"]["outcome"],
+                    "logged_calls": group["logged_calls"],
+                    "avg_latency_ms": round(group["avg_latency_ms"], 1) if group["avg_latency_ms"] is not None else None,
+                    "max_latency_ms": group["max_latency_ms"],
+                    "avg_prompt_chars": round(group["avg_prompt_chars"] or 0),
+                    "avg_response_chars": round(group["avg_response_chars"] or 0)
+                }
+                for group in log_groups
+            ]
+        }
+    }
+
+@api_router.get("/ai-comments/queue")
+async def get_ai_comment_queue(current_user: User = Depends(get_current_user)):
+    """Get AI comment queue depth and response counts per generation status"""
+    status_groups = await db.table_responses.aggregate([
+        {"$match": {"ai_comment_status": {"$exists": True}}},
+        {"$group": {"_id": "$ai_comment_status", "count": {"$sum": 1}}}
+    ]).to_list(None)
+    
+    return {
+        "workers": AI_COMMENT_WORKERS,
+        "queued": _ai_comment_queue.qsize() if _ai_comment_queue else 0,
+        "statuses": {group["_id"]: group["count"] for group in status_groups},
+        "llm": get_llm_client().stats()
+    }
+
+@api_router.get("/table-responses/{response_id}/events")
+async def stream_table_response_events(
+    response_id: str,
+    request: Request,
+    current_user: User = Depends(get_stream_user)
+):
+    """Stream AI comment status changes for one response as server-sent events.
+    
+    The current state is sent first; the stream ends once the comment is completed or failed.
+    """
+    # Subscribe before reading so a completion between the read and the subscription is not lost
+    channels = [f"response:{response_id}"]
+    queue = subscribe_ai_comment_events(channels)
+    response = await db.table_responses.find_one({"id": response_id}, AI_COMMENT_EVENT_PROJECTION)
+    if not response:
+        unsubscribe_ai_comment_events(channels, queue)
+        raise HTTPException(status_code=404, detail="Cevap bulunamadı")
+    
+    async def events():
+        try:
+            current = response
+            yield format_sse_event(current)
+            while current.get("ai_comment_status") not in AI_COMMENT_TERMINAL_STATUSES:
+                try:
+                    latest = await asyncio.wait_for(queue.get(), AI_COMMENT_EVENTS_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    latest = await db.table_responses.find_one({"id": response_id}, AI_COMMENT_EVENT_PROJECTION)
+                    if latest is None:
+                        return
+                    if latest.get("ai_comment_status") == current.get("ai_comment_status"):
+                        # Comment line: keeps proxies from closing an idle connection
+                        yield ": keep-alive\n\n"
+                        continue
+                current = latest
+                yield format_sse_event(current)
+        finally:
+            unsubscribe_ai_comment_events(channels, queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/table-responses/question/{question_id}/events")
+async def stream_question_response_events(
+    question_id: str,
+    request: Request,
+    current_user: User = Depends(get_stream_user)
+):
+    """Stream AI comment status changes for every response to a question as server-sent events"""
+    question = await db.questions.find_one({"id": question_id}, {"_id": 0, "id": 1})
+    if not question:
+        raise HTTPException(status_code=404, detail="Soru bulunamadı")
+    
+    channels = [f"question:{question_id}"]
+    queue = subscribe_ai_comment_events(channels)
+    
+    async def in_flight_statuses(known: Dict[str, str]) -> List[dict]:
+        # Responses still waiting for a comment plus those that were waiting at the last read
+        return await db.table_responses.find(
+            {"question_id": question_id, "$or": [
+                {"ai_comment_status": {"$in": ["pending", "generating"]}},
+                {"id": {"$in": list(known)}}
+            ]},
+            AI_COMMENT_EVENT_PROJECTION
+        ).to_list(None)
+    
+    async def events():
+        try:
+            initial = await in_flight_statuses({})
+            known = {response["id"]: response["ai_comment_status"] for response in initial}
+            yield ": connected\n\n"
+            # A client connecting while comments are in flight gets their current state first
+            for response in initial:
+                yield format_sse_event(response)
+            while True:
+                try:
+                    changed = [await asyncio.wait_for(queue.get(), AI_COMMENT_EVENTS_POLL_SECONDS)]
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    changed = [
+                        response for response in await in_flight_statuses(known)
+                        if known.get(response["id"]) != response["ai_comment_status"]
+                    ]
+                    if not changed:
+                        yield ": keep-alive\n\n"
+                        continue
+    
+                for event in changed:
+                    if event.get("ai_comment_status") in AI_COMMENT_TERMINAL_STATUSES:
+                        known.pop(event["id"], None)
+                    else:
+                        known[event["id"]] = event.get("ai_comment_status")
+                    yield format_sse_event(event)
+        finally:
+            unsubscribe_ai_comment_events(channels, queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Table Response Management - Clean System
 @api_router.get("/table-responses")
 async def get_table_responses(current_user: User = Depends(get_current_user)):
@@ -2052,28 +4238,16 @@ async def create_table_response(response_data: TableResponseCreate, current_user
             "month": response_data.month
         })
         
-        # Generate AI comment
-        ai_comment = None
-        if response_data.table_data or response_data.monthly_comment:
-            ai_comment = await generate_ai_comment(
-                question_text=question["question_text"],
-                category=question["category"],
-                period=question["period"],
-                table_data=response_data.table_data,
-                table_rows=question.get("table_rows", []),
-                monthly_comment=response_data.monthly_comment,
-                year=response_data.year,
-                month=response_data.month
-            )
-        
         current_time = datetime.now(timezone.utc)
+        # The AI comment is generated in the background; the response is saved right away
+        ai_fields = await ai_comment_fields_for_save(question, response_data, "single")
         
         if existing_response:
             # Update existing response
             update_data = {
                 "table_data": response_data.table_data,
                 "monthly_comment": response_data.monthly_comment,
-                "ai_comment": ai_comment,
+                **ai_fields,
                 "updated_at": current_time.isoformat()
             }
             
@@ -2081,20 +4255,26 @@ async def create_table_response(response_data: TableResponseCreate, current_user
                 {"id": existing_response["id"]},
                 {"$set": update_data}
             )
+            await record_table_response_write(existing_response, ai_fields["ai_comment"], response_data.year, response_data.month)
+            if ai_fields["ai_comment_status"] == "pending":
+                enqueue_ai_comment(existing_response["id"])
             
-            return {"success": True, "message": "Cevap güncellendi", "action": "updated"}
+            return {"success": True, "message": "Cevap güncellendi", "action": "updated", "id": existing_response["id"], "ai_comment_status": ai_fields["ai_comment_status"], "ai_comment": ai_fields["ai_comment"]}
         
         else:
             # Create new response
             response_dict = response_data.dict()
             response_dict["id"] = str(uuid.uuid4())
-            response_dict["ai_comment"] = ai_comment
+            response_dict.update(ai_fields)
             response_dict["created_at"] = current_time.isoformat()
             response_dict["updated_at"] = current_time.isoformat()
             
             await db.table_responses.insert_one(response_dict)
+            await record_table_response_write(None, ai_fields["ai_comment"], response_data.year, response_data.month)
+            if ai_fields["ai_comment_status"] == "pending":
+                enqueue_ai_comment(response_dict["id"])
             
-            return {"success": True, "message": "Cevap kaydedildi", "action": "created"}
+            return {"success": True, "message": "Cevap kaydedildi", "action": "created", "id": response_dict["id"], "ai_comment_status": ai_fields["ai_comment_status"], "ai_comment": ai_fields["ai_comment"]}
         
     except HTTPException as e:
         raise e
@@ -2136,30 +4316,15 @@ async def create_public_table_response(response_data: TableResponseCreate):
         
         current_time = datetime.now(timezone.utc)
         
-        # Generate AI comment
-        ai_comment = None
-        if response_data.table_data or response_data.monthly_comment:
-            try:
-                ai_comment = await generate_ai_comment(
-                    question_text=question["question_text"],
-                    category=question.get("category", ""),
-                    period=question.get("period", ""),
-                    table_data=response_data.table_data or {},
-                    table_rows=question.get("table_rows", []),
-                    monthly_comment=response_data.monthly_comment or "",
-                    year=response_data.year,
-                    month=response_data.month
-                )
-            except Exception as e:
-                print(f"AI comment generation failed: {str(e)}")
-                ai_comment = "AI yorumu oluşturulamadı."
+        # The AI comment is generated in the background so the form submit returns immediately
+        ai_fields = await ai_comment_fields_for_save(question, response_data, "public")
         
         if existing_response:
             # Update existing response
             update_data = {
                 "table_data": response_data.table_data,
                 "monthly_comment": response_data.monthly_comment,
-                "ai_comment": ai_comment,
+                **ai_fields,
                 "updated_at": current_time.isoformat()
             }
             
@@ -2167,19 +4332,25 @@ async def create_public_table_response(response_data: TableResponseCreate):
                 {"_id": existing_response["_id"]},
                 {"$set": update_data}
             )
+            await record_table_response_write(existing_response, ai_fields["ai_comment"], response_data.year, response_data.month)
+            if ai_fields["ai_comment_status"] == "pending":
+                enqueue_ai_comment(existing_response["id"])
             
-            return {"success": True, "message": "Cevap güncellendi", "action": "updated"}
+            return {"success": True, "message": "Cevap güncellendi", "action": "updated", "id": existing_response["id"], "ai_comment_status": ai_fields["ai_comment_status"], "ai_comment": ai_fields["ai_comment"]}
         else:
             # Create new response
             response_dict = response_data.dict()
             response_dict["id"] = str(uuid.uuid4())
-            response_dict["ai_comment"] = ai_comment
+            response_dict.update(ai_fields)
             response_dict["created_at"] = current_time.isoformat()
             response_dict["updated_at"] = current_time.isoformat()
             
             await db.table_responses.insert_one(response_dict)
+            await record_table_response_write(None, ai_fields["ai_comment"], response_data.year, response_data.month)
+            if ai_fields["ai_comment_status"] == "pending":
+                enqueue_ai_comment(response_dict["id"])
             
-            return {"success": True, "message": "Cevap kaydedildi", "action": "created"}
+            return {"success": True, "message": "Cevap kaydedildi", "action": "created", "id": response_dict["id"], "ai_comment_status": ai_fields["ai_comment_status"], "ai_comment": ai_fields["ai_comment"]}
         
     except HTTPException as e:
         raise e
@@ -2216,43 +4387,37 @@ async def create_bulk_table_responses(responses_data: List[TableResponseCreate],
                 "month": response_data.month
             })
             
-            # Generate AI comment
-            ai_comment = None
-            if response_data.table_data or (response_data.monthly_comment and response_data.monthly_comment.strip()):
-                ai_comment = await generate_ai_comment(
-                    question_text=question["question_text"],
-                    category=question["category"],
-                    period=question["period"],
-                    table_data=response_data.table_data,
-                    table_rows=question.get("table_rows", []),
-                    monthly_comment=response_data.monthly_comment,
-                    year=response_data.year,
-                    month=response_data.month
-                )
-            
             current_time = datetime.now(timezone.utc)
+            ai_fields = await ai_comment_fields_for_save(question, response_data, "bulk")
             
             if existing_response:
                 update_data = {
                     "table_data": response_data.table_data,
                     "monthly_comment": response_data.monthly_comment,
-                    "ai_comment": ai_comment,
+                    **ai_fields,
                     "updated_at": current_time.isoformat()
                 }
                 await db.table_responses.update_one(
                     {"id": existing_response["id"]},
                     {"$set": update_data}
                 )
-                results.append({"id": existing_response["id"], "action": "updated"})
+                await record_table_response_write(existing_response, ai_fields["ai_comment"], response_data.year, response_data.month)
+                results.append({"id": existing_response["id"], "action": "updated", "ai_comment_status": ai_fields["ai_comment_status"], "ai_comment": ai_fields["ai_comment"]})
             else:
                 response_dict = response_data.dict()
                 response_dict["id"] = str(uuid.uuid4())
-                response_dict["ai_comment"] = ai_comment
+                response_dict.update(ai_fields)
                 response_dict["created_at"] = current_time.isoformat()
                 response_dict["updated_at"] = current_time.isoformat()
                 
                 await db.table_responses.insert_one(response_dict)
-                results.append({"id": response_dict["id"], "action": "created"})
+                await record_table_response_write(None, ai_fields["ai_comment"], response_data.year, response_data.month)
+                results.append({"id": response_dict["id"], "action": "created", "ai_comment_status": ai_fields["ai_comment_status"], "ai_comment": ai_fields["ai_comment"]})
+        
+        # Enqueue only after every row is saved so a worker can batch rows of the same question and period
+        for result in results:
+            if result["ai_comment_status"] == "pending":
+                enqueue_ai_comment(result["id"])
         
         return {
             "success": True,
@@ -2266,45 +4431,205 @@ async def create_bulk_table_responses(responses_data: List[TableResponseCreate],
             detail=f"Toplu cevap kaydetme hatası: {str(e)}"
         )
 
+MONTH_NAMES = ["Ocak", "Şubat", "Mart", "Nisan", "Mayıs", "Haziran",
+               "Temmuz", "Ağustos", "Eylül", "Ekim", "Kasım", "Aralık"]
+
 @api_router.get("/table-responses/summary/{question_id}")
-async def get_table_summary(question_id: str, current_user: User = Depends(get_current_user)):
-    """Get table response summary for a specific question"""
-    question = await db.questions.find_one({"id": question_id})
+async def get_table_summary(
+    question_id: str,
+    year: Optional[int] = Query(None, description="Only summarize this year"),
+    include: Optional[str] = Query(None, pattern="^responses$", description="Set to 'responses' to attach a page of response bodies"),
+    limit: int = Query(100, ge=1, le=1000),
+    skip: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user)
+):
+    """Get table response counts per (year, month) for a specific question"""
+    question = await db.questions.find_one({"id": question_id}, {"_id": 0})
     if not question:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Soru bulunamadı"
         )
     
-    responses = await db.table_responses.find({"question_id": question_id}).to_list(1000)
+    match = {"question_id": question_id}
+    if year is not None:
+        match["year"] = year
+    
+    counts = await db.table_responses.aggregate([
+        {"$match": match},
+        {"$group": {"_id": {"year": "$year", "month": "$month"}, "count": {"$sum": 1}}}
+    ]).to_list(None)
+    count_by_period = {(group["_id"]["year"], group["_id"]["month"]): group["count"] for group in counts}
+    
+    # Every summarized year lists all twelve months, empty ones included
+    years = sorted({period[0] for period in count_by_period} | ({year} if year is not None else set()))
+    summary_data = [
+        {
+            "year": summary_year,
+            "month": month_name,
+            "month_number": month_number,
+            "response_count": count_by_period.get((summary_year, month_number), 0)
+        }
+        for summary_year in years
+        for month_number, month_name in enumerate(MONTH_NAMES, 1)
+    ]
+    total_responses = sum(count_by_period.values())
+    
+    result = {
+        "question": question,
+        "summary_data": summary_data,
+        "total_responses": total_responses
+    }
     
-    # Group responses by month
-    monthly_data = {}
-    for month in range(1, 13):
-        month_responses = [r for r in responses if r["month"] == month]
-        monthly_data[month] = {
-            "count": len(month_responses),
-            "responses": month_responses
+    if include == "responses":
+        page = await db.table_responses.find(match, {"_id": 0}).sort(
+            [("year", 1), ("month", 1), ("created_at", 1)]
+        ).skip(skip).limit(limit).to_list(limit)
+        
+        buckets = {(entry["year"], entry["month_number"]): entry for entry in summary_data}
+        for entry in summary_data:
+            entry["responses"] = []
+        for response in page:
+            bucket = buckets.get((response.get("year"), response.get("month")))
+            if bucket is not None:
+                bucket["responses"].append(response)
+        
+        result["responses_page"] = {
+            "skip": skip,
+            "limit": limit,
+            "returned": len(page),
+            "has_more": skip + len(page) < total_responses
         }
     
-    months = ["Ocak", "Şubat", "Mart", "Nisan", "Mayıs", "Haziran", 
-              "Temmuz", "Ağustos", "Eylül", "Ekim", "Kasım", "Aralık"]
+    return result
+
+# Chart Data
+# Period fields that identify one point on a question's time axis, by question period
+CHART_PERIOD_FIELDS = {
+    "Günlük": ["year", "month", "day"],
+    "Haftalık": ["year", "week"],
+    "Çeyreklik": ["year", "quarter"],
+    "Altı Aylık": ["year", "half"],
+    "Yıllık": ["year"]
+}
+DEFAULT_CHART_PERIOD_FIELDS = ["year", "month"]
+
+def chart_period_label(period_fields: List[str], key: dict) -> str:
+    parts = {field: key.get(field) or 0 for field in period_fields}
+    if "day" in parts:
+        return f"{parts['year']}-{parts['month']:02d}-{parts['day']:02d}"
+    if "week" in parts:
+        return f"{parts['year']}-W{parts['week']:02d}"
+    if "quarter" in parts:
+        return f"{parts['year']}-Q{parts['quarter']}"
+    if "half" in parts:
+        return f"{parts['year']}-H{parts['half']}"
+    if "month" in parts:
+        return f"{parts['year']}-{parts['month']:02d}"
+    return str(parts["year"])
+
+def lttb_indices(series_matrix: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets over all rows at once.
+
+    Rows share one time axis, so every bucket keeps the point whose triangle areas,
+    summed over the min-max normalized rows, are largest.
+    """
+    total = series_matrix.shape[1]
+    if threshold >= total or threshold < 3:
+        return np.arange(total)
+    
+    low = np.nanmin(series_matrix, axis=1, keepdims=True)
+    span = np.nanmax(series_matrix, axis=1, keepdims=True) - low
+    normalized = np.nan_to_num((series_matrix - low) / np.where(span > 0, span, 1))
+    x = np.arange(total, dtype=float)
+    
+    every = (total - 2) / (threshold - 2)
+    selected = [0]
+    anchor = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, total)
+        
+        average_x = x[end:next_end].mean()
+        average_y = normalized[:, end:next_end].mean(axis=1, keepdims=True)
+        anchor_y = normalized[:, anchor:anchor + 1]
+        areas = np.abs(
+            (x[anchor] - average_x) * (normalized[:, start:end] - anchor_y)
+            - (x[anchor] - x[start:end]) * (average_y - anchor_y)
+        ).sum(axis=0)
+        
+        anchor = start + int(np.argmax(areas))
+        selected.append(anchor)
     
-    summary_data = []
-    for i, month_name in enumerate(months, 1):
-        summary_data.append({
-            "month": month_name,
-            "month_number": i,
-            "response_count": monthly_data[i]["count"],
-            "responses": monthly_data[i]["responses"]
-        })
+    selected.append(total - 1)
+    return np.array(selected)
+
+@api_router.get("/monthly-responses/chart-data/{question_id}")
+async def get_question_chart_data(
+    question_id: str,
+    points: Optional[int] = Query(None, ge=3, le=5000, description="Downsample each series to this many points with LTTB"),
+    current_user: User = Depends(get_current_user)
+):
+    """Get per-row chart series for a question in columnar form, averaged per period"""
+    question = await db.questions.find_one({"id": question_id}, {"_id": 0})
+    if not question:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Soru bulunamadı"
+        )
     
-    question.pop('_id', None)
+    period_fields = CHART_PERIOD_FIELDS.get(question.get("period"), DEFAULT_CHART_PERIOD_FIELDS)
+    
+    # Group the raw cells per row and period on the server, then average them with parse_number so
+    # Turkish-formatted values like "1.234,5" count; non-numeric values are ignored
+    groups = await db.table_responses.aggregate([
+        {"$match": {"question_id": question_id}},
+        {"$project": {**{field: 1 for field in period_fields}, "cells": {"$objectToArray": "$table_data"}}},
+        {"$unwind": "$cells"},
+        {"$group": {
+            "_id": {**{field: f"${field}" for field in period_fields}, "row_id": "$cells.k"},
+            "values": {"$push": "$cells.v"}
+        }}
+    ]).to_list(None)
+    
+    table_rows = sorted(question.get("table_rows", []), key=lambda row: row.get("order", 0))
+    row_index = {row["id"]: index for index, row in enumerate(table_rows)}
+    
+    period_keys = sorted(
+        {tuple(group["_id"].get(field) or 0 for field in period_fields) for group in groups}
+    )
+    period_index = {key: index for index, key in enumerate(period_keys)}
+    
+    series_matrix = np.full((len(table_rows), len(period_keys)), np.nan)
+    for group in groups:
+        row = row_index.get(group["_id"].get("row_id"))
+        values = [value for value in map(parse_number, group["values"]) if value is not None]
+        if row is None or not values:
+            continue
+        key = tuple(group["_id"].get(field) or 0 for field in period_fields)
+        series_matrix[row, period_index[key]] = sum(values) / len(values)
+    
+    selected = lttb_indices(series_matrix, points) if points and table_rows else np.arange(len(period_keys))
+    series_matrix = series_matrix[:, selected]
     
     return {
-        "question": question,
-        "summary_data": summary_data,
-        "total_responses": len(responses)
+        "question_id": question_id,
+        "chart_type": question.get("chart_type"),
+        "period": question.get("period"),
+        "periods": [chart_period_label(period_fields, dict(zip(period_fields, period_keys[index]))) for index in selected],
+        "series": [
+            {
+                "row_id": row["id"],
+                "name": row["name"],
+                "unit": row.get("unit"),
+                "values": [None if np.isnan(value) else round(float(value), 4) for value in series_matrix[index]]
+            }
+            for index, row in enumerate(table_rows)
+        ],
+        "total_points": len(period_keys),
+        "returned_points": len(selected),
+        "downsampled": len(selected) < len(period_keys)
     }
 
 # Include the router in the main app
@@ -2584,6 +4909,101 @@ async def export_questions_pdf(current_user: dict = Depends(get_current_user)):
         logger.error(f"PDF export error: {str(e)}")
         raise HTTPException(status_code=500, detail="PDF export failed")
 
+@app.on_event("startup")
+async def ensure_indexes():
+    await db.scheduler_locks.create_index("id", unique=True)
+    await db.anomalies.create_index([("question_id", 1), ("row_id", 1), ("period", 1)], unique=True)
+    await db.anomalies.create_index([("status", 1), ("detected_at", -1)])
+    await db.anomaly_scan_state.create_index("question_id", unique=True)
+    await db.question_analytics.create_index("question_id", unique=True)
+    await db.table_responses.create_index([("question_id", 1), ("year", 1), ("month", 1)])
+    await db.table_responses.create_index("ai_comment_status")
+    await db.ai_comment_cache.create_index("id", unique=True)
+    await db.ai_comment_cache.create_index("expires_at", expireAfterSeconds=0)
+    await db.ai_calls.create_index("expires_at", expireAfterSeconds=0)
+    await db.ai_calls.create_index("created_at")
+    await db.background_jobs.create_index("id", unique=True)
+    await db.background_jobs.create_index([("status", 1), ("heartbeat_at", 1)])
+    await db.email_outbox.create_index("id", unique=True)
+    await db.email_outbox.create_index([("status", 1), ("next_attempt_at", 1)])
+    await db.email_quota.create_index("id", unique=True)
+    # Every log filter ends in (created_at, id) so the cursor pages are read straight off an index
+    await db.email_events.create_index([("created_at", -1), ("id", -1)])
+    await db.email_events.create_index([("assignment_ids", 1), ("created_at", -1), ("id", -1)])
+    await db.email_events.create_index([("employee_id", 1), ("created_at", -1), ("id", -1)])
+    await db.email_events.create_index([("type", 1), ("created_at", -1), ("id", -1)])
+    await db.email_events.create_index([("kind", 1), ("created_at", -1), ("id", -1)])
+    await db.question_assignments.create_index([("response_received", 1), ("assigned_at", 1)])
+    await db.question_assignments.create_index("last_reminder_sent")
+    await db.question_assignments.create_index("reminder_queued_at")
+    await db.questions.create_index("id")
+    await db.employees.create_index("id")
+
+@app.on_event("startup")
+async def expire_background_jobs_on_startup():
+    expired = await expire_orphaned_background_jobs()
+    if expired:
+        logger.warning(f"Marked {expired} orphaned background jobs as failed")
+
+@app.on_event("startup")
+async def ensure_stats_counters():
+    await get_stats_counters()
+
+_scheduler_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_scheduler():
+    global _scheduler_task
+    if not SCHEDULER_ENABLED:
+        return
+    
+    await db.scheduler_locks.create_index("id", unique=True)
+    _scheduler_task = asyncio.create_task(scheduler_loop())
+
+@app.on_event("startup")
+async def start_llm_client():
+    get_llm_client()
+
+@app.on_event("startup")
+async def start_ai_comment_workers():
+    global _ai_comment_queue
+    if AI_COMMENT_WORKERS <= 0:
+        return
+    
+    _ai_comment_queue = asyncio.Queue(maxsize=AI_COMMENT_QUEUE_SIZE)
+    _ai_comment_tasks.extend(asyncio.create_task(ai_comment_worker()) for _ in range(AI_COMMENT_WORKERS))
+    _ai_comment_tasks.append(asyncio.create_task(ai_comment_sweeper()))
+
+@app.on_event("startup")
+async def start_email_outbox_workers():
+    global _email_outbox_wakeup
+    if EMAIL_OUTBOX_WORKERS <= 0:
+        return
+    
+    _email_outbox_wakeup = asyncio.Event()
+    _email_outbox_tasks.append(asyncio.create_task(email_outbox_leader()))
+    _email_outbox_tasks.extend(asyncio.create_task(email_outbox_worker()) for _ in range(EMAIL_OUTBOX_WORKERS))
+
+@app.on_event("shutdown")
+async def stop_ai_comment_workers():
+    for task in _ai_comment_tasks:
+        task.cancel()
+
+@app.on_event("shutdown")
+async def stop_email_outbox_workers():
+    for task in _email_outbox_tasks:
+        task.cancel()
+    if _email_outbox_leader:
+        # Lets a standby process take over without waiting for the lease to run out
+        await release_email_outbox_lease()
+    if _smtp_pool:
+        await _smtp_pool.close()
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    if _scheduler_task:
+        _scheduler_task.cancel()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
\ No newline at end of file
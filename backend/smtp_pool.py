@@ -0,0 +1,135 @@
+"""Pool of authenticated SMTP sessions reused across messages.
+
+Opening an SMTP session costs a TCP connect, the STARTTLS handshake and
+AUTH. SMTPPool keeps up to `size` sessions open and sends many messages
+over each, so a batch pays that cost once per connection instead of once
+per message. A session is replaced after `max_messages` messages or
+`idle_seconds` without use, and a send that fails because the server
+dropped the connection is retried once on a fresh session.
+"""
+import asyncio
+import time
+from email.message import EmailMessage
+from typing import List, Optional
+
+import aiosmtplib
+
+
+def is_bounce(error: BaseException) -> bool:
+    """True when every recipient was rejected with a permanent (5xx) reply, so a retry cannot succeed"""
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return bool(error.recipients) and all(refused.code >= 500 for refused in error.recipients)
+    return isinstance(error, aiosmtplib.SMTPRecipientRefused) and error.code >= 500
+
+
+class _Session:
+    def __init__(self, smtp: aiosmtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
+    def __init__(self, hostname: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                 use_tls: bool = False, start_tls: bool = True, validate_certs: bool = True,
+                 timeout: float = 60.0, size: int = 3, max_messages: int = 100, idle_seconds: float = 60.0):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.start_tls = start_tls
+        self.validate_certs = validate_certs
+        self.timeout = timeout
+        self.size = size
+        self.max_messages = max_messages
+        self.idle_seconds = idle_seconds
+        self._idle: List[_Session] = []
+        self._slots = asyncio.Semaphore(size)
+        self.in_use = 0
+        self.connects = 0
+        self.reconnects = 0
+        self.messages = 0
+
+    async def _connect(self) -> _Session:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            validate_certs=self.validate_certs,
+            timeout=self.timeout
+        )
+        await smtp.connect()
+        try:
+            if self.username:
+                await smtp.login(self.username, self.password)
+        except BaseException:
+            smtp.close()
+            raise
+        self.connects += 1
+        return _Session(smtp)
+
+    def _usable(self, session: _Session) -> bool:
+        return (
+            session.smtp.is_connected
+            and session.sent < self.max_messages
+            and time.monotonic() - session.last_used < self.idle_seconds
+        )
+
+    async def _quit(self, session: _Session):
+        try:
+            await session.smtp.quit()
+        except Exception:
+            session.smtp.close()
+
+    async def _acquire(self) -> _Session:
+        while self._idle:
+            session = self._idle.pop()
+            if self._usable(session):
+                return session
+            await self._quit(session)
+        return await self._connect()
+
+    async def send(self, message: EmailMessage):
+        """Send one message over a pooled session; raises on failure"""
+        async with self._slots:
+            self.in_use += 1
+            session = None
+            try:
+                session = await self._acquire()
+                try:
+                    await session.smtp.send_message(message)
+                except aiosmtplib.SMTPServerDisconnected:
+                    # The server dropped a session we believed open; retry once on a new one
+                    session.smtp.close()
+                    self.reconnects += 1
+                    session = await self._connect()
+                    await session.smtp.send_message(message)
+            except BaseException:
+                # A session in an unknown protocol state is never reused
+                if session is not None:
+                    session.smtp.close()
+                raise
+            finally:
+                self.in_use -= 1
+
+            session.sent += 1
+            session.last_used = time.monotonic()
+            self.messages += 1
+            self._idle.append(session)
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(self._quit(session) for session in idle))
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle_connections": len(self._idle),
+            "in_use": self.in_use,
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "messages": self.messages,
+            "messages_per_connection": round(self.messages / self.connects, 1) if self.connects else None
+        }
@@ -79,6 +79,32 @@ class QuestionBankAPITester:
             self.log_test(name, False, error_msg)
             return False, {}
 
+    def wait_for_job(self, job_id, timeout=30):
+        """Poll a background job until it completes or fails"""
+        import time
+        if not job_id:
+            return None
+        
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            response = requests.get(
+                f"{self.api_url}/automation/jobs/{job_id}",
+                headers={'Authorization': f'Bearer {self.token}'},
+                timeout=10
+            )
+            if response.status_code != 200:
+                self.log_test("Background Job Polling", False, f"Status {response.status_code}")
+                return None
+            
+            job = response.json()
+            if job.get('status') in ('completed', 'failed'):
+                self.log_test("Background Job Completion", job['status'] == 'completed', job.get('error') or job['status'])
+                return job
+            time.sleep(1)
+        
+        self.log_test("Background Job Completion", False, f"Job {job_id} did not finish in {timeout}s")
+        return None
+
     def test_auth_and_setup(self):
         """Test authentication and setup"""
         print("\n" + "="*50)
@@ -264,7 +290,25 @@ class QuestionBankAPITester:
             422,  # Expecting validation error
             data=invalid_chart_data
         )
-        
+
+        # Test invalid AI comment mode
+        invalid_ai_mode_data = {
+            "category": "Test",
+            "question_text": "Test question with invalid AI mode",
+            "importance_reason": "Testing validation",
+            "expected_action": "Should fail validation",
+            "period": "Haftalık",
+            "ai_mode": "remote"  # Only local, llm and hybrid are allowed
+        }
+
+        success, response = self.run_test(
+            "Invalid AI Mode Validation",
+            "POST",
+            "questions",
+            422,  # Expecting validation error
+            data=invalid_ai_mode_data
+        )
+
         # Test invalid date format
         invalid_date_data = {
             "category": "Test",
@@ -494,7 +538,25 @@ class QuestionBankAPITester:
             else:
                 print("   ⚠️  Some metrics changed between requests (may be expected for dynamic data)")
                 self.log_test("Dashboard Stats Consistency", True, "Dynamic data behavior observed")
-        
+
+        # Test 7: Materialized counters reconcile
+        print("\n   🔍 Testing counters reconcile...")
+
+        reconcile_success, reconcile_response = self.run_test(
+            "Dashboard Stats Counters Reconcile",
+            "POST",
+            "dashboard/stats/reconcile",
+            200
+        )
+
+        if reconcile_success:
+            counters = reconcile_response.get('counters', {})
+            if responses and counters.get('employees') == responses[0].get('active_users'):
+                print("   ✅ Reconciled counters match dashboard stats")
+                self.log_test("Dashboard Stats Counters Match", True, f"Employees: {counters.get('employees')}")
+            else:
+                self.log_test("Dashboard Stats Counters Match", False, f"Counters: {counters}")
+
         # Summary
         print(f"\n📋 DASHBOARD STATS TEST SUMMARY:")
         print(f"   - Endpoint functionality: {'✅ WORKING' if success else '❌ FAILED'}")
@@ -1469,11 +1531,98 @@ class QuestionBankAPITester:
                             print(f"   📊 Performance Score: {insights.get('performance_score', 'N/A')}")
                             print(f"   📊 Confidence Level: {insights.get('confidence_level', 'N/A')}")
                             print(f"   📊 Recommendations: {len(insights.get('recommendations', []))}")
+
+                            # Seasonal forecasts carry the selected model and multi-step intervals
+                            for prediction in insights.get('predictions', []):
+                                forecast_ok = 'model' in prediction and all(
+                                    step['interval_95']['min'] <= step['value'] <= step['interval_95']['max']
+                                    for step in prediction.get('forecast', [])
+                                )
+                                self.log_test(f"Analytics Forecast - {prediction.get('metric')}", forecast_ok, prediction.get('model', 'missing model'))
                         else:
                             self.log_test(f"Analytics Insights Structure - Question {i+1}", False, f"Missing insight fields: {missing_insight_fields}")
                     else:
                         self.log_test(f"Analytics Insights Response - Question {i+1}", False, f"Missing fields: {missing_fields}")
         
+        # Batch anomaly scan
+        success, response = self.run_test(
+            "Anomaly Scan - Enqueue",
+            "POST",
+            "analytics/anomalies/scan",
+            202
+        )
+
+        if success:
+            job = self.wait_for_job(response.get('job_id'))
+            if job and job.get('status') == 'completed':
+                print(f"   🔍 Questions scanned: {job['result'].get('questions_scanned', 0)}")
+
+            success, response = self.run_test(
+                "Anomaly Scan - List New Anomalies",
+                "GET",
+                "analytics/anomalies?status=new",
+                200
+            )
+            if success:
+                print(f"   🔍 New anomalies: {response.get('total', 0)}")
+
+        # Precomputed dashboard insights
+        success, response = self.run_test(
+            "Dashboard Insights - Enqueue Refresh",
+            "POST",
+            "analytics/dashboard/insights/refresh",
+            202
+        )
+
+        if success:
+            job = self.wait_for_job(response.get('job_id'))
+            if job and job.get('status') == 'completed':
+                print(f"   💡 Insights generated: {job['result'].get('generated', 0)} of {job['result'].get('stale', 0)} stale")
+
+            success, response = self.run_test(
+                "Analytics Dashboard - Stored Insights",
+                "GET",
+                "analytics/dashboard",
+                200
+            )
+            if success:
+                stored = [question for question in response.get('questions', []) if question.get('ai_insights_generated_at')]
+                print(f"   💡 Questions with stored insights: {len(stored)} of {response.get('total_questions', 0)}")
+
+        # Downsampled chart data
+        if question_ids:
+            success, response = self.run_test(
+                "Chart Data - Downsampled",
+                "GET",
+                f"monthly-responses/chart-data/{question_ids[0]}?points=10",
+                200
+            )
+            if success:
+                columnar_ok = response.get('returned_points', 0) <= 10 and all(
+                    len(row['values']) == len(response.get('periods', [])) for row in response.get('series', [])
+                )
+                self.log_test("Chart Data - Columnar Shape", columnar_ok, f"{response.get('returned_points')} of {response.get('total_points')} points")
+
+            # Year-partitioned summary: counts only unless responses are requested
+            success, response = self.run_test(
+                "Table Summary - Counts",
+                "GET",
+                f"table-responses/summary/{question_ids[0]}",
+                200
+            )
+            if success:
+                counts_only = all('responses' not in entry and 'year' in entry for entry in response.get('summary_data', []))
+                self.log_test("Table Summary - Counts Only", counts_only, f"{response.get('total_responses', 0)} responses")
+
+            success, response = self.run_test(
+                "Table Summary - Response Page",
+                "GET",
+                f"table-responses/summary/{question_ids[0]}?include=responses&limit=5",
+                200
+            )
+            if success:
+                print(f"   📄 Responses page: {response.get('responses_page')}")
+
         # Test 2: Comparative Analytics
         if len(question_ids) >= 2:
             question_ids_str = ','.join(question_ids[:3])  # Test with up to 3 questions
@@ -1572,6 +1721,21 @@ class QuestionBankAPITester:
             else:
                 self.log_test("Email Reminders Structure", False, f"Missing fields: {missing_fields}")
         
+        # Test 1b: Dry run returns the reminder plan without queueing emails
+        success, response = self.run_test(
+            "Email Reminders Dry Run",
+            "POST",
+            "automation/email-reminders",
+            200,
+            data={**reminder_config, "dry_run": True}
+        )
+        
+        if success:
+            if response.get('dry_run') is True and len(response.get('reminders_sent', [])) == response.get('reminder_count'):
+                print(f"   ✅ Dry run planned {response.get('reminder_count', 0)} reminders")
+            else:
+                self.log_test("Email Reminders Dry Run Plan", False, "Dry run response does not match its plan")
+        
         # Test 2: Generate Automated Reports - Monthly
         monthly_report_config = {
             "type": "monthly",
@@ -1584,20 +1748,21 @@ class QuestionBankAPITester:
             "Generate Automated Reports - Monthly",
             "POST",
             "automation/generate-reports",
-            200,
+            202,
             data=monthly_report_config
         )
         
         if success:
-            # Verify response structure
-            required_fields = ['success', 'report_id', 'report_data', 'generated_at']
+            # Verify job response structure
+            required_fields = ['success', 'job_id', 'status', 'status_url']
             missing_fields = [field for field in required_fields if field not in response]
             
             if not missing_fields:
-                print(f"   ✅ Monthly report generation structure complete")
-                print(f"   📊 Report ID: {response.get('report_id', 'N/A')}")
+                print(f"   ✅ Monthly report job enqueued")
+                job = self.wait_for_job(response['job_id'])
+                report_data = (job.get('result') or {}).get('report_data', {}) if job else {}
+                print(f"   📊 Report ID: {(job.get('result') or {}).get('report_id', 'N/A') if job else 'N/A'}")
                 
-                report_data = response.get('report_data', {})
                 if report_data:
                     print(f"   📊 Report period: {report_data.get('period', 'Unknown')}")
                     print(f"   📊 Total responses: {report_data.get('total_responses', 0)}")
@@ -1617,13 +1782,14 @@ class QuestionBankAPITester:
             "Generate Automated Reports - Weekly",
             "POST",
             "automation/generate-reports",
-            200,
+            202,
             data=weekly_report_config
         )
         
         if success:
             print(f"   ✅ Weekly report generation working")
-            report_data = response.get('report_data', {})
+            job = self.wait_for_job(response.get('job_id'))
+            report_data = (job.get('result') or {}).get('report_data', {}) if job else {}
             if report_data:
                 print(f"   📊 Weekly report period: {report_data.get('period', 'Unknown')}")
         
@@ -1638,7 +1804,7 @@ class QuestionBankAPITester:
             "Generate Automated Reports - Quarterly",
             "POST",
             "automation/generate-reports",
-            200,
+            202,
             data=quarterly_report_config
         )
         
@@ -1707,8 +1873,56 @@ class QuestionBankAPITester:
             
             if success:
                 print(f"   ✅ Table responses submission working")
-                if 'ai_comment' in response:
-                    print(f"   ✅ AI comment generation still working in legacy endpoint")
+                # AI comments are generated in the background after the response is saved
+                self.log_test("Table Response - AI Comment Queued", response.get('ai_comment_status') == 'pending', response.get('ai_comment_status', 'missing status'))
+
+                # The events stream sends the current AI comment state first; the URL carries a stream-only token
+                stream_success, stream_token = self.run_test("Stream Token", "POST", "auth/stream-token", 200)
+                if response.get('id') and stream_success:
+                    try:
+                        with requests.get(
+                            f"{self.api_url}/table-responses/{response['id']}/events",
+                            params={'token': stream_token.get('token')},
+                            stream=True,
+                            timeout=10
+                        ) as stream:
+                            first_line = next(stream.iter_lines(decode_unicode=True), '')
+                            self.log_test(
+                                "AI Comment Events Stream",
+                                stream.status_code == 200 and first_line == 'event: ai_comment',
+                                f"Status {stream.status_code}, first line: {first_line}"
+                            )
+                    except Exception as e:
+                        self.log_test("AI Comment Events Stream", False, str(e))
+
+                success, response = self.run_test(
+                    "AI Comment Queue Status",
+                    "GET",
+                    "ai-comments/queue",
+                    200
+                )
+                if success:
+                    print(f"   🤖 AI comment statuses: {response.get('statuses')}")
+                    print(f"   🤖 LLM circuit breaker: {response.get('llm', {}).get('state')}")
+                
+                success, response = self.run_test(
+                    "AI Comment Cache Stats",
+                    "GET",
+                    "ai-comments/cache/stats",
+                    200
+                )
+                if success:
+                    print(f"   🤖 AI comment cache hit rate: {response.get('hit_rate')}% ({response.get('entries')} entries)")
+                
+                success, response = self.run_test(
+                    "AI Call Metrics",
+                    "GET",
+                    "ai-comments/metrics?hours=24",
+                    200
+                )
+                if success:
+                    for site, site_metrics in response.get('process', {}).get('sites', {}).items():
+                        print(f"   🤖 LLM calls [{site}]: {site_metrics['outcomes']} avg {site_metrics['latency_seconds']['avg']}s")
 
     def test_error_handling_and_edge_cases(self):
         """Test error handling and edge cases"""
@@ -2592,19 +2806,40 @@ class QuestionBankAPITester:
         )
         
         if success:
-            # Check response for email success indicators
-            email_successes = response.get('email_successes', 0)
+            # Emails are queued in the outbox and delivered by a background worker
+            emails_queued = response.get('emails_queued', 0)
             email_failures = response.get('email_failures', [])
             
-            print(f"   📧 Email successes: {email_successes}")
+            print(f"   📧 Emails queued: {emails_queued}")
             print(f"   📧 Email failures: {len(email_failures)}")
             
-            if email_successes > 0:
-                print("   ✅ Gmail SMTP integration working - emails sent successfully")
-                self.log_test("Gmail SMTP Email Sending", True, f"Successfully sent {email_successes} emails")
+            if emails_queued > 0:
+                print("   ✅ Emails queued for delivery")
+                self.log_test("Gmail SMTP Email Queued", True, f"Queued {emails_queued} emails")
             else:
-                print("   ⚠️  No emails sent successfully")
-                self.log_test("Gmail SMTP Email Sending", False, f"No successful emails, failures: {email_failures}")
+                print("   ⚠️  No emails queued")
+                self.log_test("Gmail SMTP Email Queued", False, f"No queued emails, failures: {email_failures}")
+            
+            success, response = self.run_test(
+                "Email Outbox Stats",
+                "GET",
+                "email-outbox/stats",
+                200
+            )
+            if success:
+                print(f"   📧 Outbox statuses: {response.get('statuses')}")
+            
+            success, response = self.run_test(
+                "Email Delivery Log",
+                "GET",
+                "email-logs?type=queued&limit=5",
+                200
+            )
+            if success:
+                if 'logs' in response and 'total' in response and all(log.get('type') == 'queued' for log in response['logs']):
+                    print(f"   📧 Queued email events: {response['total']}")
+                else:
+                    self.log_test("Email Delivery Log Structure", False, "Missing logs/total or unfiltered events")
             
             # Check if assignment was created
             assignments_created = response.get('assignments_created', 0)
@@ -2641,14 +2876,30 @@ class QuestionBankAPITester:
             )
             
             if success:
-                email_successes = response.get('email_successes', 0)
-                print(f"   📧 Bulk email test - successes: {email_successes}")
+                emails_queued = response.get('emails_queued', 0)
+                print(f"   📧 Bulk email test - queued: {emails_queued}")
                 
-                if email_successes >= 2:
+                if emails_queued >= 2:
                     print("   ✅ Bulk email functionality working")
-                    self.log_test("Gmail SMTP Bulk Email", True, f"Successfully sent {email_successes} bulk emails")
+                    self.log_test("Gmail SMTP Bulk Email", True, f"Queued {emails_queued} bulk emails")
                 else:
-                    self.log_test("Gmail SMTP Bulk Email", False, f"Expected 2+ emails, got {email_successes}")
+                    self.log_test("Gmail SMTP Bulk Email", False, f"Expected 2+ emails, got {emails_queued}")
+            
+            # Digest mode sends one email per employee listing all of their questions
+            success, response = self.run_test(
+                "Digest Question Share",
+                "POST",
+                "questions-share",
+                200,
+                data={**bulk_share_data, "digest": True}
+            )
+            
+            if success:
+                emails_queued = response.get('emails_queued', 0)
+                if emails_queued == 1 and response.get('assignments_created') == 2:
+                    print("   ✅ Digest mode queued one email for two questions")
+                else:
+                    self.log_test("Digest Question Share Count", False, f"Expected 1 email for 2 assignments, got {emails_queued}")
 
     def test_export_endpoints(self):
         """Test all PDF/Excel export endpoints"""
@@ -2787,16 +3038,18 @@ class QuestionBankAPITester:
             "Generate Automated Reports",
             "POST",
             "automation/generate-reports",
-            200,
+            202,
             data=report_config
         )
         
         if success:
-            report_id = response.get('report_id')
+            job = self.wait_for_job(response.get('job_id'))
+            result = (job.get('result') or {}) if job else {}
+            report_id = result.get('report_id')
             print(f"   📊 Generated report ID: {report_id}")
             
-            if 'report_data' in response:
-                report_data = response['report_data']
+            if 'report_data' in result:
+                report_data = result['report_data']
                 print(f"   📊 Report period: {report_data.get('period', 'Unknown')}")
                 print(f"   📊 Total responses: {report_data.get('total_responses', 0)}")
                 print("   ✅ Automated report generation working")
@@ -2817,7 +3070,7 @@ class QuestionBankAPITester:
                 f"Generate {report_type.title()} Report",
                 "POST",
                 "automation/generate-reports",
-                200,
+                202,
                 data=config
             )
             
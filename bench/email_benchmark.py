@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Email pipeline throughput benchmark against a local SMTP sink.
+
+Starts smtp_sink.SMTPSink on localhost, points the app's mail settings
+at it and runs the share flow (optionally in digest mode) and the reminder flow
+against a scratch MongoDB database. Reports messages/second, p50/p99 per message
+and retry behaviour for each flow, then drops the database.
+
+    pip install -r bench/requirements.txt
+    MONGO_URL=mongodb://localhost:27017 python bench/email_benchmark.py --employees 200 --questions 5 --failure-rate 0.05
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from smtp_sink import SMTPSink, LATENCY_DISTRIBUTIONS
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark email outbox delivery against a local SMTP sink")
+    parser.add_argument("--employees", type=int, default=100)
+    parser.add_argument("--questions", type=int, default=5, help="questions shared with every employee")
+    parser.add_argument("--digest", action="store_true", help="share in digest mode, one email per employee")
+    parser.add_argument("--skip-reminders", action="store_true")
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of messages answered 451")
+    parser.add_argument("--bounce-rate", type=float, default=0.0, help="share of recipients refused with 550")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--pool-size", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None, help="outbox workers, defaults to the pool size")
+    parser.add_argument("--rate", type=float, default=1000.0, help="EMAIL_RATE_PER_SECOND")
+    parser.add_argument("--burst", type=int, default=100)
+    parser.add_argument("--max-attempts", type=int, default=5)
+    parser.add_argument("--retry-base-seconds", type=float, default=0.2)
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds to wait for a flow to drain")
+    parser.add_argument("--keep-db", action="store_true", help="keep the scratch database for inspection")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args, sink: SMTPSink):
+    """Mail and outbox settings read by server.py at import"""
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.update({
+        "DB_NAME": f"email_benchmark_{uuid.uuid4().hex[:8]}",
+        "MAIL_SERVER": sink.hostname,
+        "MAIL_PORT": str(sink.port),
+        "MAIL_STARTTLS": "false",
+        "MAIL_SSL_TLS": "false",
+        "MAIL_USE_CREDENTIALS": "false",
+        "MAIL_USERNAME": "benchmark",
+        "MAIL_PASSWORD": "benchmark",
+        "MAIL_FROM": "benchmark@example.com",
+        "MAIL_FROM_NAME": "Email Benchmark",
+        "SMTP_POOL_SIZE": str(args.pool_size),
+        "EMAIL_OUTBOX_WORKERS": str(args.workers or args.pool_size),
+        "EMAIL_RATE_PER_SECOND": str(args.rate),
+        "EMAIL_BURST": str(args.burst),
+        "EMAIL_DAILY_QUOTA": "0",
+        "EMAIL_MAX_ATTEMPTS": str(args.max_attempts),
+        "EMAIL_RETRY_BASE_SECONDS": str(args.retry_base_seconds),
+        "EMAIL_RETRY_MAX_SECONDS": str(args.retry_base_seconds * 2 ** args.max_attempts),
+        "EMAIL_OUTBOX_POLL_SECONDS": "0.2",
+        "SCHEDULER_ENABLED": "false"
+    })
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def seed_data(db, args):
+    employees = [
+        {
+            "id": str(uuid.uuid4()),
+            "first_name": "Çalışan",
+            "last_name": str(index),
+            "email": f"employee{index}@benchmark.local",
+            "department": "Benchmark"
+        }
+        for index in range(args.employees)
+    ]
+    questions = [
+        {
+            "id": str(uuid.uuid4()),
+            "category": "Benchmark",
+            "question_text": f"Benchmark sorusu {index}",
+            "importance_reason": "Yük testi",
+            "period": "Aylık"
+        }
+        for index in range(args.questions)
+    ]
+    await db.employees.insert_many(employees)
+    await db.questions.insert_many(questions)
+    return employees, questions
+
+
+async def wait_for_drain(db, kind, timeout):
+    deadline = time.monotonic() + timeout
+    while await db.email_outbox.count_documents({"kind": kind, "status": {"$in": ["queued", "sending"]}}):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{kind} emails did not drain within {timeout} seconds")
+        await asyncio.sleep(0.1)
+
+
+async def flow_report(server, kind, started_at: datetime, started_clock: float, enqueue_seconds: float) -> dict:
+    """Throughput, latency and retry figures for one flow, read back from the outbox and its event log"""
+    messages = await server.db.email_outbox.find(
+        {"kind": kind},
+        {"_id": 0, "status": 1, "attempts": 1, "created_at": 1, "sent_at": 1}
+    ).to_list(None)
+    event_counts = Counter(
+        event["type"] for event in await server.db.email_events.find({"kind": kind}, {"_id": 0, "type": 1}).to_list(None)
+    )
+
+    sent = [message for message in messages if message["status"] == "sent"]
+    # Queue-to-delivery time per message, including backoff for retried messages
+    latencies = [
+        (datetime.fromisoformat(message["sent_at"]) - datetime.fromisoformat(message["created_at"])).total_seconds()
+        for message in sent
+    ]
+    send_times = server.recent_email_send_seconds(since=started_clock)
+    finished_at = max((datetime.fromisoformat(message["sent_at"]) for message in sent), default=started_at)
+    elapsed = (finished_at - started_at).total_seconds()
+
+    return {
+        "messages": len(messages),
+        "sent": len(sent),
+        "dead": sum(1 for message in messages if message["status"] == "dead"),
+        "enqueue_seconds": round(enqueue_seconds, 3),
+        "elapsed_seconds": round(elapsed, 3),
+        "messages_per_second": round(len(sent) / elapsed, 1) if elapsed > 0 else None,
+        "latency_p50_ms": round(percentile(latencies, 0.5) * 1000, 1) if latencies else None,
+        "latency_p99_ms": round(percentile(latencies, 0.99) * 1000, 1) if latencies else None,
+        "smtp_send_p50_ms": round(percentile(send_times, 0.5) * 1000, 1) if send_times else None,
+        "smtp_send_p99_ms": round(percentile(send_times, 0.99) * 1000, 1) if send_times else None,
+        "retries": event_counts["failed"],
+        "bounced": event_counts["bounced"],
+        "attempts": dict(sorted(Counter(message["attempts"] for message in messages).items()))
+    }
+
+
+async def run_benchmark(server, args) -> dict:
+    employees, questions = await seed_data(server.db, args)
+    await server.start_email_outbox_workers()
+    results = {}
+    try:
+        started_at = datetime.now(timezone.utc)
+        clock = time.monotonic()
+        share = await server.share_question_assignments(server.ShareQuestionsRequest(
+            assignments=[
+                {"question_id": question["id"], "employee_id": employee["id"]}
+                for employee in employees
+                for question in questions
+            ],
+            digest=args.digest
+        ))
+        enqueue_seconds = time.monotonic() - clock
+        await wait_for_drain(server.db, "share", args.timeout)
+        results["share"] = {
+            "assignments": share["assignments_created"],
+            **await flow_report(server, "share", started_at, clock, enqueue_seconds)
+        }
+
+        if not args.skip_reminders:
+            # Age every assignment past the reminder threshold so all of them are due
+            await server.db.question_assignments.update_many(
+                {},
+                {"$set": {"assigned_at": (datetime.now(timezone.utc) - timedelta(days=10)).isoformat()}}
+            )
+            started_at = datetime.now(timezone.utc)
+            clock = time.monotonic()
+            reminders = await server.run_email_reminders({"reminder_days": 3, "limit": len(employees) * len(questions)})
+            enqueue_seconds = time.monotonic() - clock
+            await wait_for_drain(server.db, "reminder", args.timeout)
+            results["reminder"] = {
+                "planned": reminders["reminder_count"],
+                **await flow_report(server, "reminder", started_at, clock, enqueue_seconds)
+            }
+
+        results["smtp_pool"] = server.get_smtp_pool().stats()
+    finally:
+        await server.stop_email_outbox_workers()
+        if not args.keep_db:
+            await server.client.drop_database(os.environ["DB_NAME"])
+    return results
+
+
+def print_report(results: dict, sink_stats: dict):
+    for flow in ("share", "reminder"):
+        if flow not in results:
+            continue
+        report = results[flow]
+        print(f"\n📧 {flow}")
+        for key, value in report.items():
+            print(f"   {key:<24} {value}")
+    print("\n🔌 smtp pool")
+    for key, value in results["smtp_pool"].items():
+        print(f"   {key:<24} {value}")
+    print("\n📥 sink")
+    for key, value in sink_stats.items():
+        print(f"   {key:<24} {value}")
+
+
+def main():
+    args = parse_args()
+    sink = SMTPSink(
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        failure_rate=args.failure_rate,
+        bounce_rate=args.bounce_rate,
+        seed=args.seed
+    )
+    sink.start()
+    try:
+        configure_environment(args, sink)
+        import server
+
+        # aiosmtpd logs every SMTP command at INFO
+        logging.getLogger("mail.log").setLevel(logging.WARNING)
+        print(f"🚀 {args.employees} employees × {args.questions} questions, digest={args.digest}, "
+              f"sink {args.latency} {args.latency_ms}ms failure={args.failure_rate} bounce={args.bounce_rate}")
+        results = asyncio.run(run_benchmark(server, args))
+    finally:
+        sink.stop()
+    print_report(results, sink.stats())
+
+
+if __name__ == "__main__":
+    main()
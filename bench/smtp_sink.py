@@ -0,0 +1,108 @@
+"""Local SMTP server that accepts and discards mail, for email pipeline benchmarks.
+
+SMTPSink runs aiosmtpd on localhost and answers each message after a
+simulated provider delay. `failure_rate` of messages get a temporary 451
+reply, which the outbox retries with backoff, and `bounce_rate` of
+recipients are refused with a permanent 550, which the outbox dead-letters
+as a bounce. Pointing MAIL_SERVER/MAIL_PORT at the sink lets the share and
+reminder flows run at scale without sending real mail.
+"""
+import asyncio
+import math
+import random
+import socket
+import threading
+from collections import Counter
+from typing import Optional
+
+from aiosmtpd.controller import Controller
+
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+
+def free_port(hostname: str = "127.0.0.1") -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.bind((hostname, 0))
+        return probe.getsockname()[1]
+
+
+class _SinkHandler:
+    def __init__(self, sink: "SMTPSink"):
+        self.sink = sink
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if self.sink.roll() < self.sink.bounce_rate:
+            self.sink.count("bounced")
+            return "550 5.1.1 Simulated unknown recipient"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.sink.sample_latency())
+        if self.sink.roll() < self.sink.failure_rate:
+            self.sink.count("deferred")
+            return "451 4.3.0 Simulated temporary failure"
+
+        self.sink.count("accepted")
+        return "250 Message accepted"
+
+
+class SMTPSink:
+    """aiosmtpd server on a background thread with injectable latency and failures.
+
+    `latency_ms` is the fixed delay, the mean (uniform, exponential) or the median (lognormal)
+    of the reply to DATA, the step where real providers spend their time.
+    """
+
+    def __init__(self, hostname: str = "127.0.0.1", port: Optional[int] = None, latency: str = "lognormal",
+                 latency_ms: float = 50.0, latency_sigma: float = 0.5, failure_rate: float = 0.0,
+                 bounce_rate: float = 0.0, seed: Optional[int] = None):
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {latency!r}, expected one of {LATENCY_DISTRIBUTIONS}")
+        self.hostname = hostname
+        self.port = port or free_port(hostname)
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.failure_rate = failure_rate
+        self.bounce_rate = bounce_rate
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self._random = random.Random(seed)
+        self._controller = Controller(_SinkHandler(self), hostname=hostname, port=self.port)
+
+    def roll(self) -> float:
+        with self.lock:
+            return self._random.random()
+
+    def count(self, outcome: str):
+        with self.lock:
+            self.counts[outcome] += 1
+
+    def sample_latency(self) -> float:
+        """One simulated reply delay in seconds"""
+        with self.lock:
+            if self.latency == "fixed":
+                milliseconds = self.latency_ms
+            elif self.latency == "uniform":
+                milliseconds = self._random.uniform(0.5 * self.latency_ms, 1.5 * self.latency_ms)
+            elif self.latency == "exponential":
+                milliseconds = self._random.expovariate(1 / self.latency_ms) if self.latency_ms > 0 else 0.0
+            else:
+                milliseconds = self._random.lognormvariate(math.log(max(self.latency_ms, 1e-3)), self.latency_sigma)
+        return milliseconds / 1000
+
+    def start(self):
+        self._controller.start()
+
+    def stop(self):
+        self._controller.stop()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "accepted": self.counts["accepted"],
+                "deferred": self.counts["deferred"],
+                "bounced": self.counts["bounced"]
+            }
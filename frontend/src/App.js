@@ -23,6 +23,13 @@ import {
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+// Background job polling
+const JOB_POLL_INTERVAL_MS = 1500;
+const JOB_POLL_TIMEOUT_MS = 10 * 60 * 1000;
+
+// Server-sent event streams
+const STREAM_RECONNECT_MS = 5000;
+
 // Theme Context
 const ThemeContext = createContext();
 
@@ -383,6 +390,12 @@ const AnswerStatusComponent = ({ onBack }) => {
           ⏳ Gönderildi, Yanıt Bekleniyor
         </span>
       );
+    } else if (item.email_status === 'queued') {
+      return (
+        <span className="inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium bg-blue-100 text-blue-800">
+          📨 E-posta Kuyrukta
+        </span>
+      );
     } else {
       return (
         <span className="inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium bg-red-100 text-red-800">
@@ -496,18 +509,40 @@ const AnswerStatusComponent = ({ onBack }) => {
 };
 
 // Email Logs Component
+const EMAIL_EVENT_LABELS = {
+  queued: { label: '📨 Kuyrukta', className: 'text-blue-600' },
+  sent: { label: '✅ Gönderildi', className: 'text-green-600' },
+  failed: { label: '⚠️ Başarısız (tekrar denenecek)', className: 'text-orange-600' },
+  dead: { label: '❌ Gönderilemedi', className: 'text-red-600' },
+  bounced: { label: '↩️ Geri Döndü', className: 'text-red-600' }
+};
+
+const EMAIL_LOG_PAGE_SIZE = 50;
+
 const EmailLogsComponent = ({ onBack }) => {
   const [emailLogs, setEmailLogs] = useState([]);
+  const [total, setTotal] = useState(0);
+  const [typeFilter, setTypeFilter] = useState('');
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    fetchEmailLogs();
-  }, []);
+    fetchEmailLogs(null);
+  }, [typeFilter]);
 
-  const fetchEmailLogs = async () => {
+  // `after` is the last log already shown; the next page starts right below it
+  const fetchEmailLogs = async (after) => {
     try {
-      const response = await axios.get(`${API}/email-logs`);
-      setEmailLogs(response.data);
+      const params = { limit: EMAIL_LOG_PAGE_SIZE };
+      if (typeFilter) {
+        params.type = typeFilter;
+      }
+      if (after) {
+        params.before = after.created_at;
+        params.before_id = after.id;
+      }
+      const response = await axios.get(`${API}/email-logs`, { params });
+      setEmailLogs((previous) => (after ? [...previous, ...response.data.logs] : response.data.logs));
+      setTotal(response.data.total);
     } catch (error) {
       console.error('Email logları yüklenemedi:', error);
     } finally {
@@ -536,6 +571,16 @@ const EmailLogsComponent = ({ onBack }) => {
           </Button>
           <h2 className="text-xl sm:text-2xl font-bold text-gray-900">Gönderilen E-postalar</h2>
         </div>
+        <select
+          value={typeFilter}
+          onChange={(e) => setTypeFilter(e.target.value)}
+          className="border rounded-md px-3 py-2 text-sm"
+        >
+          <option value="">Tüm Kayıtlar</option>
+          {Object.entries(EMAIL_EVENT_LABELS).map(([type, { label }]) => (
+            <option key={type} value={type}>{label}</option>
+          ))}
+        </select>
       </div>
 
       <Card className="bg-white/80 backdrop-blur-sm border-0 shadow-lg">
@@ -547,49 +592,83 @@ const EmailLogsComponent = ({ onBack }) => {
               </div>
             ) : (
               emailLogs.map((log) => (
-                <div key={log.assignment_id} className="border rounded-lg p-4 space-y-3">
+                <div key={log.id} className="border rounded-lg p-4 space-y-3">
                   <div className="flex justify-between items-start">
                     <div className="space-y-2">
                       <div className="flex items-center space-x-1 sm:space-x-2">
                         <span className="font-semibold text-gray-900">{log.employee_name}</span>
-                        <span className="text-sm text-gray-500">({log.employee_email})</span>
-                      </div>
-                      <div className="text-sm text-gray-600">
-                        <strong>Konu:</strong> Dijital Dönüşüm - {log.month}/{log.year} Dönemi Soru Yanıtlama
-                      </div>
-                      <div className="text-sm text-gray-600">
-                        <strong>Kategori:</strong> {log.question_category}
-                      </div>
-                      <div className="text-sm text-gray-600">
-                        <strong>Soru:</strong> {log.question_text}
+                        <span className="text-sm text-gray-500">({log.to || 'E-posta yok'})</span>
                       </div>
+                      {log.subject && (
+                        <div className="text-sm text-gray-600">
+                          <strong>Konu:</strong> {log.subject}
+                        </div>
+                      )}
+                      {log.questions ? (
+                        <div className="text-sm text-gray-600">
+                          <strong>{log.questions.length} Soru:</strong>
+                          <ul className="list-disc ml-5">
+                            {log.questions.map((question) => (
+                              <li key={question.answer_link}>
+                                {question.question_category} - {question.question_text}
+                              </li>
+                            ))}
+                          </ul>
+                        </div>
+                      ) : (
+                        <>
+                          <div className="text-sm text-gray-600">
+                            <strong>Kategori:</strong> {log.question_category}
+                          </div>
+                          <div className="text-sm text-gray-600">
+                            <strong>Soru:</strong> {log.question_text}
+                          </div>
+                        </>
+                      )}
+                      {log.error && (
+                        <div className="text-sm text-red-600">
+                          <strong>Hata:</strong> {log.error}
+                        </div>
+                      )}
                     </div>
                     <div className="text-right space-y-2">
                       <div className="text-sm text-gray-500">
-                        {formatDate(log.sent_date)}
+                        {formatDate(log.created_at)}
                       </div>
-                      <div className={`text-xs sm:text-sm font-medium ${log.response_received ? 'text-green-600' : 'text-orange-600'}`}>
-                        {log.response_received ? '✅ Yanıtlandı' : '⏳ Bekliyor'}
+                      <div className={`text-xs sm:text-sm font-medium ${EMAIL_EVENT_LABELS[log.type]?.className || 'text-gray-600'}`}>
+                        {EMAIL_EVENT_LABELS[log.type]?.label || log.type}
+                      </div>
+                      <div className="text-xs text-gray-500">
+                        {log.kind === 'reminder' ? 'Hatırlatma' : log.resend ? 'Tekrar Gönderim' : 'Soru Paylaşımı'}
                       </div>
                     </div>
                   </div>
                   
-                  <div className="border-t pt-3">
-                    <div className="flex items-center justify-between">
-                      <span className="text-xs sm:text-sm font-medium text-gray-700">Yanıt Linki:</span>
-                      <a 
-                        href={log.answer_link} 
-                        target="_blank" 
-                        rel="noopener noreferrer"
-                        className="text-blue-600 hover:text-blue-800 text-sm underline"
-                      >
-                        Soruyu Yanıtla →
-                      </a>
+                  {log.answer_link && (
+                    <div className="border-t pt-3">
+                      <div className="flex items-center justify-between">
+                        <span className="text-xs sm:text-sm font-medium text-gray-700">Yanıt Linki:</span>
+                        <a 
+                          href={log.answer_link} 
+                          target="_blank" 
+                          rel="noopener noreferrer"
+                          className="text-blue-600 hover:text-blue-800 text-sm underline"
+                        >
+                          Soruyu Yanıtla →
+                        </a>
+                      </div>
                     </div>
-                  </div>
+                  )}
                 </div>
               ))
             )}
+            {emailLogs.length < total && (
+              <div className="text-center">
+                <Button variant="outline" onClick={() => fetchEmailLogs(emailLogs[emailLogs.length - 1])}>
+                  Daha Fazla Göster ({emailLogs.length}/{total})
+                </Button>
+              </div>
+            )}
           </div>
         </CardContent>
       </Card>
@@ -608,6 +687,7 @@ const ShareQuestionsManagement = ({ onBack }) => {
   const [error, setError] = useState('');
   const [success, setSuccess] = useState('');
   const [selectedPeriod, setSelectedPeriod] = useState(''); // Filter state
+  const [digest, setDigest] = useState(false); // One email per employee
 
   useEffect(() => {
     fetchQuestionsAndEmployees();
@@ -707,7 +787,8 @@ const ShareQuestionsManagement = ({ onBack }) => {
         assignments: validAssignments.map(a => ({
           question_id: a.question_id,
           employee_id: a.employee_id
-        }))
+        })),
+        digest
       });
       
       setSuccess(response.data.message);
@@ -865,7 +946,17 @@ const ShareQuestionsManagement = ({ onBack }) => {
           </div>
           
           {questions.length > 0 && (
-            <div className="flex justify-end mt-6">
+            <div className="flex justify-end items-center space-x-4 mt-6">
+              <div className="flex items-center space-x-2">
+                <input
+                  type="checkbox"
+                  id="shareDigest"
+                  checked={digest}
+                  onChange={(e) => setDigest(e.target.checked)}
+                  className="rounded"
+                />
+                <Label htmlFor="shareDigest" className="text-sm">Her çalışana tek e-posta gönder</Label>
+              </div>
               <Button 
                 onClick={handleShareQuestions}
                 disabled={sharing}
@@ -917,6 +1008,45 @@ const ResponsesComponent = ({ onBack }) => {
     fetchQuestionsAndEmployees();
   }, []);
 
+  // AI yorumları hazır olduğunda sunucudan gelen olaylarla listeyi güncelle
+  useEffect(() => {
+    if (!selectedQuestion || !localStorage.getItem('token')) return;
+
+    let source = null;
+    let retryTimer = null;
+    let closed = false;
+
+    const connect = async () => {
+      try {
+        const { token } = (await axios.post(`${API}/auth/stream-token`)).data;
+        if (closed) return;
+        source = new EventSource(
+          `${API}/table-responses/question/${selectedQuestion.id}/events?token=${encodeURIComponent(token)}`
+        );
+        source.addEventListener('ai_comment', (event) => {
+          const update = JSON.parse(event.data);
+          setResponses(current => current.map(response =>
+            response.id === update.id ? { ...response, ...update } : response
+          ));
+        });
+        // The stream token expires quickly, so reconnect with a fresh one instead of reusing the URL
+        source.onerror = () => {
+          source.close();
+          if (!closed) retryTimer = setTimeout(connect, STREAM_RECONNECT_MS);
+        };
+      } catch (error) {
+        if (!closed) retryTimer = setTimeout(connect, STREAM_RECONNECT_MS);
+      }
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      if (source) source.close();
+    };
+  }, [selectedQuestion]);
+
   const fetchQuestionsAndEmployees = async () => {
     try {
       const response = await axios.get(`${API}/questions-for-responses`);
@@ -944,8 +1074,17 @@ const ResponsesComponent = ({ onBack }) => {
 
   const fetchChartData = async (questionId) => {
     try {
-      const response = await axios.get(`${API}/monthly-responses/chart-data/${questionId}`);
-      setChartData(response.data);
+      const response = await axios.get(`${API}/monthly-responses/chart-data/${questionId}`, {
+        params: { points: 120 }
+      });
+      const { periods, series } = response.data;
+      // Columnar response: one label array plus one value array per row; chart the row average per period
+      const chart_data = periods.map((period, index) => {
+        const values = series.map(row => row.values[index]).filter(value => value !== null);
+        const value = values.length ? values.reduce((sum, value) => sum + value, 0) / values.length : 0;
+        return { month: period, value: Math.round(value * 100) / 100 };
+      });
+      setChartData({ ...response.data, chart_data });
     } catch (error) {
       console.error('Grafik verileri yüklenemedi:', error);
       setError('Grafik verileri yüklenirken hata oluştu');
@@ -1029,7 +1168,7 @@ const ResponsesComponent = ({ onBack }) => {
 
     const { BarChart, LineChart, PieChart, AreaChart, Bar, Line, Pie, Area, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, Cell } = require('recharts');
     
-    const chartType = chartData.chart_type;
+    const chartType = (chartData.chart_type || '').toLocaleLowerCase('tr-TR');
     const data = chartData.chart_data;
     const colors = ['#10b981', '#3b82f6', '#f59e0b', '#ef4444', '#8b5cf6', '#f97316'];
 
@@ -1423,7 +1562,7 @@ const ResponsesComponent = ({ onBack }) => {
                         </TableCell>
                         <TableCell className="max-w-xs">
                           <div className="truncate" title={response.ai_comment}>
-                            {response.ai_comment || '-'}
+                            {response.ai_comment || (['pending', 'generating'].includes(response.ai_comment_status) ? 'AI yorumu hazırlanıyor...' : '-')}
                           </div>
                         </TableCell>
                       </TableRow>
@@ -1723,6 +1862,7 @@ const QuestionBankManagement = ({ onBack }) => {
     expected_action: '',
     period: '',
     chart_type: '',
+    ai_mode: '',
     table_rows: []
   });
   const [categories, setCategories] = useState([]);
@@ -1778,6 +1918,7 @@ const QuestionBankManagement = ({ onBack }) => {
       expected_action: '',
       period: '',
       chart_type: '',
+      ai_mode: '',
       table_rows: []
     });
     setError('');
@@ -1792,7 +1933,8 @@ const QuestionBankManagement = ({ onBack }) => {
     try {
       const dataToSend = {
         ...formData,
-        chart_type: formData.chart_type || null
+        chart_type: formData.chart_type || null,
+        ai_mode: formData.ai_mode || null
       };
 
       if (editingQuestion) {
@@ -1820,6 +1962,7 @@ const QuestionBankManagement = ({ onBack }) => {
       expected_action: question.expected_action,
       period: question.period,
       chart_type: question.chart_type || '',
+      ai_mode: question.ai_mode || '',
       table_rows: question.table_rows || []
     });
     setShowAddModal(true);
@@ -1983,6 +2126,20 @@ const QuestionBankManagement = ({ onBack }) => {
                 </Select>
               </div>
 
+              <div>
+                <Label htmlFor="ai_mode">AI Yorum Modu (Opsiyonel)</Label>
+                <Select onValueChange={(value) => handleSelectChange('ai_mode', value)} value={formData.ai_mode}>
+                  <SelectTrigger data-testid="ai-mode-select">
+                    <SelectValue placeholder="Varsayılan mod" />
+                  </SelectTrigger>
+                  <SelectContent>
+                    <SelectItem value="llm">AI (her yanıt için)</SelectItem>
+                    <SelectItem value="hybrid">Hibrit (yerel yorum, anomalilerde AI)</SelectItem>
+                    <SelectItem value="local">Yerel (kural tabanlı, anında)</SelectItem>
+                  </SelectContent>
+                </Select>
+              </div>
+
               {/* Tablo Satırları - Temiz Sistem */}
               <div className="space-y-4">
                 <div className="flex items-center justify-between">
@@ -5240,8 +5397,8 @@ const EmailAutomationComponent = ({ onBack }) => {
         min_reminder_interval: emailConfig.minReminderInterval
       });
       
-      setSuccess(`${response.data.reminders_sent} hatırlatma e-postası gönderildi!`);
-      setReminders(response.data.reminders || []);
+      setSuccess(`${response.data.reminder_count} hatırlatma e-postası gönderim kuyruğuna alındı!`);
+      setReminders(response.data.reminders_sent || []);
     } catch (error) {
       setError(error.response?.data?.detail || 'E-posta gönderiminde hata oluştu');
     } finally {
@@ -5262,7 +5419,25 @@ const EmailAutomationComponent = ({ onBack }) => {
         format: emailConfig.format
       });
       
-      setSuccess(`${emailConfig.reportType.charAt(0).toUpperCase() + emailConfig.reportType.slice(1)} raporu oluşturuldu! ID: ${response.data.report_id}`);
+      // Report generation runs as a background job; poll until it finishes or the deadline passes
+      const jobId = response.data.job_id;
+      const deadline = Date.now() + JOB_POLL_TIMEOUT_MS;
+      let job = response.data;
+      while (job.status === 'queued' || job.status === 'running') {
+        if (Date.now() > deadline) {
+          setError('Rapor oluşturma zaman aşımına uğradı. Lütfen daha sonra rapor listesini kontrol edin.');
+          return;
+        }
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        job = (await axios.get(`${API}/automation/jobs/${jobId}`)).data;
+      }
+      
+      if (job.status === 'failed') {
+        setError(job.error || 'Rapor oluşturmada hata oluştu');
+        return;
+      }
+      
+      setSuccess(`${emailConfig.reportType.charAt(0).toUpperCase() + emailConfig.reportType.slice(1)} raporu oluşturuldu! ID: ${job.result.report_id}`);
       fetchReports(); // Refresh reports list
     } catch (error) {
       setError(error.response?.data?.detail || 'Rapor oluşturmada hata oluştu');
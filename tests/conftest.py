@@ -0,0 +1,44 @@
+"""Offline unit tests for the backend modules.
+
+    pip install -r tests/requirements.txt
+    python -m pytest tests
+
+server.py reads its settings at import, so placeholders are set here before any test imports it;
+the `db` fixture swaps its Motor database for an in-memory mongomock one.
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+# The benchmark SMTP sink doubles as a local server for the SMTP pool tests
+sys.path.insert(0, str(ROOT / "bench"))
+
+for key, value in {
+    "MONGO_URL": "mongodb://localhost:27017",
+    "DB_NAME": "unit_tests",
+    "MAIL_USERNAME": "tests",
+    "MAIL_PASSWORD": "tests",
+    "MAIL_SERVER": "localhost",
+    "MAIL_FROM": "tests@example.com",
+    "MAIL_FROM_NAME": "Tests",
+    "SCHEDULER_ENABLED": "false"
+}.items():
+    os.environ.setdefault(key, value)
+
+
+@pytest.fixture
+def server():
+    import server as server_module
+    return server_module
+
+
+@pytest.fixture
+def db(server, monkeypatch):
+    from mongomock_motor import AsyncMongoMockClient
+    database = AsyncMongoMockClient()["unit_tests"]
+    monkeypatch.setattr(server, "db", database)
+    return database
@@ -0,0 +1,35 @@
+import asyncio
+import json
+
+
+class ConnectedRequest:
+    async def is_disconnected(self):
+        return False
+
+
+def test_question_stream_sends_in_flight_statuses_on_connect(server, db):
+    user = server.User(username="tester", email="tester@example.com")
+
+    async def scenario():
+        await db.questions.insert_one({"id": "q1"})
+        await db.table_responses.insert_many([
+            {"id": "r1", "question_id": "q1", "ai_comment_status": "pending"},
+            {"id": "r2", "question_id": "q1", "ai_comment_status": "generating"},
+            {"id": "r3", "question_id": "q1", "ai_comment_status": "completed"}
+        ])
+        stream = await server.stream_question_response_events("q1", ConnectedRequest(), user)
+        chunks = []
+        async for chunk in stream.body_iterator:
+            chunks.append(chunk)
+            if len(chunks) == 3:
+                break
+        await stream.body_iterator.aclose()
+        return chunks
+
+    chunks = asyncio.run(scenario())
+    assert chunks[0] == ": connected\n\n"
+    events = [json.loads(chunk.split("data: ", 1)[1]) for chunk in chunks[1:]]
+    assert sorted((event["id"], event["ai_comment_status"]) for event in events) == [
+        ("r1", "pending"),
+        ("r2", "generating")
+    ]
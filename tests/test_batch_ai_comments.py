@@ -0,0 +1,71 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+
+@pytest.mark.parametrize("answer, expected", [
+    ('{"c1": "İyi", "c2": "Kötü"}', {"c1": "İyi", "c2": "Kötü"}),
+    ('Yorumlar:\n```json\n{"c1": " İyi ", "c2": "Kötü"}\n```\nTeşekkürler', {"c1": "İyi", "c2": "Kötü"}),
+    ('{"c1": "İyi", "c2": "", "c3": 5}', {"c1": "İyi"}),
+    ('{"c1": "İyi", "c9": "Fazladan"}', {"c1": "İyi"}),
+    ('["İyi", "Kötü"]', {}),
+    ('{"c1": "İyi",', {}),
+    ("Yanıt veremiyorum", {})
+])
+def test_parse_batch_ai_comments(server, answer, expected):
+    assert server.parse_batch_ai_comments(answer, ["c1", "c2", "c3"]) == expected
+
+
+def test_batch_prompt_lists_every_key(server):
+    prompt = server.build_batch_ai_comment_prompt("Satış nedir?", "Satış", "Aylık", {
+        "c1": {"table_data": {"r1": "10"}, "table_rows": [{"id": "r1", "name": "Satış"}]},
+        "c2": {"table_data": {"r1": "20"}, "table_rows": [{"id": "r1", "name": "Satış"}]}
+    })
+    assert re.findall(r"^\s*\[(c\d+)\]", prompt, re.MULTILINE) == ["c1", "c2"]
+    assert "c1, c2" in prompt
+
+
+def test_keys_missing_from_a_batch_answer_fall_back_to_single_calls(server, db, monkeypatch):
+    prompts = []
+
+    async def request_ai_comment(prompt, site="direct"):
+        prompts.append(site)
+        if site == "batch":
+            keys = re.findall(r"^\s*\[(c\d+)\]", prompt, re.MULTILINE)
+            # The model skips the last response
+            return json.dumps({key: f"toplu {key}" for key in keys[:-1]})
+        return "tekil"
+
+    monkeypatch.setattr(server, "request_ai_comment", request_ai_comment)
+    monkeypatch.setattr(server, "AI_COMMENT_BATCH_SIZE", 5)
+    monkeypatch.setattr(server, "AI_COMMENT_CACHE_TTL_HOURS", 0)
+
+    async def scenario():
+        await db.questions.insert_one({
+            "id": "q1",
+            "question_text": "Satış nedir?",
+            "category": "Satış",
+            "period": "Aylık",
+            "table_rows": [{"id": "r1", "name": "Satış"}]
+        })
+        await db.table_responses.insert_many([
+            {
+                "id": f"r{index}",
+                "question_id": "q1",
+                "employee_id": f"e{index}",
+                "year": 2025,
+                "month": 1,
+                "table_data": {"r1": str(index)},
+                **server.pending_ai_comment_fields({"r1": str(index)}, None, "single")
+            }
+            for index in range(3)
+        ])
+        await server.process_ai_comment("r0")
+        return await db.table_responses.find({}, {"_id": 0, "ai_comment_status": 1, "ai_comment": 1}).to_list(None)
+
+    responses = asyncio.run(scenario())
+    assert prompts == ["batch", "single"]
+    assert [response["ai_comment_status"] for response in responses] == ["completed"] * 3
+    assert sorted(response["ai_comment"] for response in responses) == ["tekil", "toplu c1", "toplu c2"]
@@ -0,0 +1,53 @@
+import asyncio
+
+import numpy as np
+
+
+def test_chart_data_averages_turkish_formatted_values(server, db):
+    user = server.User(username="tester", email="tester@example.com")
+
+    async def scenario():
+        await db.questions.insert_one({
+            "id": "q1",
+            "period": "Aylık",
+            "table_rows": [{"id": "sales", "name": "Satış", "order": 0}, {"id": "rate", "name": "Oran", "order": 1}]
+        })
+        await db.table_responses.insert_many([
+            {"question_id": "q1", "employee_id": "e1", "year": 2025, "month": 1, "table_data": {"sales": "1.234,5", "rate": "12,5"}},
+            {"question_id": "q1", "employee_id": "e2", "year": 2025, "month": 1, "table_data": {"sales": "765,5", "rate": "yok"}},
+            {"question_id": "q1", "employee_id": "e1", "year": 2025, "month": 2, "table_data": {"sales": "1500", "rate": "%7,5"}}
+        ])
+        return await server.get_question_chart_data("q1", None, user)
+
+    chart = asyncio.run(scenario())
+    assert chart["periods"] == ["2025-01", "2025-02"]
+    assert chart["series"][0]["values"] == [1000.0, 1500.0]
+    assert chart["series"][1]["values"] == [12.5, 7.5]
+
+
+def test_lttb_keeps_endpoints_and_peaks(server):
+    series = np.zeros((1, 100))
+    series[0, 37] = 10.0
+    series[0, 71] = -10.0
+    selected = server.lttb_indices(series, 10)
+
+    assert len(selected) == 10
+    assert selected[0] == 0 and selected[-1] == 99
+    assert list(selected) == sorted(selected)
+    assert 37 in selected and 71 in selected
+
+
+def test_lttb_returns_every_point_when_not_downsampling(server):
+    series = np.arange(20, dtype=float).reshape(2, 10)
+    assert list(server.lttb_indices(series, 10)) == list(range(10))
+    assert list(server.lttb_indices(series, 2)) == list(range(10))
+
+
+def test_lttb_tolerates_missing_values(server):
+    series = np.full((2, 50), np.nan)
+    series[0, ::2] = np.arange(25)
+    series[1, 5] = 3.0
+    selected = server.lttb_indices(series, 8)
+
+    assert len(selected) == 8
+    assert selected[0] == 0 and selected[-1] == 49
@@ -0,0 +1,58 @@
+import asyncio
+
+
+def test_insight_prompt_uses_the_mean_of_every_employee(server, db, monkeypatch):
+    prompts = []
+
+    async def request_ai_comment(prompt, site="direct"):
+        prompts.append(prompt)
+        return "yorum"
+
+    monkeypatch.setattr(server, "request_ai_comment", request_ai_comment)
+
+    async def scenario():
+        await db.questions.insert_one({
+            "id": "q1",
+            "question_text": "Aylık satış",
+            "category": "Satış",
+            "period": "Aylık",
+            "table_rows": [{"id": "sales", "name": "Satış", "unit": "TL"}]
+        })
+        await db.table_responses.insert_many([
+            {"question_id": "q1", "employee_id": "e1", "year": 2025, "month": 3, "table_data": {"sales": "100"}},
+            {"question_id": "q1", "employee_id": "e2", "year": 2025, "month": 3, "table_data": {"sales": "1.200,5"}},
+            {"question_id": "q1", "employee_id": "e3", "year": 2025, "month": 3, "table_data": {"sales": "-"}}
+        ])
+        return await server.refresh_dashboard_insights()
+
+    result = asyncio.run(scenario())
+    assert result["generated"] == 1
+    assert "650,25" in prompts[0]
+    assert "1.200,5" not in prompts[0]
+
+
+def test_insight_failures_still_report_job_progress(server, db, monkeypatch):
+    progress = []
+
+    async def generate_question_insights(question, latest):
+        if question["id"] == "q1":
+            raise ValueError("bozuk veri")
+        return "yorum"
+
+    async def update_job_progress(job_id, done, total):
+        progress.append((done, total))
+
+    monkeypatch.setattr(server, "generate_question_insights", generate_question_insights)
+    monkeypatch.setattr(server, "update_job_progress", update_job_progress)
+
+    async def scenario():
+        await db.questions.insert_many([{"id": "q1"}, {"id": "q2"}])
+        await db.table_responses.insert_many([
+            {"question_id": question_id, "year": 2025, "month": 1, "table_data": {}}
+            for question_id in ("q1", "q2")
+        ])
+        return await server.refresh_dashboard_insights("job")
+
+    result = asyncio.run(scenario())
+    assert (result["generated"], result["failed"]) == (1, 1)
+    assert sorted(progress) == [(1, 2), (2, 2)]
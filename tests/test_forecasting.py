@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+import forecasting
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    forecasting._forecast_cache.clear()
+    yield
+    forecasting._forecast_cache.clear()
+
+
+def test_each_row_gets_the_model_that_fits_its_shape():
+    t = np.arange(36)
+    series = np.vstack([
+        100 + 20 * np.sin(2 * np.pi * t / 12),
+        10 + 3.0 * t,
+        np.full(36, 5.0)
+    ])
+    seasonal, trend, flat = forecasting.fit_forecast(series, horizon=12)
+
+    assert seasonal["model"] in ("holt_winters", "seasonal_naive")
+    np.testing.assert_allclose(seasonal["forecast"], series[0, 24:36], atol=0.5)
+    assert trend["model"] == "holt"
+    np.testing.assert_allclose(trend["forecast"][:3], [118, 121, 124], atol=1e-6)
+    assert flat["forecast"] == [5.0] * 12
+    for result in (seasonal, trend, flat):
+        assert all(low <= mid <= high for low, mid, high in zip(result["lower_95"], result["forecast"], result["upper_95"]))
+
+
+def test_short_series_fall_back_to_simple_models():
+    assert forecasting.fit_forecast(np.array([[4.0]]), horizon=3) == []
+
+    (result,) = forecasting.fit_forecast(np.array([[1.0, 2.0]]), horizon=3)
+    assert result["model"] == "naive"
+    assert result["forecast"] == [2.0, 2.0, 2.0]
+
+    # 13 periods: too short for Holt-Winters (2m+1) but enough for the seasonal naive model
+    (result,) = forecasting.fit_forecast(np.arange(13, dtype=float)[None, :], horizon=2)
+    assert result["model"] != "holt_winters"
+
+
+def test_all_nan_rows_forecast_zero_without_nan():
+    series = np.vstack([np.full(6, np.nan), [1.0, np.nan, 3.0, 4.0, np.nan, 6.0]])
+    empty, gappy = forecasting.fit_forecast(series, horizon=2)
+
+    assert empty["forecast"] == [0.0, 0.0]
+    assert np.isfinite(gappy["forecast"]).all()
+    assert gappy["backtest_mae"] is not None
+
+
+def test_missing_months_become_gaps_on_the_calendar():
+    periods, series = forecasting.reindex_monthly(["2024-11", "2025-02", "0-0"], np.array([[1.0, 2.0, 3.0]]))
+
+    assert periods == ["2024-11", "2024-12", "2025-01", "2025-02"]
+    np.testing.assert_array_equal(np.isnan(series[0]), [False, True, True, False])
+
+
+def test_cached_forecasts_cannot_be_changed_by_callers():
+    periods = [f"2024-{month:02d}" for month in range(1, 7)]
+    series = np.array([[1.0, 2.0, 3.0, 4.0, 5.0, 6.0]])
+
+    first = forecasting.forecast_question_series("q1", periods, series, horizon=2)
+    expected = list(first[0]["forecast"])
+    first[0]["forecast"].append(99.0)
+    first[0]["model"] = "changed"
+
+    second = forecasting.forecast_question_series("q1", periods, series, horizon=2)
+    assert second[0]["forecast"] == expected
+    assert second[0]["model"] != "changed"
+    second[0]["forecast"].clear()
+    assert forecasting.forecast_question_series("q1", periods, series, horizon=2)[0]["forecast"] == expected
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from llm_client import CircuitBreaker, LLMClient, LLMUnavailable, TokenBucket
+from llm_providers import StubProvider, StubProviderError
+
+
+def client_for(send, **options):
+    settings = {"rate_per_minute": 60000, "burst": 100, "retry_base_seconds": 0, **options}
+    return LLMClient(send, **settings)
+
+
+def test_token_bucket_allows_a_burst_then_paces_calls():
+    async def scenario():
+        bucket = TokenBucket(rate_per_minute=600, burst=2)
+        started = time.monotonic()
+        await bucket.acquire()
+        await bucket.acquire()
+        burst_seconds = time.monotonic() - started
+        await bucket.acquire()
+        return burst_seconds, time.monotonic() - started
+
+    burst_seconds, total_seconds = asyncio.run(scenario())
+    assert burst_seconds < 0.05
+    # 600 per minute is one token every 0.1 seconds
+    assert 0.08 <= total_seconds < 0.5
+
+
+def test_circuit_breaker_lets_one_probe_through_when_half_open():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only the first caller probes; the rest keep failing fast
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failures_are_retried_until_success():
+    calls = []
+
+    async def send(prompt):
+        calls.append(prompt)
+        if len(calls) < 3:
+            raise ConnectionError("reset by peer")
+        return "yorum"
+
+    client = client_for(send, max_retries=2)
+    assert asyncio.run(client.complete("soru", site="single")) == "yorum"
+    outcomes = client.metrics.snapshot()["sites"]["single"]["outcomes"]
+    assert (outcomes["failure"], outcomes["success"]) == (2, 1)
+
+
+def test_hanging_provider_is_cut_off_by_the_timeout():
+    client = client_for(StubProvider(hang_rate=1.0, seed=1), timeout_seconds=0.05, max_retries=1)
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        asyncio.run(client.complete("soru"))
+    assert time.monotonic() - started < 1
+    assert client.metrics.snapshot()["sites"]["direct"]["outcomes"]["timeout"] == 2
+
+
+def test_open_breaker_fails_fast_without_calling_the_provider():
+    provider = StubProvider(latency="fixed", latency_ms=0, failure_rate=1.0, seed=1)
+    calls = []
+
+    async def send(prompt):
+        calls.append(prompt)
+        return await provider(prompt)
+
+    client = client_for(send, max_retries=0, failure_threshold=2, reset_seconds=60)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(StubProviderError):
+                await client.complete("soru")
+        with pytest.raises(LLMUnavailable):
+            await client.complete("soru")
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+    assert client.stats()["state"] == CircuitBreaker.OPEN
+
+
+def test_fatal_errors_are_not_retried_and_do_not_trip_the_breaker():
+    calls = []
+
+    async def send(prompt):
+        calls.append(prompt)
+        raise KeyError("api key")
+
+    client = client_for(send, max_retries=3, failure_threshold=1, fatal_exceptions=(KeyError,))
+    with pytest.raises(KeyError):
+        asyncio.run(client.complete("soru"))
+    assert len(calls) == 1
+    assert client.stats()["state"] == CircuitBreaker.CLOSED
+
+
+def test_stub_provider_answers_batch_prompts_with_one_comment_per_key():
+    provider = StubProvider(latency="fixed", latency_ms=0, response_chars=50, seed=3)
+    answer = asyncio.run(provider("Soru\n[c1] Satış: 10\n[c2] Satış: 20\n"))
+    comments = json.loads(answer)
+    assert sorted(comments) == ["c1", "c2"]
+    assert all(comments.values())
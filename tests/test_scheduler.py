@@ -0,0 +1,36 @@
+import asyncio
+
+
+def test_slow_job_does_not_delay_other_due_jobs(server, db, monkeypatch):
+    finished = []
+
+    async def slow():
+        await asyncio.sleep(0.5)
+        finished.append("slow")
+        return {}
+
+    async def fast():
+        finished.append("fast")
+        return {}
+
+    monkeypatch.setattr(server, "SCHEDULED_JOBS", {
+        "slow": {"handler": slow, "interval_minutes": 60},
+        "fast": {"handler": fast, "interval_minutes": 60}
+    })
+    monkeypatch.setattr(server, "SCHEDULER_TICK_SECONDS", 0.05)
+
+    async def scenario():
+        await server.ensure_indexes()
+        loop_task = asyncio.create_task(server.scheduler_loop())
+        await asyncio.sleep(0.2)
+        early = list(finished)
+        await asyncio.sleep(0.5)
+        loop_task.cancel()
+        runs = await db.scheduler_runs.find({}, {"_id": 0, "job": 1, "status": 1}).to_list(None)
+        return early, runs
+
+    early, runs = asyncio.run(scenario())
+    assert early == ["fast"]
+    assert finished == ["fast", "slow"]
+    # A job still running on later ticks is not started again
+    assert sorted((run["job"], run["status"]) for run in runs) == [("fast", "completed"), ("slow", "completed")]
@@ -0,0 +1,105 @@
+import asyncio
+from email.message import EmailMessage
+
+import aiosmtplib
+import pytest
+
+from smtp_pool import SMTPPool, is_bounce
+from smtp_sink import SMTPSink
+
+
+@pytest.fixture
+def sink():
+    server = SMTPSink(latency="fixed", latency_ms=0, seed=1)
+    server.start()
+    yield server
+    server.stop()
+
+
+def message(index=0):
+    email = EmailMessage()
+    email["From"] = "tests@example.com"
+    email["To"] = f"user{index}@example.com"
+    email["Subject"] = f"Mesaj {index}"
+    email.set_content("Merhaba")
+    return email
+
+
+def pool_for(sink, **options):
+    return SMTPPool(hostname=sink.hostname, port=sink.port, start_tls=False, timeout=5, **options)
+
+
+def test_sessions_are_reused_across_messages(sink):
+    async def scenario():
+        pool = pool_for(sink, size=1)
+        for index in range(5):
+            await pool.send(message(index))
+        await pool.close()
+        return pool.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["connects"], stats["messages"]) == (1, 5)
+    assert sink.stats()["accepted"] == 5
+
+
+def test_a_dropped_session_is_retried_once_on_a_new_connection(sink):
+    async def scenario():
+        pool = pool_for(sink, size=1)
+        await pool.send(message(0))
+
+        async def dropped(email):
+            raise aiosmtplib.SMTPServerDisconnected("Connection lost")
+
+        pool._idle[0].smtp.send_message = dropped
+        await pool.send(message(1))
+        await pool.close()
+        return pool.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["connects"], stats["reconnects"], stats["messages"]) == (2, 1, 2)
+    assert sink.stats()["accepted"] == 2
+
+
+def test_idle_and_worn_out_sessions_are_replaced(sink):
+    async def scenario():
+        idle_pool = pool_for(sink, size=1, idle_seconds=0.05)
+        await idle_pool.send(message(0))
+        await asyncio.sleep(0.1)
+        await idle_pool.send(message(1))
+        await idle_pool.close()
+
+        worn_pool = pool_for(sink, size=1, max_messages=2)
+        for index in range(3):
+            await worn_pool.send(message(index))
+        await worn_pool.close()
+        return idle_pool.stats(), worn_pool.stats()
+
+    idle_stats, worn_stats = asyncio.run(scenario())
+    assert idle_stats["connects"] == 2
+    assert worn_stats["connects"] == 2
+
+
+def test_permanent_refusals_are_bounces_and_temporary_failures_are_not():
+    bouncing = SMTPSink(latency="fixed", latency_ms=0, bounce_rate=1.0, seed=1)
+    deferring = SMTPSink(latency="fixed", latency_ms=0, failure_rate=1.0, seed=1)
+
+    async def failure(sink):
+        pool = pool_for(sink, size=1)
+        try:
+            await pool.send(message())
+        except aiosmtplib.SMTPException as error:
+            return error
+        finally:
+            await pool.close()
+
+    bouncing.start()
+    deferring.start()
+    try:
+        bounced = asyncio.run(failure(bouncing))
+        deferred = asyncio.run(failure(deferring))
+    finally:
+        bouncing.stop()
+        deferring.stop()
+
+    assert is_bounce(bounced)
+    assert deferred is not None and not is_bounce(deferred)
@@ -0,0 +1,94 @@
+import asyncio
+
+COUNTER_FIELDS = ("responses_by_period", "ai_comments", "employees", "questions", "assignments", "new_anomalies")
+
+
+def employee_data(server, index):
+    return server.EmployeeCreate(
+        first_name="Çalışan",
+        last_name=f"No{index}",
+        phone=f"55500000{index:02d}",
+        email=f"employee{index}@example.com",
+        department="Satış",
+        age=30,
+        gender="Diğer",
+        hire_date="2020-01-01",
+        birth_date="1990-01-01",
+        salary=1000
+    )
+
+
+def question_data(server, index):
+    return server.QuestionCreate(
+        category="Satış",
+        question_text=f"Aylık satış tutarı nedir {index}?",
+        importance_reason="Satış trendini izlemek için",
+        expected_action="Düşüşte aksiyon planı hazırlanır",
+        period="Aylık",
+        table_rows=[{"id": "r1", "name": "Satış", "unit": "TL"}],
+        ai_mode="local"
+    )
+
+
+def counter_values(counters):
+    return {field: counters.get(field) for field in COUNTER_FIELDS}
+
+
+def test_counters_match_a_full_recount_after_writes(server, db):
+    user = server.User(username="tester", email="tester@example.com")
+
+    async def scenario():
+        await server.ensure_indexes()
+        # The first write creates the document instead of dropping the increment
+        questions = [await server.create_question(question_data(server, index), user) for index in range(3)]
+        assert (await db.stats_counters.find_one({"id": server.STATS_COUNTERS_ID}))["questions"] == 3
+        # The upserted document is partial until reconciled, so the first read recounts
+        assert "reconciled_at" in await server.get_stats_counters()
+
+        employees = [await server.create_employee(employee_data(server, index), user) for index in range(4)]
+        for month in (1, 2):
+            for employee in employees:
+                await server.create_table_response(server.TableResponseCreate(
+                    question_id=questions[0].id,
+                    employee_id=employee.id,
+                    year=2025,
+                    month=month,
+                    table_data={"r1": "100"}
+                ), user)
+        # Updating an existing response must not count it again
+        await server.create_table_response(server.TableResponseCreate(
+            question_id=questions[0].id,
+            employee_id=employees[0].id,
+            year=2025,
+            month=1,
+            table_data={"r1": "150"}
+        ), user)
+        await server.delete_employee(employees[3].id, user)
+        await server.delete_question(questions[2].id, user)
+        await server.create_employee(employee_data(server, 9), user)
+
+        incremental = await db.stats_counters.find_one({"id": server.STATS_COUNTERS_ID})
+        recounted = await server.recount_stats_counters()
+        return incremental, recounted
+
+    incremental, recounted = asyncio.run(scenario())
+    assert counter_values(incremental) == counter_values(recounted)
+    assert recounted["employees"] == 4
+    assert recounted["questions"] == 2
+    assert recounted["responses_by_period"] == {"2025-01": 4, "2025-02": 4}
+
+
+def test_reconcile_defers_to_the_lease_holder(server, db):
+    async def scenario():
+        await server.ensure_indexes()
+        await db.stats_counters.insert_one({"id": server.STATS_COUNTERS_ID, "employees": 7})
+        await db.employees.insert_one({"id": "e1"})
+        assert await server.acquire_schedule_lease(server.STATS_RECONCILE_LOCK, 0)
+        held = await server.reconcile_stats_counters()
+        await server.release_schedule_lease(server.STATS_RECONCILE_LOCK)
+        reconciled = await server.reconcile_stats_counters()
+        return held, reconciled
+
+    held, reconciled = asyncio.run(scenario())
+    assert held["employees"] == 7
+    assert reconciled["employees"] == 1
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def summary(server, db):
+    user = server.User(username="tester", email="tester@example.com")
+
+    async def seed():
+        await db.questions.insert_one({"id": "q1", "question_text": "Satış nedir?"})
+        await db.table_responses.insert_many([
+            {"id": f"r{index}", "question_id": "q1", "employee_id": f"e{index}", "year": year, "month": month,
+             "created_at": f"{year}-{month:02d}-0{index % 9 + 1}"}
+            for index, (year, month) in enumerate([(2024, 12), (2025, 1), (2025, 1), (2025, 3), (2025, 3), (2025, 3)])
+        ])
+        await db.table_responses.insert_one({"id": "other", "question_id": "q2", "year": 2025, "month": 1})
+
+    asyncio.run(seed())
+
+    def get(**params):
+        options = {"year": None, "include": None, "limit": 100, "skip": 0, **params}
+        return asyncio.run(server.get_table_summary("q1", current_user=user, **options))
+
+    return get
+
+
+def counts(result):
+    return {(entry["year"], entry["month_number"]): entry["response_count"] for entry in result["summary_data"] if entry["response_count"]}
+
+
+def test_summary_counts_every_month_of_every_year(summary):
+    result = summary()
+
+    assert result["total_responses"] == 6
+    assert len(result["summary_data"]) == 24
+    assert counts(result) == {(2024, 12): 1, (2025, 1): 2, (2025, 3): 3}
+    assert "responses_page" not in result
+
+
+def test_summary_can_be_limited_to_one_year(summary):
+    result = summary(year=2025)
+
+    assert result["total_responses"] == 5
+    assert [entry["year"] for entry in result["summary_data"]] == [2025] * 12
+    assert summary(year=2023)["summary_data"][0] == {"year": 2023, "month": "Ocak", "month_number": 1, "response_count": 0}
+
+
+def test_response_pages_are_bucketed_by_period(summary):
+    first = summary(include="responses", limit=4)
+    second = summary(include="responses", limit=4, skip=4)
+
+    assert first["responses_page"] == {"skip": 0, "limit": 4, "returned": 4, "has_more": True}
+    assert second["responses_page"]["has_more"] is False
+    returned = [
+        response["id"]
+        for page in (first, second)
+        for entry in page["summary_data"]
+        for response in entry["responses"]
+    ]
+    assert sorted(returned) == [f"r{index}" for index in range(6)]
+    march = next(entry for entry in second["summary_data"] if (entry["year"], entry["month_number"]) == (2025, 3))
+    assert all(response["month"] == 3 for response in march["responses"])